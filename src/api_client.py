@@ -1,26 +1,27 @@
-# This script interacts with the Bank API using HTTP requests to create, read, update, and delete bank records.
+# This script interacts with the Bank API using the bank client to create, read, update, and delete bank records.
 
-import requests
+from itertools import islice
 
-base_url = "http://localhost:5000/api/banks"
+from client.bank_client import BankClient
 
-# create a new bank
-response = requests.post(base_url, json={"name": "Bank A", "location": "London"})
-print("Created:", response.json())
+with BankClient("http://localhost:5000/api/banks") as client:
+    # create a new bank, with the bulk endpoint which returns its id
+    bank_id = client.create_banks([{"name": "Bank A", "location": "London"}])[0]["id"]
+    print("Created bank with id:", bank_id)
 
-# retrieve all banks
-response = requests.get(base_url)
-print("All Banks:", response.json())
+    # retrieve the first banks, following the pages of the bank list
+    for bank in islice(client.list_banks(limit=5), 10):
+        print("Bank:", bank)
+    print("Number of banks:", client.count_banks())
 
-# get details of a specific bank
-bank_id = '<bank_id>'  # bank id should be taken from db
-response = requests.get(f"{base_url}/{bank_id}")
-print(f"Details for bank with id: {bank_id}", response.json())
+    # get details of the created bank, then get them again: the second time the server only confirms that it did not change
+    bank, etag = client.get_bank_with_etag(bank_id)
+    print(f"Details for bank with id: {bank_id}", bank)
+    client.get_bank(bank_id)
+    print("Banks served from the local cache:", client.cache.hits)
 
-# update a bank
-response = requests.put(f"{base_url}/{bank_id}", json={"name": "Updated Bank", "location": "Paris"})
-print(f"Updated bank with id: {bank_id}", response.json())
+    # update the bank, only if it did not change since it was retrieved
+    print(f"Updated bank with id: {bank_id}", client.update_bank(bank_id, "Updated Bank", "Paris", if_match=etag))
 
-# delete a bank
-response = requests.delete(f"{base_url}/{bank_id}")
-print(f"Deleted bank with id: {bank_id}", response.json())
+    # delete the bank
+    print(f"Deleted bank with id: {bank_id}", client.delete_bank(bank_id))
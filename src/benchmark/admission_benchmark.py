@@ -0,0 +1,181 @@
+# Measures the latency of the bank API when it is offered twice the load it can serve, with and without admission control. Seeds banks
+# into a SQLite database file (or uses the database given with `--database-uri`), and serves the Flask app in a separate threaded
+# process. As on a database server, every query holds one of the 4 pooled connections for `--query-ms`, which bounds the capacity of the
+# server rather than the CPU shared with the clients. The capacity is first measured with closed-loop clients, then requests are sent at
+# a fixed rate of `--overload` times the capacity, whatever the latency, and their latency is measured from the time they were due so
+# that a slow server is not hidden by the client waiting for it.
+#
+# Run from the project folder:
+#   python -m src.benchmark.admission_benchmark --banks 10000 --duration 10 --overload 2 --query-ms 50
+
+import argparse
+import collections
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import requests
+from sqlalchemy import event
+
+from src.benchmark.common import create_benchmark_app, percentile, seed_banks, serve_sync, wait_until_ready
+from src.main.db import db
+from src.main.repository.model.bank import BankEntity
+
+POOL_CONFIG = {'DB_POOL_SIZE': 4, 'DB_POOL_MAX_OVERFLOW': 0}
+# the admission control of the server, whose concurrency matches the pool; the clients share an IP address, so they are not rate limited
+ADMISSION_CONFIG = {
+    'ADMISSION_CONTROL': True,
+    'ADMISSION_RATE_LIMIT': 0,
+    'ADMISSION_MAX_CONCURRENT_READS': 3,
+    'ADMISSION_MAX_CONCURRENT_LISTS': 1,
+    'ADMISSION_MAX_QUEUE': 8,
+    'ADMISSION_QUEUE_TIMEOUT_MS': 100,
+    'ADMISSION_LATENCY_THRESHOLD_MS': 150,
+}
+
+
+def send_request(session: requests.Session, base_url: str, bank_ids: List[str]) -> int:
+    # 80% single bank reads and 20% pages of the bank list
+    if random.random() < 0.8:
+        response = session.get(f'{base_url}/{random.choice(bank_ids)}')
+    else:
+        response = session.get(f'{base_url}?limit=100')
+    return response.status_code
+
+
+def measure_capacity(base_url: str, bank_ids: List[str], concurrency: int, duration: float) -> float:
+    """
+    Sends requests from `concurrency` clients, each waiting for its response before sending the next request, for `duration` seconds.
+
+    :return: The number of successful requests per second.
+    """
+
+    served = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        session = requests.Session()
+        local_served = 0
+        while time.monotonic() < deadline:
+            if send_request(session, base_url, bank_ids) == 200:
+                local_served += 1
+        with lock:
+            served[0] += local_served
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return served[0] / (time.monotonic() - start)
+
+
+def run_open_loop(base_url: str, bank_ids: List[str], rate: float, duration: float, max_clients: int):
+    """
+    Sends requests at a fixed `rate` per second for `duration` seconds, from up to `max_clients` concurrent connections.
+
+    :return: A tuple containing the number of responses per status code (0 for failed connections), the sorted latencies in seconds of
+             the successful requests and of all requests, measured from the time each request was due, and the number of seconds until
+             the last response.
+    """
+
+    statuses = collections.Counter()
+    served_latencies = []
+    all_latencies = []
+    lock = threading.Lock()
+    sessions = threading.local()
+
+    def send(due_at):
+        if not hasattr(sessions, 'session'):
+            sessions.session = requests.Session()
+        try:
+            status = send_request(sessions.session, base_url, bank_ids)
+        except requests.RequestException:
+            status = 0
+        latency = time.monotonic() - due_at
+        with lock:
+            statuses[status] += 1
+            all_latencies.append(latency)
+            if status == 200:
+                served_latencies.append(latency)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_clients) as executor:
+        for index in range(int(rate * duration)):
+            due_at = start + index / rate
+            delay = due_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, due_at)
+    return statuses, sorted(served_latencies), sorted(all_latencies), time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares the latency of the bank API under overload with and without admission control.')
+    parser.add_argument('--banks', type=int, default=10000, help='number of banks to seed')
+    parser.add_argument('--duration', type=float, default=10, help='duration of each run in seconds')
+    parser.add_argument('--overload', type=float, default=2, help='offered load, as a multiple of the measured capacity')
+    parser.add_argument('--concurrency', type=int, default=16, help='number of closed-loop clients measuring the capacity')
+    parser.add_argument('--max-clients', type=int, default=256, help='maximum number of concurrent connections under overload')
+    parser.add_argument('--query-ms', type=float, default=50, help='time each query holds its connection, as on a database server')
+    parser.add_argument('--database-uri', help='database to run against instead of a temporary SQLite file')
+    parser.add_argument('--port', type=int, default=8733)
+    parser.add_argument('--serve', choices=('off', 'on'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        def add_query_time(app):
+            with app.app_context():
+                event.listen(db.engine, 'before_cursor_execute', lambda *_: time.sleep(args.query_ms / 1000))
+
+        config = {**POOL_CONFIG, **(ADMISSION_CONFIG if args.serve == 'on' else {})}
+        serve_sync(args.database_uri, args.port, setup=add_query_time, SLOW_QUERY_THRESHOLD_MS=float('inf'), **config)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_uri = args.database_uri or f"sqlite:///{os.path.join(directory, 'banks.db')}"
+        app = create_benchmark_app(database_uri)
+        with app.app_context():
+            if not args.database_uri:
+                seed_banks(args.banks)
+            bank_ids = [bank_id for (bank_id,) in db.session.query(BankEntity.id).limit(10000)]
+
+        base_url = f'http://127.0.0.1:{args.port}/api/banks'
+        print(f"{'admission':>9} | {'offered/s':>9} | {'served/s':>8} | {'shed %':>6} | {'p50 ok (ms)':>11} | {'p99 ok (ms)':>11} | "
+              f"{'p99 all (ms)':>12}")
+        capacity = None
+        for admission in ('off', 'on'):
+            server = subprocess.Popen([
+                sys.executable, '-m', 'src.benchmark.admission_benchmark', '--serve', admission, '--database-uri', database_uri,
+                '--query-ms', str(args.query_ms), '--port', str(args.port)
+            ])
+            try:
+                wait_until_ready(base_url)
+                if capacity is None:
+                    capacity = measure_capacity(base_url, bank_ids, args.concurrency, args.duration)
+                    print(f'capacity: {capacity:.1f} requests/s with {args.concurrency} closed-loop clients')
+                rate = capacity * args.overload
+                statuses, served_latencies, all_latencies, elapsed = run_open_loop(
+                    base_url, bank_ids, rate, args.duration, args.max_clients
+                )
+                total = sum(statuses.values())
+                shed = statuses[429] + statuses[503]
+                p50_ok = percentile(served_latencies, 0.5) * 1000 if served_latencies else float('nan')
+                p99_ok = percentile(served_latencies, 0.99) * 1000 if served_latencies else float('nan')
+                print(f'{admission:>9} | {rate:>9.1f} | {statuses[200] / elapsed:>8.1f} | {shed / total * 100:>6.1f} | '
+                      f'{p50_ok:>11.1f} | {p99_ok:>11.1f} | {percentile(all_latencies, 0.99) * 1000:>12.1f}')
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == '__main__':
+    main()
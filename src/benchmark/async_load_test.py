@@ -0,0 +1,121 @@
+# Compares the throughput and latency of the Flask (sync) and ASGI (async) bank APIs, each served by a single process so that they run
+# with the same memory budget. Both servers use the same SQLite database file, or the database given with `--database-uri`.
+#
+# Run from the project folder:
+#   python -m src.benchmark.async_load_test --banks 10000 --concurrency 64 --duration 10
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from src.benchmark.common import create_benchmark_app, peak_memory_mb, percentile, seed_banks, serve_sync, wait_until_ready
+from src.main.db import db
+from src.main.repository.model.bank import BankEntity
+
+
+def serve(mode: str, database_uri: str, port: int):
+    """
+    Serves the sync or async bank API on the given port until the process is terminated.
+    """
+
+    if mode == 'sync':
+        serve_sync(database_uri, port)
+    else:
+        import uvicorn
+        from src.main.async_db import create_async_session_factory
+        from src.main.controller.async_bank_controller import AsyncBankController
+        from src.main.repository.async_bank_repository import AsyncBankRepository
+        from src.main.service.async_bank_service import AsyncBankService
+
+        session_factory = create_async_session_factory(database_uri)
+        app = AsyncBankController(AsyncBankService(AsyncBankRepository(session_factory)), on_shutdown=session_factory.kw['bind'].dispose)
+        uvicorn.run(app, host='127.0.0.1', port=port, log_level='warning', access_log=False)
+
+
+def run_load(base_url: str, bank_ids, concurrency: int, duration: float):
+    """
+    Sends requests from `concurrency` clients for `duration` seconds: 80% retrieve a single bank and 20% retrieve a page of 20 banks.
+
+    :return: A tuple containing the number of requests per second, the sorted latencies in seconds and the number of failed requests.
+    """
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        session = requests.Session()
+        local_latencies = []
+        local_errors = 0
+        while time.monotonic() < deadline:
+            url = f'{base_url}/{random.choice(bank_ids)}' if random.random() < 0.8 else f'{base_url}?limit=20'
+            start = time.perf_counter()
+            response = session.get(url)
+            local_latencies.append(time.perf_counter() - start)
+            local_errors += response.status_code != 200
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    return len(latencies) / elapsed, sorted(latencies), errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares the throughput and latency of the sync and async bank APIs.')
+    parser.add_argument('--banks', type=int, default=10000, help='number of banks seeded into the database')
+    parser.add_argument('--concurrency', type=int, default=64, help='number of concurrent clients')
+    parser.add_argument('--duration', type=float, default=10, help='duration of each run in seconds')
+    parser.add_argument('--database-uri', help='database to run against instead of a temporary SQLite file (must already be seeded)')
+    parser.add_argument('--port', type=int, default=8731)
+    parser.add_argument('--serve', choices=('sync', 'async'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.database_uri, args.port)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_uri = args.database_uri or f"sqlite:///{os.path.join(directory, 'banks.db')}"
+        app = create_benchmark_app(database_uri)
+        with app.app_context():
+            if not args.database_uri:
+                seed_banks(args.banks)
+            bank_ids = list(db.session.scalars(db.select(BankEntity.id).limit(10000)))
+
+        base_url = f'http://127.0.0.1:{args.port}/api/banks'
+        print(f"{'server':>6} | {'req/s':>8} | {'p50 (ms)':>8} | {'p99 (ms)':>8} | {'errors':>6} | {'peak RSS (MB)':>13}")
+        for mode in ('sync', 'async'):
+            server = subprocess.Popen([
+                sys.executable, '-m', 'src.benchmark.async_load_test',
+                '--serve', mode, '--database-uri', database_uri, '--port', str(args.port)
+            ])
+            try:
+                wait_until_ready(base_url)
+                throughput, latencies, errors = run_load(base_url, bank_ids, args.concurrency, args.duration)
+                memory = peak_memory_mb(server.pid)
+            finally:
+                server.terminate()
+                server.wait()
+
+            memory = f'{memory:.1f}' if memory is not None else 'n/a'
+            print(f'{mode:>6} | {throughput:>8.1f} | {percentile(latencies, 0.5) * 1000:>8.2f} | '
+                  f'{percentile(latencies, 0.99) * 1000:>8.2f} | {errors:>6} | {memory:>13}')
+
+
+if __name__ == '__main__':
+    main()
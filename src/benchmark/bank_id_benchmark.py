@@ -0,0 +1,93 @@
+# Compares the insert rate and the index size of the bank id schemes on a large table: random UUID4 ids stored as 36 characters (as
+# before), random UUID4 ids stored in 16 bytes, and time-ordered UUID7 ids stored in 16 bytes (as now). Each scheme inserts `--rows`
+# banks, `--batch-size` per transaction, into its own SQLite database file. The tables are created WITHOUT ROWID, so that their rows
+# are stored in the primary key index, as in the clustered index of SQL Server, and the page cache is limited to `--cache-mb` so that
+# the indexes do not fit in memory, as on a large table. The ids are generated before the inserts are timed, so that only the database
+# is measured. The size of the indexes, and how full their pages are, are read from the `dbstat` table of SQLite.
+#
+# Run from the project folder:
+#   python -m src.benchmark.bank_id_benchmark --rows 1000000
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+
+from src.main.uuids import uuid7
+
+SCHEMES = {
+    'uuid4 as VARCHAR(36)': ('VARCHAR(36)', lambda: str(uuid.uuid4())),
+    'uuid4 as BINARY(16)': ('BINARY(16)', lambda: uuid.uuid4().bytes),
+    'uuid7 as BINARY(16)': ('BINARY(16)', lambda: uuid7().bytes),
+}
+
+
+def insert_banks(path: str, id_type: str, ids, batch_size: int, cache_mb: int) -> tuple:
+    """
+    Inserts a bank for each of the given ids into a new database file.
+
+    :return: A tuple containing the rows per second of all inserts and of the last 10% of them, when the table is the largest.
+    """
+
+    connection = sqlite3.connect(path)
+    connection.execute(f'PRAGMA cache_size = -{cache_mb * 1024}')
+    connection.execute('PRAGMA journal_mode = WAL')
+    connection.execute(f'CREATE TABLE banks (id {id_type} PRIMARY KEY, name VARCHAR(100) NOT NULL, location VARCHAR(100) NOT NULL, '
+                       'version INT NOT NULL) WITHOUT ROWID')
+    connection.execute('CREATE INDEX ix_banks_name ON banks (name, id)')
+
+    last_start = len(ids) - len(ids) // 10
+    start = time.perf_counter()
+    last_started_at = start
+    for batch_start in range(0, len(ids), batch_size):
+        if batch_start >= last_start and last_started_at == start:
+            last_started_at = time.perf_counter()
+        rows = [(ids[index], f'Bank {index % 1000}', f'City {index % 100}', 1)
+                for index in range(batch_start, min(batch_start + batch_size, len(ids)))]
+        with connection:
+            connection.executemany('INSERT INTO banks VALUES (?, ?, ?, ?)', rows)
+    elapsed = time.perf_counter() - start
+    last_elapsed = time.perf_counter() - last_started_at
+    connection.close()
+    return len(ids) / elapsed, (len(ids) - last_start) / last_elapsed
+
+
+def index_sizes(path: str) -> dict:
+    """
+    :return: A dictionary mapping the name of each index (`banks` being the primary key) to a tuple of its size in MB and the average
+             fill of its pages in percent.
+    """
+
+    connection = sqlite3.connect(path)
+    sizes = {
+        name: (size / 1e6, 100 * (1 - unused / size))
+        for name, size, unused in connection.execute('SELECT name, SUM(pgsize), SUM(unused) FROM dbstat GROUP BY name')
+        if name in ('banks', 'ix_banks_name')
+    }
+    connection.close()
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares the insert rate and index size of UUID4 and UUID7 bank ids.')
+    parser.add_argument('--rows', type=int, default=1000000, help='number of banks inserted per scheme')
+    parser.add_argument('--batch-size', type=int, default=1000, help='number of banks inserted per transaction')
+    parser.add_argument('--cache-mb', type=int, default=8, help='size of the page cache of SQLite')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'scheme':>20} | {'rows/s':>8} | {'last 10% rows/s':>15} | {'primary key (MB)':>16} | {'pk fill %':>9} | "
+              f"{'ix_banks_name (MB)':>18} | {'ix fill %':>9}")
+        for index, (name, (id_type, generate_id)) in enumerate(SCHEMES.items()):
+            ids = [generate_id() for _ in range(args.rows)]
+            path = os.path.join(directory, f'banks_{index}.db')
+            rate, last_rate = insert_banks(path, id_type, ids, args.batch_size, args.cache_mb)
+            sizes = index_sizes(path)
+            print(f"{name:>20} | {rate:>8.0f} | {last_rate:>15.0f} | {sizes['banks'][0]:>16.1f} | {sizes['banks'][1]:>9.1f} | "
+                  f"{sizes['ix_banks_name'][0]:>18.1f} | {sizes['ix_banks_name'][1]:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# Compares the requests per second of the bank clients with the previous `api_client.py` approach of a separate `requests` call per
+# request, which opens a new connection each time. Seeds banks into a SQLite database file, and serves the Flask app in a separate
+# threaded process. Each client retrieves `--requests` random banks: the previous approach and `BankClient` one at a time, `BankClient`
+# again with its ETag cache already filled (so that the banks are only revalidated), and `AsyncBankClient` with `--concurrency` requests
+# at once. Creating banks one request at a time is then compared with the bulk helper.
+#
+# Run from the project folder:
+#   python -m src.benchmark.client_benchmark --banks 10000 --requests 2000 --concurrency 16
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from src.benchmark.common import create_benchmark_app, seed_banks, serve_sync, wait_until_ready
+from src.client.async_bank_client import AsyncBankClient
+from src.client.bank_client import BankClient
+from src.main.db import db
+from src.main.repository.model.bank import BankEntity
+
+
+def measure(function, count: int) -> float:
+    """
+    :return: The number of requests per second of a function sending `count` requests.
+    """
+
+    start = time.perf_counter()
+    function()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares the requests per second of the bank clients with separate requests calls.')
+    parser.add_argument('--banks', type=int, default=10000, help='number of banks to seed')
+    parser.add_argument('--requests', type=int, default=2000, help='number of banks retrieved, and created, by each client')
+    parser.add_argument('--concurrency', type=int, default=16, help='maximum number of concurrent requests of the async client')
+    parser.add_argument('--port', type=int, default=8735)
+    parser.add_argument('--serve', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve_sync(args.serve, args.port, keep_alive=True, SLOW_QUERY_THRESHOLD_MS=float('inf'))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_uri = f"sqlite:///{os.path.join(directory, 'banks.db')}"
+        app = create_benchmark_app(database_uri)
+        with app.app_context():
+            seed_banks(args.banks)
+            bank_ids = [bank_id for (bank_id,) in db.session.query(BankEntity.id)]
+        sample = [random.choice(bank_ids) for _ in range(args.requests)]
+
+        base_url = f'http://127.0.0.1:{args.port}/api/banks'
+        server = subprocess.Popen([sys.executable, '-m', 'src.benchmark.client_benchmark', '--serve', database_uri,
+                                   '--port', str(args.port)])
+        try:
+            wait_until_ready(base_url)
+            client = BankClient(base_url, cache_size=len(bank_ids))
+            async_client = AsyncBankClient(base_url, max_concurrency=args.concurrency, cache_size=0)
+
+            def get_banks_async():
+                async def get_banks():
+                    await async_client.get_banks(sample)
+                    await async_client.close()
+                asyncio.run(get_banks())
+
+            print(f"{'client':>38} | {'requests/s':>10}")
+            results = [
+                ('requests.get per bank (previous)',
+                 measure(lambda: [requests.get(f'{base_url}/{bank_id}') for bank_id in sample], len(sample))),
+                ('BankClient.get_bank', measure(lambda: [client.get_bank(bank_id) for bank_id in sample], len(sample))),
+                ('BankClient.get_bank (ETag cache)', measure(lambda: [client.get_bank(bank_id) for bank_id in sample], len(sample))),
+                (f'AsyncBankClient.get_banks ({args.concurrency} at once)', measure(get_banks_async, len(sample))),
+            ]
+            for name, rate in results:
+                print(f'{name:>38} | {rate:>10.0f}')
+
+            banks = [{'name': f'Bank {index}', 'location': 'Kosovo'} for index in range(args.requests)]
+            print(f"{'creation':>38} | {'banks/s':>10}")
+            rate = measure(lambda: [requests.post(base_url, json=bank) for bank in banks], len(banks))
+            print(f"{'requests.post per bank (previous)':>38} | {rate:>10.0f}")
+            print(f"{'BankClient.create_banks':>38} | {measure(lambda: client.create_banks(banks), len(banks)):>10.0f}")
+            client.close()
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
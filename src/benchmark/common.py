@@ -0,0 +1,129 @@
+# Helpers shared by the benchmarks, which run the API against a local SQLite database instead of SQL Server.
+
+import logging
+import time
+import uuid
+from typing import Callable, List, Optional
+
+import requests
+from flask import Flask
+from sqlalchemy import insert
+
+from src.main.app import create_app
+from src.main.db import create_schema, db
+from src.main.repository.model.bank import BankEntity
+
+
+def create_benchmark_app(database_uri: str = 'sqlite://', **config) -> Flask:
+    """
+    Creates the Flask app with `create_app`, connected to the given database and without a cache unless configured, and creates its
+    schema.
+
+    :param database_uri: The SQLAlchemy URI of the database, an in-memory SQLite database by default.
+    :param config: Additional Flask config values, e.g. `BANK_CACHE_BACKEND`.
+    :return: The Flask app.
+    """
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_uri, 'BANK_CACHE_BACKEND': 'none', **config})
+    with app.app_context():
+        create_schema()
+    return app
+
+
+def seed_banks(count: int, batch_size: int = 10000):
+    """
+    Inserts `count` banks with random ids into the database of the current app context.
+
+    :param count: The number of banks to be inserted.
+    :param batch_size: The number of banks inserted per statement.
+    :return: None.
+    """
+
+    for start in range(0, count, batch_size):
+        rows = [
+            {'id': str(uuid.uuid4()), 'name': f'Bank {index}', 'location': f'City {index % 100}', 'version': 1}
+            for index in range(start, min(start + batch_size, count))
+        ]
+        db.session.execute(insert(BankEntity), rows)
+    db.session.commit()
+
+
+def serve_sync(database_uri: str, port: int, setup: Optional[Callable[[Flask], None]] = None, keep_alive: bool = False, **config):
+    """
+    Serves the Flask bank API with a threaded server in the current process, until the process is terminated.
+
+    :param database_uri: The SQLAlchemy URI of the database.
+    :param port: The port to listen on, on 127.0.0.1.
+    :param setup: A function called with the app before it is served, e.g. to add listeners to its engine.
+    :param keep_alive: Whether connections are kept open between requests (HTTP/1.1), as by a production server behind a proxy,
+                       rather than closed after each response.
+    :param config: Additional Flask config values.
+    :return: None.
+    """
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class RequestHandler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1' if keep_alive else 'HTTP/1.0'
+
+    # do not log every request, the benchmarks measure the API rather than the logging
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app = create_benchmark_app(database_uri, **config)
+    if setup is not None:
+        setup(app)
+    make_server('127.0.0.1', port, app, threaded=True, request_handler=RequestHandler).serve_forever()
+
+
+def wait_until_ready(base_url: str, timeout: float = 30):
+    """
+    Waits until the bank API at the given URL answers requests.
+
+    :param base_url: The URL of the `/api/banks` endpoint.
+    :param timeout: The number of seconds to wait before failing.
+    :return: None.
+    :raise RuntimeError: If the API does not answer within `timeout` seconds.
+    """
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f'{base_url}?limit=1', timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    raise RuntimeError(f'The server at {base_url} did not start within {timeout} seconds.')
+
+
+def peak_memory_mb(pid: int) -> Optional[float]:
+    """
+    :return: The peak resident memory of the process in MB, or None if it cannot be read (only supported on Linux).
+    """
+
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+def private_memory_mb(pid: int) -> Optional[float]:
+    """
+    :return: The memory of the process which is not shared with any other process in MB, i.e. the memory freed if it exited, or None if it
+             cannot be read (only supported on Linux).
+    """
+
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as smaps:
+            return sum(int(line.split()[1]) for line in smaps if line.startswith(('Private_Clean:', 'Private_Dirty:'))) / 1024
+    except OSError:
+        return None
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    :return: The value below which the given fraction of the sorted values fall (nearest rank).
+    """
+
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
@@ -0,0 +1,88 @@
+# Measures the CPU cost of compressing pages of the bank list against the bytes it saves, for each available encoding and level, and the
+# time of a page request served from the cache of compressed pages compared with one compressed on every request.
+#
+# Run from the project folder:
+#   python -m src.benchmark.compression_benchmark --sizes 100 1000 --repeat 20
+
+import argparse
+import os
+import tempfile
+import time
+
+from src.benchmark.common import create_benchmark_app, seed_banks
+from src.main.compression import StreamCompressor, brotli, zstandard
+from src.main.repository.bank_repository import BankRepository
+from src.main.utils import dumps
+
+LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 11), 'zstd': (1, 3, 19)}
+
+
+def compress(encoding: str, level: int, data: bytes) -> bytes:
+    compressor = StreamCompressor(encoding, level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def measure(function, repeat: int) -> float:
+    """
+    :return: The best time, in seconds, out of `repeat` calls of `function`, measured in CPU time of the current process.
+    """
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        function()
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def measure_requests(client, path: str, repeat: int) -> float:
+    """
+    :return: The average time, in seconds, of `repeat` gzip requests of the given path.
+    """
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        client.get(path, headers={'Accept-Encoding': 'gzip'})
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares the CPU cost and the bytes saved by compressing pages of the bank list.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000], help='numbers of banks per page')
+    parser.add_argument('--repeat', type=int, default=20, help='number of runs per measurement')
+    args = parser.parse_args()
+
+    encodings = ['gzip'] + (['br'] if brotli is not None else []) + (['zstd'] if zstandard is not None else [])
+    print(f"encodings: {', '.join(encodings)} (install brotli and zstandard to compare br and zstd)")
+    with tempfile.TemporaryDirectory() as directory:
+        database_uri = f"sqlite:///{os.path.join(directory, 'banks.db')}"
+        # one app compressing every page again, and one keeping the compressed pages
+        uncached_app = create_benchmark_app(database_uri, COMPRESSION_CACHE_MAX_BYTES=0)
+        cached_app = create_benchmark_app(database_uri)
+
+        print(f"{'banks':>6} | {'encoding':>8} | {'level':>5} | {'bytes':>9} | {'saved %':>7} | {'CPU (ms)':>8} | "
+              f"{'saved KB per CPU ms':>19}")
+        with uncached_app.app_context():
+            seed_banks(max(args.sizes))
+            for count in args.sizes:
+                data = dumps(BankRepository.get_banks_page(count))
+                print(f"{count:>6} | {'identity':>8} | {'':>5} | {len(data):>9} | {0:>7.1f} | {0:>8.3f} | {'':>19}")
+                for encoding in encodings:
+                    for level in LEVELS[encoding]:
+                        size = len(compress(encoding, level, data))
+                        cpu = measure(lambda: compress(encoding, level, data), args.repeat) * 1000
+                        saved = len(data) - size
+                        print(f'{count:>6} | {encoding:>8} | {level:>5} | {size:>9} | {saved / len(data) * 100:>7.1f} | {cpu:>8.3f} | '
+                              f'{saved / 1024 / cpu:>19.1f}')
+
+        print(f"{'banks':>6} | {'compressed per request (ms)':>27} | {'cached (ms)':>11}")
+        for count in args.sizes:
+            path = f'/api/banks?limit={count}'
+            uncached = measure_requests(uncached_app.test_client(), path, args.repeat) * 1000
+            cached_client = cached_app.test_client()
+            cached_client.get(path, headers={'Accept-Encoding': 'gzip'})
+            cached = measure_requests(cached_client, path, args.repeat) * 1000
+            print(f'{count:>6} | {uncached:>27.2f} | {cached:>11.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# Measures the throughput and latency of concurrent bank creates (`POST /api/banks`) with group commit disabled and with several windows,
+# at several levels of concurrency. Each configuration is served by a single threaded process, against a SQLite database file (or the
+# database given with `--database-uri`), where every commit is flushed to disk.
+#
+# Run from the project folder:
+#   python -m src.benchmark.group_commit_benchmark --concurrency 1 8 32 128 --windows 0 2 10 --duration 5
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from src.benchmark.common import create_benchmark_app, percentile, serve_sync, wait_until_ready
+
+
+def run_creates(base_url: str, concurrency: int, duration: float):
+    """
+    Sends create requests from `concurrency` clients for `duration` seconds.
+
+    :return: A tuple containing the number of banks created per second, the sorted latencies in seconds and the number of failed requests.
+    """
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(client_index):
+        session = requests.Session()
+        local_latencies = []
+        local_errors = 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                response = session.post(base_url, json={'name': f'Bank {client_index}', 'location': 'Benchmark'})
+                if response.status_code != 200:
+                    local_errors += 1
+            except requests.RequestException:
+                local_errors += 1
+            local_latencies.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    return (len(latencies) - errors[0]) / elapsed, sorted(latencies), errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares the throughput of concurrent bank creates with and without group commit.')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 128], help='numbers of concurrent clients')
+    parser.add_argument('--windows', type=float, nargs='+', default=[0, 2, 10], help='group commit windows in ms, 0 to disable it')
+    parser.add_argument('--max-batch', type=int, default=100, help='maximum number of creates per transaction')
+    parser.add_argument('--duration', type=float, default=5, help='duration of each run in seconds')
+    parser.add_argument('--database-uri', help='database to run against instead of a temporary SQLite file')
+    parser.add_argument('--port', type=int, default=8732)
+    parser.add_argument('--serve', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve is not None:
+        # waiting for the database lock makes inserts slow, which is what is measured rather than logged
+        serve_sync(args.database_uri, args.port, BANK_CREATE_GROUP_COMMIT_WINDOW_MS=args.serve,
+                   BANK_CREATE_GROUP_COMMIT_MAX_BATCH=args.max_batch, SLOW_QUERY_THRESHOLD_MS=float('inf'))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_uri = args.database_uri or f"sqlite:///{os.path.join(directory, 'banks.db')}"
+        create_benchmark_app(database_uri)
+
+        base_url = f'http://127.0.0.1:{args.port}/api/banks'
+        print(f"{'window (ms)':>11} | {'clients':>7} | {'creates/s':>9} | {'p50 (ms)':>8} | {'p99 (ms)':>8} | {'errors':>6}")
+        for window in args.windows:
+            server = subprocess.Popen([
+                sys.executable, '-m', 'src.benchmark.group_commit_benchmark', '--serve', str(window),
+                '--max-batch', str(args.max_batch), '--database-uri', database_uri, '--port', str(args.port)
+            ])
+            try:
+                wait_until_ready(base_url)
+                for concurrency in args.concurrency:
+                    throughput, latencies, errors = run_creates(base_url, concurrency, args.duration)
+                    print(f'{window:>11g} | {concurrency:>7} | {throughput:>9.1f} | {percentile(latencies, 0.5) * 1000:>8.2f} | '
+                          f'{percentile(latencies, 0.99) * 1000:>8.2f} | {errors:>6}')
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == '__main__':
+    main()
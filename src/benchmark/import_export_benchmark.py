@@ -0,0 +1,108 @@
+# Measures a round trip of the whole bank dataset through the import and export endpoints, for each available file format: a file of
+# `--rows` banks is imported into an empty database (creates), exported, and imported again (updates of the same ids). The server runs
+# in a separate process against a SQLite database file, and its peak memory is reported to check that it does not grow with the file.
+# For comparison, `--baseline-rows` banks are first created with one `POST /api/banks` each.
+#
+# Run from the project folder:
+#   python -m src.benchmark.import_export_benchmark --rows 1000000
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import requests
+
+from src.benchmark.common import peak_memory_mb, serve_sync, wait_until_ready
+from src.main.bank_formats import available_formats, encode_banks
+
+
+def write_file(path: str, file_format: str, rows: int, batch_size: int = 10000):
+    """
+    Writes a file of `rows` banks with random ids in the given format, one batch at a time.
+    """
+
+    def batches():
+        for start in range(0, rows, batch_size):
+            yield [
+                {'id': str(uuid.uuid4()), 'name': f'Bank {index}', 'location': f'City {index % 100}'}
+                for index in range(start, min(start + batch_size, rows))
+            ]
+
+    with open(path, 'wb') as file:
+        for chunk in encode_banks(batches(), file_format):
+            file.write(chunk)
+
+
+def import_file(base_url: str, path: str, file_format: str) -> dict:
+    with open(path, 'rb') as file:
+        # the file object is sent as a stream, rather than read into memory first
+        response = requests.post(f'{base_url}/import?format={file_format}', data=file)
+    response.raise_for_status()
+    return response.json()
+
+
+def export_file(base_url: str, path: str, file_format: str) -> float:
+    """
+    :return: The number of seconds the export took, until its last byte was written to `path`.
+    """
+
+    start = time.perf_counter()
+    with requests.get(f'{base_url}/export?format={file_format}', stream=True) as response, open(path, 'wb') as file:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=1 << 16):
+            file.write(chunk)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures the rows per second of importing and exporting the whole bank dataset.')
+    parser.add_argument('--rows', type=int, default=1000000, help='number of banks in the imported file')
+    parser.add_argument('--baseline-rows', type=int, default=2000, help='number of banks created with one request each, for comparison')
+    parser.add_argument('--formats', nargs='+', default=list(available_formats()), choices=available_formats())
+    parser.add_argument('--port', type=int, default=8734)
+    parser.add_argument('--serve', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        # an import executes the same queries once per chunk by design, which is not an N+1 query pattern
+        serve_sync(args.serve, args.port, SLOW_QUERY_THRESHOLD_MS=float('inf'), N_PLUS_ONE_THRESHOLD=float('inf'))
+        return
+
+    base_url = f'http://127.0.0.1:{args.port}/api/banks'
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'format':>8} | {'file (MB)':>9} | {'import (rows/s)':>15} | {'re-import (rows/s)':>18} | {'export (rows/s)':>15} | "
+              f"{'server peak (MB)':>16}")
+        for index, file_format in enumerate(args.formats):
+            database_uri = f"sqlite:///{os.path.join(directory, f'banks_{file_format}.db')}"
+            server = subprocess.Popen([sys.executable, '-m', 'src.benchmark.import_export_benchmark', '--serve', database_uri,
+                                       '--port', str(args.port)])
+            try:
+                wait_until_ready(base_url)
+                if index == 0 and args.baseline_rows:
+                    session = requests.Session()
+                    start = time.perf_counter()
+                    for row in range(args.baseline_rows):
+                        session.post(base_url, json={'name': f'Bank {row}', 'location': 'Kosovo'}).raise_for_status()
+                    print(f'one request per bank: {args.baseline_rows / (time.perf_counter() - start):.0f} rows/s')
+
+                input_path = os.path.join(directory, f'input.{file_format}')
+                write_file(input_path, file_format, args.rows)
+                created = import_file(base_url, input_path, file_format)
+                output_path = os.path.join(directory, f'output.{file_format}')
+                export_seconds = export_file(base_url, output_path, file_format)
+                updated = import_file(base_url, output_path, file_format)
+                assert created['created'] == args.rows and updated['updated'] >= args.rows, (created, updated)
+                print(f'{file_format:>8} | {os.path.getsize(output_path) / 1e6:>9.1f} | {created["rows_per_second"]:>15} | '
+                      f'{updated["rows_per_second"]:>18} | {updated["updated"] / export_seconds:>15.0f} | '
+                      f'{peak_memory_mb(server.pid) or float("nan"):>16.1f}')
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == '__main__':
+    main()
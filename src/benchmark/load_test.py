@@ -0,0 +1,242 @@
+# Load test of the five bank endpoints. Seeds banks into a SQLite database file (or uses the database given with `--database-uri`),
+# serves the Flask app in a separate process, and drives a configurable mix of endpoints with concurrent clients. Reports the
+# throughput and the p50/p95/p99 latency per endpoint, can save them as JSON, and fails if they regressed compared to a saved run.
+#
+# Run from the project folder:
+#   python -m src.benchmark.load_test --banks 10000 --concurrency 32 --duration 20 --output results.json
+#   python -m src.benchmark.load_test --banks 10000 --concurrency 32 --duration 20 --baseline results.json --threshold 0.15
+
+import argparse
+import collections
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+import requests
+
+from src.benchmark.common import create_benchmark_app, peak_memory_mb, percentile, seed_banks, serve_sync, wait_until_ready
+from src.main.db import db
+from src.main.repository.model.bank import BankEntity
+
+ENDPOINTS = ('create_bank', 'get_banks', 'get_bank', 'update_bank', 'delete_bank')
+DEFAULT_MIX = 'get_bank=50,get_banks=20,create_bank=10,update_bank=10,delete_bank=10'
+
+
+class LoadTestClient:
+    """
+    A client sending requests to one of the five bank endpoints at a time, with a keep-alive session.
+
+    `bank_ids` are read and updated by all clients, while `deletable_ids` are a separate pool of banks which are deleted at most once.
+    """
+
+    def __init__(self, base_url: str, bank_ids: List[str], deletable_ids: collections.deque):
+        self.base_url = base_url
+        self.bank_ids = bank_ids
+        self.deletable_ids = deletable_ids
+        self.session = requests.Session()
+
+    def create_bank(self):
+        return self.session.post(self.base_url, json={'name': 'Load Test Bank', 'location': 'Load Test City'})
+
+    def get_banks(self):
+        return self.session.get(f'{self.base_url}?limit=20')
+
+    def get_bank(self):
+        return self.session.get(f'{self.base_url}/{random.choice(self.bank_ids)}')
+
+    def update_bank(self):
+        bank_id = random.choice(self.bank_ids)
+        return self.session.put(f'{self.base_url}/{bank_id}', json={'name': f'Bank {random.random()}', 'location': 'Updated City'})
+
+    def delete_bank(self):
+        try:
+            bank_id = self.deletable_ids.popleft()
+        except IndexError:
+            # every deletable bank was already deleted, which the API reports with a 404
+            bank_id = 'deleted'
+        return self.session.delete(f'{self.base_url}/{bank_id}')
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """
+    Parses an endpoint mix such as `get_bank=80,get_banks=20` into the weight of each endpoint.
+
+    :raise ValueError: If an endpoint is unknown.
+    """
+
+    weights = {}
+    for item in mix.split(','):
+        endpoint, _, weight = item.partition('=')
+        if endpoint not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{endpoint}', expected one of {', '.join(ENDPOINTS)}.")
+        weights[endpoint] = float(weight)
+    return weights
+
+
+def run_load(base_url: str, bank_ids: List[str], deletable_ids: List[str], mix: Dict[str, float], concurrency: int,
+             duration: float) -> Dict:
+    """
+    Sends requests from `concurrency` clients for `duration` seconds, choosing each endpoint according to its weight in the mix.
+
+    :return: The results of the run, as saved in the JSON output.
+    """
+
+    endpoints, weights = list(mix.keys()), list(mix.values())
+    latencies = collections.defaultdict(list)
+    errors = collections.Counter()
+    lock = threading.Lock()
+    shared_deletable_ids = collections.deque(deletable_ids)
+    deadline = time.monotonic() + duration
+
+    def client():
+        load_test_client = LoadTestClient(base_url, bank_ids, shared_deletable_ids)
+        local_latencies = collections.defaultdict(list)
+        local_errors = collections.Counter()
+        while time.monotonic() < deadline:
+            endpoint = random.choices(endpoints, weights)[0]
+            start = time.perf_counter()
+            try:
+                response = getattr(load_test_client, endpoint)()
+                failed = response.status_code >= 500 or (response.status_code >= 400 and endpoint != 'delete_bank')
+            except requests.RequestException:
+                failed = True
+            local_latencies[endpoint].append(time.perf_counter() - start)
+            local_errors[endpoint] += failed
+        with lock:
+            for endpoint, values in local_latencies.items():
+                latencies[endpoint].extend(values)
+            errors.update(local_errors)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    results = {endpoint: summarize(sorted(values), errors[endpoint], elapsed) for endpoint, values in latencies.items()}
+    results['total'] = summarize(sorted(value for values in latencies.values() for value in values), sum(errors.values()), elapsed)
+    return results
+
+
+def summarize(sorted_latencies: List[float], errors: int, elapsed: float) -> Dict:
+    if not sorted_latencies:
+        return {'requests': 0, 'errors': errors, 'throughput': 0.0}
+    return {
+        'requests': len(sorted_latencies),
+        'errors': errors,
+        'throughput': len(sorted_latencies) / elapsed,
+        'p50_ms': percentile(sorted_latencies, 0.50) * 1000,
+        'p95_ms': percentile(sorted_latencies, 0.95) * 1000,
+        'p99_ms': percentile(sorted_latencies, 0.99) * 1000
+    }
+
+
+def find_regressions(baseline: Dict, results: Dict, threshold: float) -> List[str]:
+    """
+    Compares the results of a run with a baseline run.
+
+    :param threshold: The tolerated relative regression, e.g. 0.1 to fail if a latency grew or a throughput dropped by more than 10%.
+    :return: A description of each regression, empty if there is none.
+    """
+
+    regressions = []
+    for endpoint, baseline_result in baseline['endpoints'].items():
+        result = results['endpoints'].get(endpoint)
+        if not result or not result['requests'] or not baseline_result['requests']:
+            continue
+        if result['throughput'] < baseline_result['throughput'] * (1 - threshold):
+            regressions.append(
+                f"{endpoint}: throughput dropped from {baseline_result['throughput']:.1f} to {result['throughput']:.1f} req/s"
+            )
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if result[key] > baseline_result[key] * (1 + threshold):
+                regressions.append(f'{endpoint}: {key} grew from {baseline_result[key]:.2f} to {result[key]:.2f}')
+    return regressions
+
+
+def print_results(results: Dict):
+    print(f"{'endpoint':>12} | {'requests':>8} | {'errors':>6} | {'req/s':>8} | {'p50 (ms)':>8} | {'p95 (ms)':>8} | {'p99 (ms)':>8}")
+    for endpoint, result in results['endpoints'].items():
+        if not result['requests']:
+            continue
+        print(f"{endpoint:>12} | {result['requests']:>8} | {result['errors']:>6} | {result['throughput']:>8.1f} | "
+              f"{result['p50_ms']:>8.2f} | {result['p95_ms']:>8.2f} | {result['p99_ms']:>8.2f}")
+    if results.get('server_peak_rss_mb') is not None:
+        print(f"server peak RSS: {results['server_peak_rss_mb']:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test of the five bank endpoints.')
+    parser.add_argument('--banks', type=int, default=10000, help='number of banks seeded into the database')
+    parser.add_argument('--concurrency', type=int, default=32, help='number of concurrent clients')
+    parser.add_argument('--duration', type=float, default=20, help='duration of the run in seconds')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'weight of each endpoint (default: {DEFAULT_MIX})')
+    parser.add_argument('--database-uri', help='database to run against instead of a temporary SQLite file (must already be seeded)')
+    parser.add_argument('--port', type=int, default=8732)
+    parser.add_argument('--output', help='file to save the results to, as JSON')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare with, failing if this run regressed')
+    parser.add_argument('--threshold', type=float, default=0.1, help='tolerated relative regression compared to the baseline')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve_sync(args.database_uri, args.port)
+        return
+
+    mix = parse_mix(args.mix)
+    with tempfile.TemporaryDirectory() as directory:
+        database_uri = args.database_uri or f"sqlite:///{os.path.join(directory, 'banks.db')}"
+        app = create_benchmark_app(database_uri)
+        with app.app_context():
+            if not args.database_uri:
+                # seed a second set of banks, which are the ones deleted by the run
+                seed_banks(args.banks * 2)
+            bank_ids = list(db.session.scalars(db.select(BankEntity.id).order_by(BankEntity.id)))
+        random.Random(0).shuffle(bank_ids)
+        bank_ids, deletable_ids = bank_ids[:len(bank_ids) // 2], bank_ids[len(bank_ids) // 2:]
+
+        base_url = f'http://127.0.0.1:{args.port}/api/banks'
+        server = subprocess.Popen([
+            sys.executable, '-m', 'src.benchmark.load_test', '--serve', '--database-uri', database_uri, '--port', str(args.port)
+        ])
+        try:
+            wait_until_ready(base_url)
+            endpoint_results = run_load(base_url, bank_ids, deletable_ids, mix, args.concurrency, args.duration)
+            memory = peak_memory_mb(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+
+    results = {
+        'config': {
+            'banks': args.banks, 'concurrency': args.concurrency, 'duration': args.duration, 'mix': mix,
+            'database': 'custom' if args.database_uri else 'sqlite', 'python': platform.python_version()
+        },
+        'endpoints': endpoint_results,
+        'server_peak_rss_mb': memory
+    }
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = find_regressions(json.load(baseline_file), results, args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
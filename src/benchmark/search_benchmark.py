@@ -0,0 +1,87 @@
+# Measures the latency of filtered, sorted and counted bank searches on a large table, and prints the query plan of each search to show
+# which index it uses. Searches go through the BankService without a cache, so every call queries the database.
+#
+# Run from the project folder:
+#   python -m src.benchmark.search_benchmark --banks 1000000
+
+import argparse
+import statistics
+import time
+
+from src.benchmark.common import create_benchmark_app, seed_banks
+from src.main.db import db
+from src.main.repository.bank_repository import BankRepository
+from src.main.service.bank_service import BankService, decode_cursor
+from src.main.service.model.bank_search import BankSearch
+
+# searches over the banks created by `seed_banks`, named `Bank <index>` and located in `City <index % 100>`
+SEARCHES = {
+    'name exact': BankSearch(name='Bank 500000'),
+    'name prefix, sort=name': BankSearch(name_prefix='Bank 12345', sort='name'),
+    'location exact, sort=location': BankSearch(location='City 42', sort='location'),
+    'location exact, sort=id': BankSearch(location='City 42'),
+    'q prefix, sort=name': BankSearch(q='Bank 99999', sort='name'),
+    'no filter, sort=-name': BankSearch(sort='-name'),
+}
+COUNTS = {
+    'count name exact': BankSearch(name='Bank 500000'),
+    'count name prefix': BankSearch(name_prefix='Bank 12345'),
+    'count location exact': BankSearch(location='City 42'),
+    'count all': BankSearch(),
+}
+
+
+def measure(call, repeat: int) -> float:
+    """
+    :return: The median time, in milliseconds, out of `repeat` calls of `call()`.
+    """
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def explain(search: BankSearch, limit: int, after=None) -> str:
+    """
+    :return: The SQLite query plan of the page query of the search, on a single line.
+    """
+
+    query = BankRepository._build_page_query(BankRepository.BANK_COLUMNS, decode_cursor(after, search.sort_column), search.sort_column,
+                                             search.descending, search.filters()).limit(limit)
+    compiled = query.compile(db.engine)
+    cursor = db.session.connection().connection.cursor()
+    cursor.execute(f'EXPLAIN QUERY PLAN {compiled}', [compiled.params[name] for name in compiled.positiontup])
+    return '; '.join(row[3] for row in cursor.fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures the latency of filtered, sorted and counted bank searches.')
+    parser.add_argument('--banks', type=int, default=1000000, help='number of banks in the table')
+    parser.add_argument('--limit', type=int, default=20, help='page size of the searches')
+    parser.add_argument('--repeat', type=int, default=200, help='number of runs per measurement, the median run is reported')
+    args = parser.parse_args()
+
+    # seeding executes large INSERT statements, which are not worth logging as slow queries
+    app = create_benchmark_app(SLOW_QUERY_THRESHOLD_MS=float('inf'))
+    bank_service = BankService(BankRepository())
+    with app.test_request_context():
+        start = time.perf_counter()
+        seed_banks(args.banks)
+        print(f'seeded {args.banks} banks in {time.perf_counter() - start:.1f}s')
+        print(f"{'search':>32} | {'first page (ms)':>15} | {'next page (ms)':>14} | plan")
+        for label, search in SEARCHES.items():
+            _, next_cursor = bank_service.list_banks_page(args.limit, None, search)
+            first_page = measure(lambda: bank_service.list_banks_page(args.limit, None, search), args.repeat)
+            next_page = measure(lambda: bank_service.list_banks_page(args.limit, next_cursor, search), args.repeat) if next_cursor else 0
+            print(f'{label:>32} | {first_page:>15.3f} | {next_page:>14.3f} | {explain(search, args.limit)}')
+        print(f"{'count':>32} | {'count (ms)':>15} | {'banks':>14} |")
+        for label, search in COUNTS.items():
+            count = bank_service.count_banks(search)
+            print(f'{label:>32} | {measure(lambda: bank_service.count_banks(search), args.repeat):>15.3f} | {count:>14} |')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# Measures the per-row cost of serializing a list of banks, comparing the original read path (BankEntity objects mapped through
+# `inspect()`, validated into Bank models, dumped back to dicts and encoded by `jsonify`) with the current one (selected columns as
+# plain dictionaries encoded by `utils.dumps`).
+#
+# Run from the project folder:
+#   python -m src.benchmark.serialization_benchmark --sizes 1 1000 100000
+
+import argparse
+import time
+
+from flask import jsonify
+from sqlalchemy import inspect
+
+from src.benchmark.common import create_benchmark_app, seed_banks
+from src.main.db import db
+from src.main.repository.bank_repository import BankRepository
+from src.main.repository.model.bank import BankEntity
+from src.main.service.model.bank import Bank
+from src.main.utils import dumps, orjson
+
+
+def serialize_before(count: int) -> bytes:
+    entities = BankEntity.query.order_by(BankEntity.id).limit(count).all()
+    banks = [Bank(**{c.key: getattr(entity, c.key) for c in inspect(entity).mapper.column_attrs}) for entity in entities]
+    return jsonify([bank.model_dump() for bank in banks]).get_data()
+
+
+def serialize_after(count: int) -> bytes:
+    return dumps(BankRepository.get_banks_page(count))
+
+
+def measure(serialize, count: int, repeat: int) -> float:
+    """
+    :return: The best time, in seconds, out of `repeat` calls of `serialize(count)`.
+    """
+
+    best = float('inf')
+    for _ in range(repeat):
+        # start from an empty session, so that no BankEntity objects are reused between runs
+        db.session.remove()
+        start = time.perf_counter()
+        serialize(count)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares the per-row cost of the original and current bank list serialization.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 1000, 100000], help='numbers of banks to serialize')
+    parser.add_argument('--repeat', type=int, default=5, help='number of runs per measurement, the best run is reported')
+    args = parser.parse_args()
+
+    app = create_benchmark_app()
+    with app.test_request_context():
+        seed_banks(max(args.sizes))
+        print(f"JSON encoder: {'orjson' if orjson is not None else 'json'}")
+        print(f"{'banks':>8} | {'before (us/row)':>16} | {'after (us/row)':>15} | {'speedup':>7}")
+        for count in args.sizes:
+            before = measure(serialize_before, count, args.repeat) / count * 1e6
+            after = measure(serialize_after, count, args.repeat) / count * 1e6
+            print(f'{count:>8} | {before:>16.2f} | {after:>15.2f} | {before / after:>6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
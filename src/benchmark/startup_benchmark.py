@@ -0,0 +1,129 @@
+# Measures the cold start of a process serving the bank API, and compares pre-forked workers which create the app themselves with workers
+# forked from a master which preloaded it (as configured in `gunicorn_config.py`): the time until all workers served a first request, and
+# the memory private to each worker. Each measurement runs in a fresh interpreter, against a temporary SQLite database.
+#
+# Run from the project folder (Linux only):
+#   python -m src.benchmark.startup_benchmark --workers 8
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def serve_first_request(app):
+    client = app.test_client()
+    bank_id = client.get('/api/banks?limit=10').get_json()[0]['id']
+    client.get(f'/api/banks/{bank_id}')
+
+
+def measure_cold_start(database_uri: str) -> dict:
+    """
+    :return: The time spent importing the app module, creating the app and serving a first request, in a process which loaded nothing else.
+    """
+
+    start = time.perf_counter()
+    from src.main.app import create_app
+    imported = time.perf_counter()
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_uri})
+    created = time.perf_counter()
+    serve_first_request(app)
+    served = time.perf_counter()
+    return {'ready_at': time.time(), 'import_ms': (imported - start) * 1000, 'create_app_ms': (created - imported) * 1000,
+            'first_request_ms': (served - created) * 1000}
+
+
+def measure_prefork(database_uri: str, workers: int, preload: bool) -> dict:
+    """
+    Forks `workers` processes, each serving a first request, either from a master which created the app beforehand or not.
+
+    :return: The time until all workers served their first request and the private memory of each worker.
+    """
+
+    from src.benchmark.common import private_memory_mb
+
+    config = {'SQLALCHEMY_DATABASE_URI': database_uri}
+    if preload:
+        import gc
+        from src.main.app import create_app
+        app = create_app(config)
+        gc.freeze()
+
+    start = time.perf_counter()
+    read_end, write_end = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            if not preload:
+                from src.main.app import create_app
+                app = create_app(config)
+            serve_first_request(app)
+            result = {'ready_ms': (time.perf_counter() - start) * 1000, 'private_mb': private_memory_mb(os.getpid())}
+            os.write(write_end, (json.dumps(result) + '\n').encode())
+            os._exit(0)
+        pids.append(pid)
+
+    os.close(write_end)
+    with os.fdopen(read_end) as results:
+        worker_results = [json.loads(line) for line in results]
+    for pid in pids:
+        os.waitpid(pid, 0)
+    return {'ready_ms': max(result['ready_ms'] for result in worker_results),
+            'private_mb': statistics.mean(result['private_mb'] for result in worker_results)}
+
+
+def run_measurement(*args) -> dict:
+    """
+    Runs a measurement in a fresh interpreter.
+
+    :return: The result of the measurement, and the time at which its process was started.
+    """
+
+    started_at = time.time()
+    output = subprocess.run([sys.executable, '-m', 'src.benchmark.startup_benchmark', *args], check=True, capture_output=True, text=True)
+    return {**json.loads(output.stdout), 'started_at': started_at}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures the cold start and the per-worker cost of pre-forked workers.')
+    parser.add_argument('--workers', type=int, default=8, help='number of pre-forked workers')
+    parser.add_argument('--repeat', type=int, default=5, help='number of runs per measurement, the median run is reported')
+    parser.add_argument('--measure', choices=('cold', 'preload', 'no-preload'), help=argparse.SUPPRESS)
+    parser.add_argument('--database-uri', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure == 'cold':
+        print(json.dumps(measure_cold_start(args.database_uri)))
+        return
+    if args.measure is not None:
+        print(json.dumps(measure_prefork(args.database_uri, args.workers, args.measure == 'preload')))
+        return
+
+    from src.benchmark.common import create_benchmark_app, seed_banks
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_uri = f"sqlite:///{os.path.join(directory, 'banks.db')}"
+        with create_benchmark_app(database_uri).app_context():
+            seed_banks(100)
+
+        runs = [run_measurement('--measure', 'cold', '--database-uri', database_uri) for _ in range(args.repeat)]
+        print(f"cold start: {statistics.median((run['ready_at'] - run['started_at']) * 1000 for run in runs):.0f} ms from process start "
+              f"(import {statistics.median(run['import_ms'] for run in runs):.1f} ms, "
+              f"create_app {statistics.median(run['create_app_ms'] for run in runs):.1f} ms, "
+              f"first request {statistics.median(run['first_request_ms'] for run in runs):.1f} ms)")
+
+        print(f"{'workers':>10} | {'all workers ready (ms)':>22} | {'private memory per worker (MB)':>30}")
+        for mode in ('no-preload', 'preload'):
+            runs = [run_measurement('--measure', mode, '--database-uri', database_uri, '--workers', str(args.workers))
+                    for _ in range(args.repeat)]
+            print(f"{mode:>10} | {statistics.median(run['ready_ms'] for run in runs):>22.0f} | "
+                  f"{statistics.median(run['private_mb'] for run in runs):>30.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# Measures the latency of updating and deleting a single bank, comparing the original write path (the BankEntity is loaded, modified or
+# deleted through the ORM, and the ORM checks its version) with the current one (a single UPDATE ... RETURNING or DELETE statement).
+# Runs against a SQLite database file, where a round trip costs almost nothing, so `--round-trip-ms` can be used to add the network
+# latency of a database server to every statement.
+#
+# Run from the project folder:
+#   python -m src.benchmark.write_path_benchmark --operations 2000 --round-trip-ms 0.5
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import event
+
+from src.benchmark.common import create_benchmark_app, seed_banks
+from src.main.db import db
+from src.main.repository.bank_repository import BankRepository
+from src.main.repository.model.bank import BankEntity
+
+
+def update_before(bank_id: str, version: int):
+    bank = BankEntity.query.filter_by(id=bank_id).first()
+    if bank.version != version:
+        raise RuntimeError('Bank was modified')
+    bank.name = f'{bank.name}!'
+    db.session.commit()
+
+
+def update_after(bank_id: str, version: int):
+    BankRepository.update_bank(bank_id, {'name': f'Bank {version}'}, {version})
+
+
+def delete_before(bank_id: str, version: int):
+    bank = db.session.get(BankEntity, bank_id)
+    if bank.version != version:
+        raise RuntimeError('Bank was modified')
+    db.session.delete(bank)
+    db.session.commit()
+
+
+def delete_after(bank_id: str, version: int):
+    BankRepository.delete_bank(bank_id, {version})
+
+
+def measure(operation, bank_ids, statements) -> tuple:
+    """
+    :return: The median latency in milliseconds and the mean number of statements of a call of `operation`, on each of the banks.
+    """
+
+    timings = []
+    executed_statements = 0
+    for bank_id in bank_ids:
+        version = BankRepository.get_bank_version(bank_id)
+        # start from an empty session, as every request does
+        db.session.remove()
+        statements_before = statements[0]
+        start = time.perf_counter()
+        operation(bank_id, version)
+        timings.append((time.perf_counter() - start) * 1000)
+        executed_statements += statements[0] - statements_before
+    return statistics.median(timings), executed_statements / len(bank_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares the latency of the original and current single bank update and delete.')
+    parser.add_argument('--operations', type=int, default=2000, help='number of updates and deletes measured per write path')
+    parser.add_argument('--round-trip-ms', type=float, default=0, help='latency added to every statement, as a remote database would')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_benchmark_app(f"sqlite:///{os.path.join(directory, 'banks.db')}")
+        statements = [0]
+
+        def before_cursor_execute(*_):
+            statements[0] += 1
+            if args.round_trip_ms:
+                time.sleep(args.round_trip_ms / 1000)
+
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+            seed_banks(args.operations * 4)
+            bank_ids = [bank['id'] for batch in BankRepository.iter_banks(10000) for bank in batch]
+            chunks = [bank_ids[index::4] for index in range(4)]
+
+            print(f"{'operation':>9} | {'before (ms)':>11} | {'after (ms)':>10} | {'statements before':>17} | {'statements after':>16}")
+            for label, before, after, banks_before, banks_after in (('update', update_before, update_after, chunks[0], chunks[1]),
+                                                                    ('delete', delete_before, delete_after, chunks[2], chunks[3])):
+                before_ms, before_statements = measure(before, banks_before, statements)
+                after_ms, after_statements = measure(after, banks_after, statements)
+                print(f'{label:>9} | {before_ms:>11.3f} | {after_ms:>10.3f} | {before_statements:>17.1f} | {after_statements:>16.1f}')
+
+
+if __name__ == '__main__':
+    main()
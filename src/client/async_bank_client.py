@@ -0,0 +1,216 @@
+import asyncio
+import uuid
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import httpx
+
+from .bank_client import (DEFAULT_BASE_URL, IDEMPOTENCY_HEADER, MAX_BULK_ITEMS, RETRY_STATUSES, BankApiError, ETagCache, _if_match,
+                          _with_query, get_retry_delay)
+
+
+class AsyncBankClient:
+    """
+    Asyncio client of the bank API, with the same methods as `BankClient` as coroutines, sending its requests without blocking the event
+    loop with an `httpx.AsyncClient`. At most `max_concurrency` requests are sent at once, whatever the number of coroutines awaiting them:
+    a semaphore makes the others wait for one of them to complete. The requests share the connections of the client, and are retried and
+    cached with their ETags like the ones of `BankClient`.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, max_concurrency: int = 16, timeout: float = 10, max_retries: int = 3,
+                 backoff: float = 0.1, max_backoff: float = 10, cache_size: int = 1024):
+        """
+        :param base_url: The URL of the `/api/banks` endpoint.
+        :param max_concurrency: The maximum number of requests sent at once, which is also the number of connections kept alive.
+        :param timeout: The number of seconds to wait for the server to connect and to send each part of a response.
+        :param max_retries: The maximum number of times a request is sent again.
+        :param backoff: The number of seconds the backoff starts from, doubled after each attempt.
+        :param max_backoff: The maximum number of seconds waited before a retry, including the delay requested by `Retry-After`.
+        :param cache_size: The maximum number of banks and pages kept in the ETag cache, 0 to disable it.
+        """
+
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cache = ETagCache(cache_size)
+        self.retries = 0
+        self.client = httpx.AsyncClient(
+            timeout=timeout, limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def create_bank(self, name: str, location: str) -> dict:
+        return self._json(await self._request('POST', self.base_url, json={'name': name, 'location': location}))
+
+    async def get_bank(self, bank_id: str) -> Optional[dict]:
+        bank, _ = await self.get_bank_with_etag(bank_id)
+        return bank
+
+    async def get_bank_with_etag(self, bank_id: str) -> Tuple[Optional[dict], Optional[str]]:
+        bank, etag, _ = await self._get_cached(f'{self.base_url}/{bank_id}')
+        return bank, etag
+
+    async def get_banks(self, bank_ids: Iterable[str]) -> List[Optional[dict]]:
+        """
+        Retrieves many banks concurrently, up to `max_concurrency` at a time.
+
+        :return: The bank of each id in order, None for the ids of banks which do not exist.
+        """
+
+        return await asyncio.gather(*(self.get_bank(bank_id) for bank_id in bank_ids))
+
+    async def update_bank(self, bank_id: str, name: str, location: str, if_match: Optional[str] = None) -> dict:
+        return self._json(await self._request('PUT', f'{self.base_url}/{bank_id}', json={'name': name, 'location': location},
+                                              headers=_if_match(if_match)))
+
+    async def patch_bank(self, bank_id: str, if_match: Optional[str] = None, **fields) -> dict:
+        return self._json(await self._request('PATCH', f'{self.base_url}/{bank_id}', json=fields, headers=_if_match(if_match)))
+
+    async def delete_bank(self, bank_id: str, if_match: Optional[str] = None) -> bool:
+        url = f'{self.base_url}/{bank_id}'
+        response = await self._request('DELETE', url, headers=_if_match(if_match))
+        self.cache.discard(url)
+        if response.status_code == 404:
+            return False
+        self._json(response)
+        return True
+
+    async def count_banks(self, **search) -> int:
+        return self._json(await self._request('GET', _with_query(f'{self.base_url}/count', search)))['count']
+
+    async def get_page(self, url: Optional[str] = None, limit: int = 100, **search) -> Tuple[List[dict], Optional[str]]:
+        if url is None:
+            url = _with_query(self.base_url, {'limit': limit, **search})
+        banks, _, next_url = await self._get_cached(url)
+        return banks, next_url
+
+    async def list_banks(self, limit: int = 100, **search) -> AsyncIterator[dict]:
+        """
+        Iterates over all the matching banks, retrieving them one page at a time by following the `next` links. The next page is
+        requested while the banks of the current page are iterated.
+        """
+
+        banks, next_url = await self.get_page(limit=limit, **search)
+        while True:
+            next_page = asyncio.ensure_future(self.get_page(next_url)) if next_url is not None else None
+            try:
+                for bank in banks:
+                    yield bank
+            except BaseException:
+                # the iteration was stopped, so the next page is not needed
+                if next_page is not None:
+                    next_page.cancel()
+                raise
+            if next_page is None:
+                return
+            banks, next_url = await next_page
+
+    async def create_banks(self, banks: Iterable[dict], chunk_size: int = MAX_BULK_ITEMS) -> List[dict]:
+        return await self._bulk('POST', banks, chunk_size)
+
+    async def update_banks(self, banks: Iterable[dict], chunk_size: int = MAX_BULK_ITEMS) -> List[dict]:
+        return await self._bulk('PUT', banks, chunk_size)
+
+    async def delete_banks(self, bank_ids: Iterable[str], chunk_size: int = MAX_BULK_ITEMS) -> List[dict]:
+        results = await self._bulk('DELETE', bank_ids, chunk_size)
+        for result in results:
+            if 'id' in result:
+                self.cache.discard(f"{self.base_url}/{result['id']}")
+        return results
+
+    async def _bulk(self, method: str, items: Iterable, chunk_size: int) -> List[dict]:
+        results = []
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) == min(chunk_size, MAX_BULK_ITEMS):
+                results.extend(await self._send_bulk_chunk(method, chunk, len(results)))
+                chunk = []
+        if chunk:
+            results.extend(await self._send_bulk_chunk(method, chunk, len(results)))
+        return results
+
+    async def _send_bulk_chunk(self, method: str, chunk: List, offset: int) -> List[dict]:
+        results = self._json(await self._request(method, f'{self.base_url}/bulk', json=chunk))['results']
+        # the indexes returned by the server are relative to the chunk
+        for result in results:
+            result['index'] += offset
+        return results
+
+    async def _get_cached(self, url: str) -> Tuple[Optional[object], Optional[str], Optional[str]]:
+        """
+        Sends a GET request, revalidating the response cached for the URL if any, like `BankClient._get_cached`.
+        """
+
+        cached = self.cache.get(url)
+        response = await self._request('GET', url, headers={'If-None-Match': f'"{cached[0]}"'} if cached else None)
+        if response.status_code == 304 and cached is not None:
+            self.cache.hits += 1
+            return cached[1], cached[0], cached[2]
+        if response.status_code == 404:
+            self.cache.discard(url)
+            return None, None, None
+
+        body = self._json(response)
+        next_link = response.links.get('next')
+        next_url = urljoin(url, next_link['url']) if next_link else None
+        etag = response.headers.get('ETag')
+        if etag:
+            etag = etag.removeprefix('W/').strip('"')
+            self.cache.set(url, etag, body, next_url)
+        return body, etag, next_url
+
+    async def _request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> httpx.Response:
+        """
+        Sends a request, and sends it again while it is not served and retries remain, like `BankClient._request`. The semaphore is only
+        held while a request is sent, not while waiting to send it again.
+
+        :return: The last response.
+        :raise httpx.TransportError: If the last attempt failed to connect or timed out.
+        """
+
+        headers = dict(headers or {})
+        if method != 'GET':
+            headers.setdefault(IDEMPOTENCY_HEADER, str(uuid.uuid4()))
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    response = await self.client.request(method, url, headers=headers, **kwargs)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                delay = get_retry_delay(attempt, None, self.backoff, self.max_backoff)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = get_retry_delay(attempt, response.headers.get('Retry-After'), self.backoff, self.max_backoff)
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _json(response: httpx.Response):
+        """
+        :return: The decoded JSON body of a successful response.
+        :raise BankApiError: If the response has an error status.
+        """
+
+        if response.status_code >= 400:
+            try:
+                body = response.json()
+                message = body.get('error') or body.get('message') if isinstance(body, dict) else None
+            except ValueError:
+                message = None
+            raise BankApiError(response.status_code, message or response.reason_phrase)
+        return response.json()
@@ -0,0 +1,374 @@
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode, urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = 'http://localhost:5000/api/banks'
+# the maximum number of items the bulk endpoints accept per request
+MAX_BULK_ITEMS = 10000
+# statuses of the requests which were not served but may be served if sent again: 409 is returned while a request with the same
+# `Idempotency-Key` is in progress, 429 and 503 when the server sheds load, 502 and 504 by a proxy in front of the server
+RETRY_STATUSES = (409, 429, 502, 503, 504)
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+
+class BankApiError(Exception):
+    """
+    Raised when the bank API answers a request with an error status.
+    """
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f'{status_code}: {message}')
+        self.status_code = status_code
+        self.message = message
+
+
+class ETagCache:
+    """
+    A thread-safe cache of the bodies of GET responses and their ETags, which evicts the least recently used responses once it holds
+    `max_entries` of them. A cached body is only returned once the server confirmed, with `304 Not Modified`, that it did not change.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        # maps each URL to a tuple of the ETag, the decoded JSON body and the `next` link of the response
+        self._entries: OrderedDict[str, Tuple[str, object, Optional[str]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[Tuple[str, object, Optional[str]]]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def set(self, url: str, etag: str, body: object, next_url: Optional[str]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[url] = (etag, body, next_url)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, url: str):
+        with self._lock:
+            self._entries.pop(url, None)
+
+
+class BankClient:
+    """
+    Client of the bank API. All requests share a session, which keeps its connections to the server alive rather than opening one per
+    request, and can be used by many threads at once, up to `pool_size` of them having a connection each.
+
+    Requests which were not served (connection errors, timeouts and the statuses of `RETRY_STATUSES`) are sent again up to `max_retries`
+    times. The client waits for the `Retry-After` header of the response if given, otherwise for an exponential backoff with full jitter,
+    so that clients rejected at the same time do not come back at the same time. Either wait is at most `max_backoff` seconds. Writes are
+    sent with an `Idempotency-Key` header, kept across their retries, so that a write whose response was lost is not executed twice if the
+    server has an idempotency store.
+
+    Banks and pages are cached with their ETags: they are requested again with `If-None-Match`, and their body is only sent by the
+    server if it changed.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, timeout: float = 10, max_retries: int = 3, backoff: float = 0.1,
+                 max_backoff: float = 10, pool_size: int = 10, cache_size: int = 1024):
+        """
+        :param base_url: The URL of the `/api/banks` endpoint.
+        :param timeout: The number of seconds to wait for the server to connect and to send each part of a response.
+        :param max_retries: The maximum number of times a request is sent again.
+        :param backoff: The number of seconds the backoff starts from, doubled after each attempt.
+        :param max_backoff: The maximum number of seconds waited before a retry, including the delay requested by `Retry-After`.
+        :param pool_size: The maximum number of connections kept alive, which should match the number of threads using the client.
+        :param cache_size: The maximum number of banks and pages kept in the ETag cache, 0 to disable it.
+        """
+
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cache = ETagCache(cache_size)
+        self.retries = 0
+        self.session = requests.Session()
+        # the retries are handled by the client, so that they honor `Retry-After` and keep the idempotency key of the request
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def create_bank(self, name: str, location: str) -> dict:
+        """
+        :return: The response of the API, containing a message (use `create_banks` to get the id of the created bank).
+        """
+
+        return self._json(self._request('POST', self.base_url, json={'name': name, 'location': location}))
+
+    def get_bank(self, bank_id: str) -> Optional[dict]:
+        """
+        :return: The bank with the given id, or None if it does not exist.
+        """
+
+        bank, _ = self.get_bank_with_etag(bank_id)
+        return bank
+
+    def get_bank_with_etag(self, bank_id: str) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        :return: A tuple containing the bank with the given id and its ETag, which can be given as `if_match` to update or delete the
+                 bank only if it did not change since, or (None, None) if it does not exist.
+        """
+
+        bank, etag, _ = self._get_cached(f'{self.base_url}/{bank_id}')
+        return bank, etag
+
+    def update_bank(self, bank_id: str, name: str, location: str, if_match: Optional[str] = None) -> dict:
+        """
+        :param if_match: The ETag the bank must still have to be updated, as returned by `get_bank_with_etag`.
+        :return: The updated bank.
+        :raise BankApiError: If the bank does not exist, the data is invalid or the bank no longer matches `if_match` (status 412).
+        """
+
+        return self._json(self._request('PUT', f'{self.base_url}/{bank_id}', json={'name': name, 'location': location},
+                                        headers=_if_match(if_match)))
+
+    def patch_bank(self, bank_id: str, if_match: Optional[str] = None, **fields) -> dict:
+        """
+        :param fields: The fields to be updated, `name` and/or `location`.
+        :return: The updated bank.
+        :raise BankApiError: If the bank does not exist, the fields are invalid or the bank no longer matches `if_match` (status 412).
+        """
+
+        return self._json(self._request('PATCH', f'{self.base_url}/{bank_id}', json=fields, headers=_if_match(if_match)))
+
+    def delete_bank(self, bank_id: str, if_match: Optional[str] = None) -> bool:
+        """
+        :return: True if the bank was deleted, False if it does not exist.
+        :raise BankApiError: If the bank no longer matches `if_match` (status 412).
+        """
+
+        url = f'{self.base_url}/{bank_id}'
+        response = self._request('DELETE', url, headers=_if_match(if_match))
+        self.cache.discard(url)
+        if response.status_code == 404:
+            return False
+        self._json(response)
+        return True
+
+    def count_banks(self, **search) -> int:
+        """
+        :param search: The filters of `GET /api/banks`, e.g. `name_prefix`.
+        :return: The number of matching banks.
+        """
+
+        return self._json(self._request('GET', _with_query(f'{self.base_url}/count', search)))['count']
+
+    def get_page(self, url: Optional[str] = None, limit: int = 100, **search) -> Tuple[List[dict], Optional[str]]:
+        """
+        Retrieves a single page of banks.
+
+        :param url: The `next` URL returned with the previous page, or None to retrieve the first page.
+        :param limit: The maximum number of banks per page, only used for the first page.
+        :param search: The filters and `sort` of `GET /api/banks`, only used for the first page.
+        :return: A tuple containing the banks of the page and the URL of the next page, or None if it is the last page.
+        """
+
+        if url is None:
+            url = _with_query(self.base_url, {'limit': limit, **search})
+        banks, _, next_url = self._get_cached(url)
+        return banks, next_url
+
+    def list_banks(self, limit: int = 100, **search) -> Iterator[dict]:
+        """
+        Iterates over all the matching banks, retrieving them one page at a time by following the `next` links.
+
+        :param limit: The maximum number of banks per page.
+        :param search: The filters and `sort` of `GET /api/banks`.
+        :return: An iterator of banks.
+        """
+
+        banks, next_url = self.get_page(limit=limit, **search)
+        yield from banks
+        while next_url is not None:
+            banks, next_url = self.get_page(next_url)
+            yield from banks
+
+    def create_banks(self, banks: Iterable[dict], chunk_size: int = MAX_BULK_ITEMS) -> List[dict]:
+        """
+        Creates banks with the bulk endpoint, sending `chunk_size` of them per request.
+
+        :param banks: The banks, each with a `name` and a `location`.
+        :return: The result of each bank in order, with its `index`, and either a `201` status with its `id` or a `400` status with an
+                 `error` message.
+        """
+
+        return self._bulk('POST', banks, chunk_size)
+
+    def update_banks(self, banks: Iterable[dict], chunk_size: int = MAX_BULK_ITEMS) -> List[dict]:
+        """
+        Updates banks with the bulk endpoint, sending `chunk_size` of them per request.
+
+        :param banks: The banks, each with an `id`, a `name` and a `location`.
+        :return: The result of each bank in order, with its `index`, and a `200`, `404` or `400` status.
+        """
+
+        return self._bulk('PUT', banks, chunk_size)
+
+    def delete_banks(self, bank_ids: Iterable[str], chunk_size: int = MAX_BULK_ITEMS) -> List[dict]:
+        """
+        Deletes banks with the bulk endpoint, sending `chunk_size` of their ids per request.
+
+        :return: The result of each id in order, with its `index`, and a `200`, `404` or `400` status.
+        """
+
+        results = self._bulk('DELETE', bank_ids, chunk_size)
+        for result in results:
+            if 'id' in result:
+                self.cache.discard(f"{self.base_url}/{result['id']}")
+        return results
+
+    def _bulk(self, method: str, items: Iterable, chunk_size: int) -> List[dict]:
+        results = []
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) == min(chunk_size, MAX_BULK_ITEMS):
+                results.extend(self._send_bulk_chunk(method, chunk, len(results)))
+                chunk = []
+        if chunk:
+            results.extend(self._send_bulk_chunk(method, chunk, len(results)))
+        return results
+
+    def _send_bulk_chunk(self, method: str, chunk: List, offset: int) -> List[dict]:
+        results = self._json(self._request(method, f'{self.base_url}/bulk', json=chunk))['results']
+        # the indexes returned by the server are relative to the chunk
+        for result in results:
+            result['index'] += offset
+        return results
+
+    def _get_cached(self, url: str) -> Tuple[Optional[object], Optional[str], Optional[str]]:
+        """
+        Sends a GET request, revalidating the response cached for the URL if any.
+
+        :return: A tuple containing the decoded JSON body, its ETag and the URL of its `next` link, or (None, None, None) if the resource
+                 does not exist.
+        """
+
+        cached = self.cache.get(url)
+        response = self._request('GET', url, headers={'If-None-Match': f'"{cached[0]}"'} if cached else None)
+        if response.status_code == 304 and cached is not None:
+            self.cache.hits += 1
+            return cached[1], cached[0], cached[2]
+        if response.status_code == 404:
+            self.cache.discard(url)
+            return None, None, None
+
+        body = self._json(response)
+        next_link = response.links.get('next')
+        next_url = urljoin(url, next_link['url']) if next_link else None
+        etag = response.headers.get('ETag')
+        if etag:
+            etag = etag.removeprefix('W/').strip('"')
+            self.cache.set(url, etag, body, next_url)
+        return body, etag, next_url
+
+    def _request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> requests.Response:
+        """
+        Sends a request, and sends it again while it is not served and retries remain.
+
+        :return: The last response.
+        :raise requests.RequestException: If the last attempt failed to connect or timed out.
+        """
+
+        headers = dict(headers or {})
+        if method != 'GET':
+            headers.setdefault(IDEMPOTENCY_HEADER, str(uuid.uuid4()))
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, headers=headers, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                delay = get_retry_delay(attempt, None, self.backoff, self.max_backoff)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = get_retry_delay(attempt, response.headers.get('Retry-After'), self.backoff, self.max_backoff)
+                response.close()
+            attempt += 1
+            self.retries += 1
+            time.sleep(delay)
+
+    @staticmethod
+    def _json(response: requests.Response):
+        """
+        :return: The decoded JSON body of a successful response.
+        :raise BankApiError: If the response has an error status.
+        """
+
+        if response.status_code >= 400:
+            try:
+                body = response.json()
+                message = body.get('error') or body.get('message') if isinstance(body, dict) else None
+            except ValueError:
+                message = None
+            raise BankApiError(response.status_code, message or response.reason)
+        return response.json()
+
+
+def get_retry_delay(attempt: int, retry_after: Optional[str], backoff: float, max_backoff: float) -> float:
+    """
+    :param attempt: The number of times the request was already sent again.
+    :param retry_after: The `Retry-After` header of the response, or None if there is none, e.g. because the request failed to connect.
+    :param backoff: The number of seconds the backoff starts from, doubled after each attempt.
+    :param max_backoff: The maximum number of seconds to wait.
+    :return: The number of seconds to wait before sending a request again: the delay requested by `Retry-After` if given, otherwise an
+             exponential backoff with full jitter, and at most `max_backoff` either way.
+    """
+
+    delay = _parse_retry_after(retry_after)
+    if delay is None:
+        return random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+    # a server or proxy asking for a long delay must not stall the caller beyond its own limit
+    return min(max_backoff, delay + random.uniform(0, backoff))
+
+
+def _if_match(etag: Optional[str]) -> Optional[Dict[str, str]]:
+    return {'If-Match': f'"{etag}"'} if etag is not None else None
+
+
+def _with_query(url: str, params: dict) -> str:
+    params = {name: value for name, value in params.items() if value is not None}
+    return f'{url}?{urlencode(params)}' if params else url
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    :return: The number of seconds to wait according to a `Retry-After` header, given either in seconds or as an HTTP date, or None if
+             the header is missing or invalid.
+    """
+
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
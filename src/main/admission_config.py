@@ -0,0 +1,34 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class AdmissionConfig:
+    """
+    Configuration class which reads the admission control environment variables from `.env`.
+
+    If `ADMISSION_CONTROL` is true, each client (identified by its IP address, or by the `ADMISSION_CLIENT_HEADER` if set) may send
+    `ADMISSION_RATE_LIMIT` bank requests per second, in bursts of up to `ADMISSION_BURST`. The number of concurrent requests is limited per
+    route class: single bank reads and counts, bank lists (`GET /api/banks`, including streams), writes, and the long-lived change feed
+    streams. Requests beyond the limit wait up to `ADMISSION_QUEUE_TIMEOUT_MS` in a queue of at most `ADMISSION_MAX_QUEUE` requests, and
+    are rejected without waiting once the average latency of their route class exceeds `ADMISSION_LATENCY_THRESHOLD_MS`. All limits apply
+    to each process.
+
+    A change feed stream holds a thread of its gunicorn worker until it ends, so `ADMISSION_MAX_CONCURRENT_STREAMS` defaults to one less
+    than `GUNICORN_THREADS`, leaving a thread to the other requests of each worker.
+    """
+
+    ADMISSION_CONTROL = os.getenv('ADMISSION_CONTROL', 'false').lower() == 'true'
+    ADMISSION_CLIENT_HEADER = os.getenv('ADMISSION_CLIENT_HEADER', '')
+    ADMISSION_RATE_LIMIT = float(os.getenv('ADMISSION_RATE_LIMIT', '50'))
+    ADMISSION_BURST = float(os.getenv('ADMISSION_BURST', '100'))
+    ADMISSION_MAX_CONCURRENT_READS = int(os.getenv('ADMISSION_MAX_CONCURRENT_READS', '32'))
+    ADMISSION_MAX_CONCURRENT_LISTS = int(os.getenv('ADMISSION_MAX_CONCURRENT_LISTS', '4'))
+    ADMISSION_MAX_CONCURRENT_WRITES = int(os.getenv('ADMISSION_MAX_CONCURRENT_WRITES', '16'))
+    ADMISSION_MAX_CONCURRENT_STREAMS = int(
+        os.getenv('ADMISSION_MAX_CONCURRENT_STREAMS', str(max(1, int(os.getenv('GUNICORN_THREADS', '4')) - 1)))
+    )
+    ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', '64'))
+    ADMISSION_QUEUE_TIMEOUT_MS = float(os.getenv('ADMISSION_QUEUE_TIMEOUT_MS', '500'))
+    ADMISSION_LATENCY_THRESHOLD_MS = float(os.getenv('ADMISSION_LATENCY_THRESHOLD_MS', '1000'))
@@ -0,0 +1,238 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from .instrumentation import CounterMetric
+
+# weight of the latest request in the moving average of the latency of a route class
+LATENCY_SMOOTHING = 0.2
+
+
+class TokenBucket:
+    """
+    A token bucket holding up to `burst` tokens, refilled at `rate` tokens per second. Not thread-safe on its own.
+    """
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = now
+
+    def take(self, now: float) -> float:
+        """
+        Takes a token from the bucket, if it holds one.
+
+        :param now: The current time, in seconds of `time.monotonic`.
+        :return: 0 if a token was taken, otherwise the number of seconds until the bucket holds a token again.
+        """
+
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    A thread-safe rate limiter giving each client its own TokenBucket. Only the buckets of the `max_clients` most recently seen clients are
+    kept, a client seen again after its bucket was evicted starting with a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, client: str) -> float:
+        """
+        Takes a token from the bucket of a client.
+
+        :param client: The identifier of the client, e.g. its IP address.
+        :return: 0 if the client may send the request, otherwise the number of seconds it should wait before retrying.
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst, now)
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+            return bucket.take(now)
+
+
+class ConcurrencyLimiter:
+    """
+    Limits the number of requests of a route class executed at the same time to `limit`. The requests arriving while all slots are taken
+    wait in a queue for at most `queue_timeout` seconds, and are rejected immediately if `max_queue` requests are already waiting, or if the
+    moving average of the latency of the route class exceeds `latency_threshold` seconds, since they would probably not be served in time.
+    Requests are served in the order they arrived.
+    """
+
+    def __init__(self, limit: int, max_queue: int, queue_timeout: float, latency_threshold: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_threshold = latency_threshold
+        self.active = 0
+        self.queued = 0
+        self.latency = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> Optional[str]:
+        """
+        Takes a slot, waiting in the queue if none is free.
+
+        :return: None if a slot was taken, otherwise the reason the request is rejected: `queue_full`, `latency` or `queue_timeout`.
+        """
+
+        with self._condition:
+            if self.active < self.limit and not self.queued:
+                self.active += 1
+                return None
+            if self.queued >= self.max_queue:
+                return 'queue_full'
+            if self.latency > self.latency_threshold:
+                return 'latency'
+
+            self.queued += 1
+            try:
+                acquired = self._condition.wait_for(lambda: self.active < self.limit, self.queue_timeout)
+            finally:
+                self.queued -= 1
+            if not acquired:
+                return 'queue_timeout'
+            self.active += 1
+            return None
+
+    def release(self, latency: float):
+        """
+        Frees a slot taken by `acquire`.
+
+        :param latency: The number of seconds since the request arrived, including the time it waited in the queue.
+        :return: None.
+        """
+
+        with self._condition:
+            self.active -= 1
+            self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+            self._condition.notify()
+
+
+class AdmissionControl:
+    """
+    Decides which requests are executed under load: each client is limited to `rate` requests per second by a RateLimiter (with bursts of
+    up to `burst` requests), and each route class to a number of concurrent requests by a ConcurrencyLimiter. Rejecting the requests which
+    cannot be served in time keeps the latency of the others bounded, rather than letting every request wait in an unbounded queue.
+
+    The limits apply to each process on its own.
+    """
+
+    def __init__(self, rate: float, burst: float, concurrency_limits: Dict[str, int], max_queue: int, queue_timeout: float,
+                 latency_threshold: float):
+        """
+        :param rate: The number of requests per second each client may send, or 0 for no limit.
+        :param burst: The number of requests a client may send at once, above `rate`.
+        :param concurrency_limits: The maximum number of concurrent requests of each route class.
+        :param max_queue: The maximum number of requests of each route class waiting for a slot.
+        :param queue_timeout: The maximum number of seconds a request waits for a slot.
+        :param latency_threshold: The moving average of the latency, in seconds, above which a route class rejects the requests which
+                                  would have to wait for a slot.
+        """
+
+        self.rate_limiter = RateLimiter(rate, burst) if rate > 0 else None
+        self.concurrency_limiters = {
+            route_class: ConcurrencyLimiter(limit, max_queue, queue_timeout, latency_threshold)
+            for route_class, limit in concurrency_limits.items()
+        }
+        self.shed_requests = CounterMetric(
+            'http_requests_shed_total', 'Number of requests rejected by the admission control.', ('route_class', 'reason')
+        )
+
+    def admit(self, client: str, route_class: str) -> Tuple[Optional[int], Optional[float]]:
+        """
+        Decides whether a request is executed, taking a slot of its route class if it is.
+
+        :param client: The identifier of the client sending the request.
+        :param route_class: The route class of the request, one of the keys of the concurrency limits.
+        :return: A tuple of None and None if the request is admitted, and `release` must be called once it completes, otherwise a tuple of
+                 the status code of the response (429 if the client exceeded its rate, 503 if the route class is overloaded) and the
+                 number of seconds after which the client may retry.
+        """
+
+        if self.rate_limiter is not None:
+            retry_after = self.rate_limiter.take(client)
+            if retry_after:
+                self.shed_requests.inc(route_class, 'rate_limited')
+                return 429, retry_after
+
+        reason = self.concurrency_limiters[route_class].acquire()
+        if reason is not None:
+            self.shed_requests.inc(route_class, reason)
+            return 503, 1
+        return None, None
+
+    def release(self, route_class: str, latency: float):
+        """
+        Frees the slot taken by a request admitted by `admit`.
+
+        :param route_class: The route class of the request.
+        :param latency: The number of seconds since the request arrived.
+        :return: None.
+        """
+
+        self.concurrency_limiters[route_class].release(latency)
+
+    def render_metrics(self) -> Iterable[str]:
+        """
+        :return: The shed request counters, and the concurrent and queued requests and the latency of each route class, in the Prometheus
+                 text format.
+        """
+
+        yield from self.shed_requests.render()
+        for name, attribute in (('requests_in_flight', 'active'), ('requests_queued', 'queued'), ('latency_seconds', 'latency')):
+            yield f'# TYPE admission_{name} gauge'
+            for route_class, limiter in sorted(self.concurrency_limiters.items()):
+                yield f'admission_{name}{{route_class="{route_class}"}} {getattr(limiter, attribute)}'
+
+
+def create_admission_control(config) -> Optional[AdmissionControl]:
+    """
+    Creates the AdmissionControl described by the given configuration.
+
+    :param config: A mapping (e.g. the Flask app config) which may contain the `ADMISSION_*` settings defined in AdmissionConfig.
+    :return: The AdmissionControl, or None if admission control is disabled.
+    """
+
+    if not config.get('ADMISSION_CONTROL', False):
+        return None
+    return AdmissionControl(
+        rate=config.get('ADMISSION_RATE_LIMIT', 50),
+        burst=config.get('ADMISSION_BURST', 100),
+        concurrency_limits={
+            'read': config.get('ADMISSION_MAX_CONCURRENT_READS', 32),
+            'list': config.get('ADMISSION_MAX_CONCURRENT_LISTS', 4),
+            'write': config.get('ADMISSION_MAX_CONCURRENT_WRITES', 16),
+            'stream': config.get('ADMISSION_MAX_CONCURRENT_STREAMS', 3),
+        },
+        max_queue=config.get('ADMISSION_MAX_QUEUE', 64),
+        queue_timeout=config.get('ADMISSION_QUEUE_TIMEOUT_MS', 500) / 1000,
+        latency_threshold=config.get('ADMISSION_LATENCY_THRESHOLD_MS', 1000) / 1000
+    )
+
+
+def format_retry_after(seconds: float) -> str:
+    """
+    :return: The value of a `Retry-After` header asking to retry after the given number of seconds, which must be a whole number.
+    """
+
+    return str(max(1, math.ceil(seconds)))
@@ -1,13 +1,87 @@
+from typing import Any, Mapping, Optional
+
 from flask import Flask
 
-from .controller.bank_controller import bank_controller
-from .db import db
-from .db_config import DbConfig
 
-app = Flask(__name__)
-app.config.from_object(DbConfig)
-app.register_blueprint(bank_controller, url_prefix='/api/banks')
-db.init_app(app)
+def create_app(config: Optional[Mapping[str, Any]] = None) -> Flask:
+    """
+    Creates the Flask app serving the bank API. The config classes, and the controllers with everything they depend on, are only imported
+    here, so importing this module neither reads `.env` nor loads the API. No database connection is opened until the first query.
+    Each app gets its own extensions, and no module-level state is changed, so that the apps created in a process are isolated.
+
+    :param config: Config values overriding the ones read from `.env`, e.g. `SQLALCHEMY_DATABASE_URI` or `DB_REPLICA_URIS`.
+    :return: The Flask app.
+    """
+
+    from .admission_config import AdmissionConfig
+    from .cache_config import CacheConfig
+    from .change_feed_config import ChangeFeedConfig
+    from .compression import Compression
+    from .compression_config import CompressionConfig
+    from .controller.bank_controller import bank_controller
+    from .controller.monitoring_controller import monitoring_controller
+    from .db import create_schema, db
+    from .db_config import DbConfig, get_engine_options, get_replica_binds
+    from .db_routing import init_replica_routing
+    from .group_commit_config import GroupCommitConfig
+    from .idempotency_config import IdempotencyConfig
+    from .instrumentation import Instrumentation
+    from .instrumentation_config import InstrumentationConfig
+
+    app = Flask(__name__)
+    app.config.from_object(DbConfig)
+    app.config.from_object(CacheConfig)
+    app.config.from_object(InstrumentationConfig)
+    app.config.from_object(GroupCommitConfig)
+    app.config.from_object(IdempotencyConfig)
+    app.config.from_object(AdmissionConfig)
+    app.config.from_object(CompressionConfig)
+    app.config.from_object(ChangeFeedConfig)
+    app.config.update(config or {})
+    # built once the database URI is final, so that the pool options match the database actually used
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', get_engine_options(app.config))
+    app.config.setdefault('SQLALCHEMY_BINDS', get_replica_binds(app.config))
+
+    # initialized before the blueprints are registered, so that they can add their own metrics, and created for each app, so that the
+    # metrics of an app are not collected by the others
+    Instrumentation(app)
+    # initialized after the instrumentation, so that compression runs first and is included in the measured time
+    Compression(app)
+    app.register_blueprint(bank_controller, url_prefix='/api/banks')
+    app.register_blueprint(monitoring_controller)
+    db.init_app(app)
+    init_replica_routing(app)
+
+    @app.cli.command('create-schema')
+    def create_schema_command():
+        """
+        Creates the tables and indexes which do not exist yet in the configured database.
+        """
+
+        create_schema()
+
+    @app.cli.command('migrate-bank-ids')
+    def migrate_bank_ids_command():
+        """
+        Converts the bank ids stored as strings to UUIDs, keeping their values. Run it while the app is stopped.
+        """
+
+        from .repository.bank_id_migration import migrate_bank_ids
+
+        migrated_tables = migrate_bank_ids()
+        print(f"Migrated the bank ids of {', '.join(migrated_tables)}." if migrated_tables else 'The bank ids are already stored as UUIDs.')
+
+    @app.cli.command('maintain-bank-changes')
+    def maintain_bank_changes_command():
+        """
+        Compacts the bank change feed and deletes its expired changes, e.g. from a scheduled job rather than when the feed is read.
+        """
+
+        compacted, deleted = app.extensions['bank_change_service'].maintain(force=True)
+        print(f'Compacted {compacted} and deleted {deleted} bank changes.')
+
+    return app
+
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
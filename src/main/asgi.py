@@ -0,0 +1,15 @@
+from .async_db import create_async_session_factory
+from .cache.bank_cache import create_bank_cache
+from .cache_config import CacheConfig
+from .controller.async_bank_controller import AsyncBankController
+from .db_config import DbConfig, get_engine_options
+from .repository.async_bank_repository import AsyncBankRepository
+from .service.async_bank_service import AsyncBankService
+
+# the asyncio counterpart of `wsgi.py`, to be served by an ASGI server, e.g. `uvicorn main.asgi:app` from the `src` folder
+session_factory = create_async_session_factory(DbConfig.SQLALCHEMY_DATABASE_URI, get_engine_options(vars(DbConfig)))
+app = AsyncBankController(
+    # the writes invalidate the bank cache of the Flask app, which is only shared with it by the Redis backend
+    AsyncBankService(AsyncBankRepository(session_factory), create_bank_cache(vars(CacheConfig))),
+    on_shutdown=session_factory.kw['bind'].dispose
+)
@@ -0,0 +1,43 @@
+from typing import Dict, Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# asyncio drivers replacing the blocking drivers of the database URIs used by the app
+ASYNC_DRIVERS = {
+    'mssql+pyodbc': 'mssql+aioodbc',
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite'
+}
+
+# engine options which also apply to the asyncio engine, the instrumented pool and fast_executemany only exist for the blocking drivers
+ASYNC_ENGINE_OPTIONS = ('pool_size', 'max_overflow', 'pool_recycle', 'pool_pre_ping', 'pool_timeout', 'connect_args')
+
+
+def to_async_database_uri(database_uri: str) -> str:
+    """
+    Replaces the driver of a database URI with its asyncio counterpart, e.g. `mssql+pyodbc` with `mssql+aioodbc`.
+
+    :param database_uri: The SQLAlchemy URI of the database, as used by the Flask app.
+    :return: The SQLAlchemy URI of the same database for the asyncio engine.
+    :raise ValueError: If there is no asyncio driver for the database.
+    """
+
+    scheme, separator, rest = database_uri.partition('://')
+    if scheme not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver is known for '{scheme}' databases.")
+    return ASYNC_DRIVERS[scheme] + separator + rest
+
+
+def create_async_session_factory(database_uri: str, engine_options: Optional[Dict] = None) -> async_sessionmaker:
+    """
+    Creates an asyncio engine for the given database, and a factory of the sessions bound to it.
+
+    :param database_uri: The SQLAlchemy URI of the database, as used by the Flask app.
+    :param engine_options: The `SQLALCHEMY_ENGINE_OPTIONS` of the Flask app, of which only the pool sizing options are used.
+    :return: The session factory. Its engine is available as `session_factory.kw['bind']`.
+    """
+
+    options = {key: value for key, value in (engine_options or {}).items() if key in ASYNC_ENGINE_OPTIONS}
+    engine = create_async_engine(to_async_database_uri(database_uri), **options)
+    # keep the attributes of committed entities loaded, since they cannot be lazily refreshed outside of the session
+    return async_sessionmaker(engine, expire_on_commit=False)
@@ -0,0 +1,144 @@
+import csv
+import io
+import json
+import shutil
+import tempfile
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from .exceptions import InvalidFileError
+from .utils import dumps
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow is optional, the `parquet` format is only available when it is installed
+    pyarrow = None
+
+# columns of the exported files, in order
+COLUMNS = ('id', 'name', 'location')
+# mimetype and file extension of each format
+FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+# uploaded Parquet files larger than this are spooled to a temporary file rather than held in memory
+PARQUET_SPOOL_SIZE = 16 * 1024 * 1024
+
+
+def available_formats() -> Tuple[str, ...]:
+    """
+    :return: The names of the supported file formats, `parquet` only being supported if `pyarrow` is installed.
+    """
+
+    return tuple(file_format for file_format in FORMATS if file_format != 'parquet' or pyarrow is not None)
+
+
+def encode_banks(batches: Iterable[List[Dict]], file_format: str) -> Iterator[bytes]:
+    """
+    Encodes batches of banks to a file, one chunk at a time, so that only one batch is held in memory.
+
+    :param batches: Lists of dictionaries with the COLUMNS of the banks.
+    :param file_format: One of `available_formats`.
+    :return: A generator yielding the chunks of the file, about one per batch.
+    """
+
+    if file_format == 'ndjson':
+        for batch in batches:
+            yield b''.join(dumps(bank) + b'\n' for bank in batch)
+    elif file_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(COLUMNS)
+        for batch in batches:
+            writer.writerows([bank[column] for column in COLUMNS] for bank in batch)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+    else:
+        # each batch is written as a row group, flushed to the response before the next batch is read
+        sink = _ChunkSink()
+        schema = pyarrow.schema([(column, pyarrow.string()) for column in COLUMNS])
+        with pyarrow.parquet.ParquetWriter(sink, schema) as writer:
+            for batch in batches:
+                writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+                yield sink.drain()
+        yield sink.drain()
+
+
+def decode_banks(stream: IO[bytes], file_format: str, batch_size: int = 1000) -> Iterator[Tuple[Optional[Dict], Optional[str]]]:
+    """
+    Decodes the banks of an uploaded file, one at a time, while it is being read. NDJSON and CSV files are read as a stream; Parquet
+    files, whose metadata is at their end, are first spooled to memory or to a temporary file.
+
+    :param stream: The binary stream of the file.
+    :param file_format: One of `available_formats`.
+    :param batch_size: The number of rows read at once from a Parquet file.
+    :return: A generator yielding, for each row of the file, a tuple of the dictionary of the row and None, or None and an error message
+             if the row cannot be decoded.
+    :raise InvalidFileError: While iterating, if the rest of the file cannot be decoded, e.g. a CSV file which is not encoded in UTF-8.
+    """
+
+    if not isinstance(stream, io.BufferedIOBase):
+        stream = io.BufferedReader(stream)
+    if file_format == 'ndjson':
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line), None
+            except ValueError:
+                yield None, 'The line is not valid JSON.'
+    elif file_format == 'csv':
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+        try:
+            for row in reader:
+                # an empty cell is read as an empty string, which is no id
+                yield {**row, 'id': row.get('id') or None}, None
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise InvalidFileError(f'The file is not a valid UTF-8 CSV file after line {reader.line_num}: {e}') from e
+    else:
+        with tempfile.SpooledTemporaryFile(max_size=PARQUET_SPOOL_SIZE) as spool:
+            shutil.copyfileobj(stream, spool)
+            spool.seek(0)
+            try:
+                parquet_file = pyarrow.parquet.ParquetFile(spool)
+                columns = [column for column in COLUMNS if column in parquet_file.schema_arrow.names]
+                for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+                    for row in batch.to_pylist():
+                        yield row, None
+            except pyarrow.ArrowException as e:
+                raise InvalidFileError(f'The file is not a valid Parquet file: {e}') from e
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    A write-only file collecting the bytes written to it until they are drained.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        """
+        :return: The bytes written since the last call.
+        """
+
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
@@ -0,0 +1,111 @@
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .cache_backend import CacheBackend
+from .lru_ttl_cache_backend import LruTtlCacheBackend
+
+
+class BankCache:
+    """
+    A read-through cache for bank reads, backed by a pluggable CacheBackend.
+
+    Cached values are stored under versioned keys: every bank has a version counter, and bank lists share a generation counter. A write
+    increments the counters of the banks it changed (and the list generation) once it is committed, which makes every value cached before
+    it unreachable. Unlike deleting the cached values, this also covers a reader that loaded a bank before the write but stores it in the
+    cache after the write, since that value is stored under the old version.
+
+    The counters expire twice the TTL after their last increment, once every value stored under their previous versions has expired,
+    since an expired counter starts from 0 again.
+    """
+
+    GENERATION_KEY = 'banks:generation'
+
+    def __init__(self, backend: CacheBackend, ttl: Optional[float]):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get_bank(self, bank_id: str, loader: Callable[[], Optional[Dict]]) -> Optional[Dict]:
+        """
+        Retrieves the data of a bank from the cache, loading and caching it on a miss.
+
+        :param bank_id: The unique identifier of the bank to be retrieved.
+        :param loader: A function loading the data of the bank from the database, returning None if it is not found.
+        :return: The data of the bank, or None if it is not found.
+        """
+
+        version = self.backend.get(f'bank:{bank_id}:version') or 0
+        return self._get_or_load(f'bank:{bank_id}:{version}', loader)
+
+    def get_banks(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Retrieves a list of banks from the cache, loading and caching it on a miss.
+
+        :param key: The key identifying the list, e.g. built from the pagination parameters used to load it.
+        :param loader: A function loading the list from the database.
+        :return: The list of banks.
+        """
+
+        generation = self.backend.get(self.GENERATION_KEY) or 0
+        return self._get_or_load(f'banks:{generation}:{key}', loader)
+
+    def invalidate(self, bank_ids: Iterable[str] = ()):
+        """
+        Invalidates the cached data of the given banks and all cached bank lists. Must be called after the write is committed.
+
+        :param bank_ids: The unique identifiers of the banks which were updated or deleted.
+        :return: None.
+        """
+
+        # a value loaded before the write may be stored after it, so it may expire up to a TTL after the write plus the time to load it
+        counter_ttl = self.ttl * 2 if self.ttl is not None else None
+        for bank_id in bank_ids:
+            self.backend.incr(f'bank:{bank_id}:version', counter_ttl)
+        self.backend.incr(self.GENERATION_KEY, counter_ttl)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        :return: A dictionary containing the number of cache `hits` and `misses` since the cache was created.
+        """
+
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def _get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        value = self.backend.get(key)
+        if value is not None:
+            with self._stats_lock:
+                self.hits += 1
+            return value
+
+        with self._stats_lock:
+            self.misses += 1
+        value = loader()
+        if value is not None:
+            self.backend.set(key, value, self.ttl)
+        return value
+
+
+def create_bank_cache(config) -> Optional[BankCache]:
+    """
+    Creates the BankCache described by the given configuration.
+
+    :param config: A mapping (e.g. the Flask app config) which may contain the `BANK_CACHE_*` settings defined in CacheConfig.
+    :return: The BankCache, or None if caching is disabled.
+    :raise ValueError: If `BANK_CACHE_BACKEND` is not one of `none`, `memory` or `redis`.
+    """
+
+    backend_name = config.get('BANK_CACHE_BACKEND', 'none')
+    ttl = config.get('BANK_CACHE_TTL', 300)
+    if backend_name == 'none':
+        return None
+    if backend_name == 'memory':
+        return BankCache(LruTtlCacheBackend(config.get('BANK_CACHE_MAX_SIZE', 10000)), ttl)
+    if backend_name == 'redis':
+        # redis is only required when the Redis backend is used
+        import redis
+        from .redis_cache_backend import RedisCacheBackend
+
+        return BankCache(RedisCacheBackend(redis.Redis.from_url(config['BANK_CACHE_REDIS_URL'])), ttl)
+    raise ValueError(f"Unsupported BANK_CACHE_BACKEND '{backend_name}', expected one of 'none', 'memory' or 'redis'.")
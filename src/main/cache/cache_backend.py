@@ -0,0 +1,43 @@
+from typing import Any, Optional
+
+
+class CacheBackend:
+    """
+    Base class of the key-value stores that can be plugged into the BankCache.
+
+    Values must be JSON serializable, so that they can be stored both in process and in an external store such as Redis.
+    """
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Retrieves the value stored under the given key.
+
+        :param key: The key of the value to be retrieved.
+        :return: The stored value, or None if the key is missing or expired.
+        """
+
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Stores a value under the given key, replacing any previous value.
+
+        :param key: The key under which the value is stored.
+        :param value: The JSON serializable value to be stored.
+        :param ttl: The number of seconds after which the value expires, or None if it never expires.
+        :return: None.
+        """
+
+        raise NotImplementedError
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        """
+        Atomically increments the integer counter stored under the given key, starting from 0 if the key is missing. Counters must not
+        be evicted to make room for values: only their time to live, renewed by each increment, removes them.
+
+        :param key: The key of the counter to be incremented.
+        :param ttl: The number of seconds after which the counter expires unless it is incremented again, or None if it never expires.
+        :return: The value of the counter after the increment.
+        """
+
+        raise NotImplementedError
@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from .cache_backend import CacheBackend
+
+
+class LruTtlCacheBackend(CacheBackend):
+    """
+    An in-process, thread-safe cache backend which evicts the least recently used entries once `max_size` is reached, and expires entries
+    after their time to live. Counters are kept apart from the values, so that they are never evicted, only expired.
+
+    Entries are only shared by the threads of a single process, so this backend must only be used when the API runs in one process.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        # maps each key to a tuple of its value and its expiry time (or None if it never expires)
+        self._entries = OrderedDict()
+        # maps the key of each counter to a tuple of its value and its expiry time
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            counter = self._get_counter(key)
+            if counter is not None:
+                return counter
+
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            value = (self._get_counter(key) or 0) + 1
+            self._counters[key] = (value, expires_at)
+            return value
+
+    def _get_counter(self, key: str) -> Optional[int]:
+        counter = self._counters.get(key)
+        if counter is None:
+            return None
+
+        value, expires_at = counter
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._counters[key]
+            return None
+        return value
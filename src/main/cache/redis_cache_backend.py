@@ -0,0 +1,36 @@
+import json
+import math
+from typing import Any, Optional
+
+from .cache_backend import CacheBackend
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    A cache backend storing JSON encoded values in Redis, so that the cache is shared by all processes of the API.
+
+    Any client exposing the `get`, `set`, `incr` and `pipeline` methods of `redis.Redis` can be used.
+    """
+
+    def __init__(self, client, prefix: str = 'validata:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        # Redis only accepts a whole number of seconds, so round the time to live up
+        expiry = math.ceil(ttl) if ttl is not None else None
+        self.client.set(self.prefix + key, json.dumps(value), ex=expiry)
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        if ttl is None:
+            return self.client.incr(self.prefix + key)
+
+        # the expiry is set in the same transaction, so that no counter is left without one
+        pipeline = self.client.pipeline()
+        pipeline.incr(self.prefix + key)
+        pipeline.expire(self.prefix + key, math.ceil(ttl))
+        return pipeline.execute()[0]
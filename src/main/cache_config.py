@@ -0,0 +1,18 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class CacheConfig:
+    """
+    Configuration class which reads the bank cache environment variables from `.env`.
+
+    `BANK_CACHE_BACKEND` is one of `none` (default), `memory` (an in-process LRU cache, only suitable when running a single process) or
+    `redis` (a cache shared by all processes, stored at `BANK_CACHE_REDIS_URL`).
+    """
+
+    BANK_CACHE_BACKEND = os.getenv('BANK_CACHE_BACKEND', 'none')
+    BANK_CACHE_TTL = float(os.getenv('BANK_CACHE_TTL', '300'))
+    BANK_CACHE_MAX_SIZE = int(os.getenv('BANK_CACHE_MAX_SIZE', '10000'))
+    BANK_CACHE_REDIS_URL = os.getenv('BANK_CACHE_REDIS_URL', 'redis://localhost:6379/0')
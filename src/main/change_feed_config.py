@@ -0,0 +1,24 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class ChangeFeedConfig:
+    """
+    Configuration class which reads the bank change feed environment variables from `.env`.
+
+    Changes older than `BANK_CHANGES_COMPACT_AFTER_SECONDS` are compacted to the latest change of each bank, and changes older than
+    `BANK_CHANGES_RETENTION_SECONDS` are deleted, at most once every `BANK_CHANGES_MAINTENANCE_INTERVAL_SECONDS`. Changes younger than
+    `BANK_CHANGES_SETTLE_MS` are not returned yet, see BankChangeService. Streams poll the feed every `BANK_CHANGES_POLL_INTERVAL_MS`, send
+    a heartbeat after `BANK_CHANGES_HEARTBEAT_SECONDS` without changes, and end after `BANK_CHANGES_STREAM_TIMEOUT_SECONDS`, after which
+    clients reconnect from their last change.
+    """
+
+    BANK_CHANGES_RETENTION_SECONDS = float(os.getenv('BANK_CHANGES_RETENTION_SECONDS', '604800'))
+    BANK_CHANGES_COMPACT_AFTER_SECONDS = float(os.getenv('BANK_CHANGES_COMPACT_AFTER_SECONDS', '3600'))
+    BANK_CHANGES_MAINTENANCE_INTERVAL_SECONDS = float(os.getenv('BANK_CHANGES_MAINTENANCE_INTERVAL_SECONDS', '300'))
+    BANK_CHANGES_SETTLE_MS = float(os.getenv('BANK_CHANGES_SETTLE_MS', '0'))
+    BANK_CHANGES_POLL_INTERVAL_MS = float(os.getenv('BANK_CHANGES_POLL_INTERVAL_MS', '1000'))
+    BANK_CHANGES_HEARTBEAT_SECONDS = float(os.getenv('BANK_CHANGES_HEARTBEAT_SECONDS', '15'))
+    BANK_CHANGES_STREAM_TIMEOUT_SECONDS = float(os.getenv('BANK_CHANGES_STREAM_TIMEOUT_SECONDS', '300'))
@@ -0,0 +1,250 @@
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+from flask import Response, request
+
+from .instrumentation import serialization_timer
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, `br` is only offered when it is installed
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # zstandard is optional, `zstd` is only offered when it is installed
+    zstandard = None
+
+# responses of these types are compressed, the others (e.g. images) are either small or already compressed
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain')
+
+
+class StreamCompressor:
+    """
+    Incrementally compresses a body sent in chunks, with a common interface for the supported encodings.
+    """
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == 'gzip':
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif encoding == 'br':
+            self._compressor = brotli.Compressor(quality=level)
+        elif encoding == 'zstd':
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            raise ValueError(f"Unsupported encoding '{encoding}'")
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        :return: The compressed bytes which can be sent so far, which may be empty since the compressor buffers its input.
+        """
+
+        if self.encoding == 'br':
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        """
+        :return: The compressed bytes of all the input given so far, so that the client can decompress it without waiting for the end.
+        """
+
+        if self.encoding == 'gzip':
+            return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == 'zstd':
+            return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        """
+        :return: The last compressed bytes, ending the body.
+        """
+
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class CompressedPayloadCache:
+    """
+    An in-process, thread-safe cache of compressed response bodies, which evicts the least recently used bodies once their total size
+    exceeds `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # maps each key to a tuple of the compressed body and the headers of the response
+        self._entries: OrderedDict[Hashable, Tuple[bytes, Dict[str, str]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: Hashable, body: bytes, headers: Dict[str, str]):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous[0])
+            self._entries[key] = (body, headers)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                evicted_body, _ = self._entries.popitem(last=False)[1]
+                self.size -= len(evicted_body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class Compression:
+    """
+    Flask extension compressing the responses of the clients accepting it, with the best encoding of their `Accept-Encoding` header among
+    `zstd`, `br` (each only if its library is installed) and `gzip`. Responses smaller than `COMPRESSION_MIN_SIZE` bytes are sent as is,
+    since compression would barely shrink them. Streamed responses are compressed chunk by chunk, each chunk being flushed so that the
+    client receives it as soon as it is generated.
+
+    ETags are kept as is, since they identify the content of the response rather than its encoding, so that `If-Match` and
+    `If-None-Match` keep working whatever the encoding. Compressed responses are marked with `Vary: Accept-Encoding` for shared caches.
+
+    Endpoints can also keep compressed bodies in `payload_cache`, see `get_cached_response` and `cache_response`. Each app gets its own
+    instance, since the cache depends on the app config.
+    """
+
+    def __init__(self, app=None):
+        self.min_size = 1024
+        self.levels = {'gzip': 6, 'br': 4, 'zstd': 3}
+        self.encodings: Tuple[str, ...] = tuple(
+            encoding for encoding, library in (('zstd', zstandard), ('br', brotli), ('gzip', zlib)) if library is not None
+        )
+        self.payload_cache = CompressedPayloadCache(0)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get('COMPRESSION_ENABLED', True):
+            return
+        self.min_size = app.config.get('COMPRESSION_MIN_SIZE', 1024)
+        self.levels = {
+            'gzip': app.config.get('COMPRESSION_GZIP_LEVEL', 6),
+            'br': app.config.get('COMPRESSION_BROTLI_LEVEL', 4),
+            'zstd': app.config.get('COMPRESSION_ZSTD_LEVEL', 3),
+        }
+        self.payload_cache = CompressedPayloadCache(app.config.get('COMPRESSION_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+        app.extensions['compression'] = self
+        app.after_request(self._after_request)
+        instrumentation = app.extensions.get('instrumentation')
+        if instrumentation is not None:
+            instrumentation.collectors.append(self.render_metrics)
+
+    def negotiate(self) -> Optional[str]:
+        """
+        :return: The encoding of the response to the current request, or None if it must not be compressed.
+        """
+
+        return request.accept_encodings.best_match(self.encodings)
+
+    def compress_response(self, response: Response, encoding: str) -> Response:
+        """
+        Compresses a response with the given encoding, unless it is already encoded, is not of a compressible type, or is too small.
+
+        :param response: The response, which is modified in place.
+        :param encoding: One of the supported encodings.
+        :return: The response.
+        """
+
+        if (response.content_encoding or response.direct_passthrough or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or response.status_code in (204, 304)):
+            return response
+
+        level = self.levels[encoding]
+        if response.is_streamed:
+            response.response = _compress_chunks(response.response, StreamCompressor(encoding, level))
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            with serialization_timer():
+                compressor = StreamCompressor(encoding, level)
+                response.set_data(compressor.compress(data) + compressor.finish())
+        response.content_encoding = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def get_cached_response(self, key: Hashable, encoding: str) -> Optional[Response]:
+        """
+        Retrieves a response whose compressed body was stored by `cache_response`.
+
+        :param key: The key identifying the body before compression, e.g. containing its ETag, so that a changed body is not returned.
+        :param encoding: The encoding of the response.
+        :return: The compressed response, or None if it is not cached.
+        """
+
+        entry = self.payload_cache.get((key, encoding))
+        if entry is None:
+            return None
+        body, headers = entry
+        response = Response(body, headers=headers)
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def cache_response(self, key: Hashable, response: Response, encoding: str) -> Response:
+        """
+        Compresses a response, and stores its compressed body and headers so that it is not compressed again for the same key.
+
+        :param key: The key identifying the body before compression.
+        :param response: The response, which is modified in place. Streamed responses are compressed but not stored.
+        :param encoding: The encoding of the response.
+        :return: The response.
+        """
+
+        self.compress_response(response, encoding)
+        if response.content_encoding == encoding and not response.is_streamed:
+            headers = {name: value for name, value in response.headers.items() if name not in ('Content-Length', 'Vary')}
+            self.payload_cache.set((key, encoding), response.get_data(), headers)
+        return response
+
+    def render_metrics(self) -> Iterable[str]:
+        """
+        :return: The statistics of the compressed payload cache, in the Prometheus text format.
+        """
+
+        cache = self.payload_cache
+        return [
+            '# TYPE compressed_payload_cache_hits_total counter', f'compressed_payload_cache_hits_total {cache.hits}',
+            '# TYPE compressed_payload_cache_misses_total counter', f'compressed_payload_cache_misses_total {cache.misses}',
+            '# TYPE compressed_payload_cache_bytes gauge', f'compressed_payload_cache_bytes {cache.size}',
+        ]
+
+    def _after_request(self, response: Response) -> Response:
+        encoding = self.negotiate()
+        if encoding is not None:
+            self.compress_response(response, encoding)
+        return response
+
+
+def _compress_chunks(chunks: Iterable[bytes], compressor: StreamCompressor) -> Iterator[bytes]:
+    try:
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        # close the original chunks, e.g. to release the request context of a stream, if the client disconnects
+        if hasattr(chunks, 'close'):
+            chunks.close()
@@ -0,0 +1,21 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class CompressionConfig:
+    """
+    Configuration class which reads the response compression environment variables from `.env`.
+
+    If `COMPRESSION_ENABLED` is true, JSON, NDJSON and CSV responses of at least `COMPRESSION_MIN_SIZE` bytes are compressed with the best
+    encoding accepted by the client: `zstd` (if `zstandard` is installed), `br` (if `brotli` is installed) or `gzip`, at the given levels.
+    Up to `COMPRESSION_CACHE_MAX_BYTES` of compressed bank list pages are kept in each process.
+    """
+
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+    COMPRESSION_BROTLI_LEVEL = int(os.getenv('COMPRESSION_BROTLI_LEVEL', '4'))
+    COMPRESSION_ZSTD_LEVEL = int(os.getenv('COMPRESSION_ZSTD_LEVEL', '3'))
+    COMPRESSION_CACHE_MAX_BYTES = int(os.getenv('COMPRESSION_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
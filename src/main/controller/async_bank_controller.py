@@ -0,0 +1,191 @@
+import json
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from urllib.parse import parse_qs, urlencode
+
+from pydantic import ValidationError
+from werkzeug.http import parse_etags, quote_etag
+
+from .bank_controller import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from ..exceptions import VersionConflictError
+from ..service.async_bank_service import AsyncBankService
+from ..service.model.bank import Bank
+from ..utils import dumps
+from ..uuids import canonical_uuid
+
+
+class AsyncBankController:
+    """
+    An ASGI application exposing the five bank endpoints of the `bank_controller` blueprint on top of the AsyncBankService, so that a
+    single worker process serves many requests concurrently while they wait on the database.
+
+    The endpoints behave like their Flask counterparts (same payloads, pagination, ETags and status codes). Streaming and the bulk endpoints
+    are only served by the Flask app.
+    """
+
+    def __init__(self, bank_service: AsyncBankService, url_prefix: str = '/api/banks',
+                 on_shutdown: Optional[Callable[[], Awaitable]] = None):
+        self.bank_service = bank_service
+        self.url_prefix = url_prefix.rstrip('/')
+        self.on_shutdown = on_shutdown
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._handle_lifespan(receive, send)
+            return
+
+        path = scope['path'].rstrip('/')
+        method = scope['method']
+        if path == self.url_prefix:
+            handlers = {'GET': self.get_banks, 'POST': self.create_bank}
+            args = ()
+        elif path.startswith(self.url_prefix + '/') and '/' not in path[len(self.url_prefix) + 1:]:
+            handlers = {'GET': self.get_bank, 'PUT': self.update_bank, 'DELETE': self.delete_bank}
+            # ids are compared in their canonical form, ids which are not UUIDs match no bank
+            bank_id = path[len(self.url_prefix) + 1:]
+            args = (canonical_uuid(bank_id) or bank_id,)
+        else:
+            await self._send(send, 404, {'message': 'Not found'})
+            return
+
+        if method not in handlers:
+            await self._send(send, 405, {'message': 'Method not allowed'})
+            return
+        request = _Request(scope, receive)
+        status, body, headers = await handlers[method](request, *args)
+        await self._send(send, status, body, headers)
+
+    async def create_bank(self, request: '_Request'):
+        """
+        Exposed as: POST /api/banks, see `bank_controller.create_bank`.
+        """
+
+        bank_data = await request.json()
+        if not isinstance(bank_data, dict) or "name" not in bank_data or "location" not in bank_data:
+            return 400, {"error": "Both 'name' and 'location' fields are required."}, {}
+
+        try:
+            bank = Bank(**bank_data)
+        except ValidationError as e:
+            return 400, {'error': str(e)}, {}
+        await self.bank_service.create_bank(bank)
+        return 200, {"message": "Bank created successfully"}, {}
+
+    async def get_banks(self, request: '_Request'):
+        """
+        Exposed as: GET /api/banks, see `bank_controller.get_banks`.
+        """
+
+        limit = request.args.get('limit', str(DEFAULT_PAGE_LIMIT))
+        if not limit.isdigit() or not 0 < int(limit) <= MAX_PAGE_LIMIT:
+            return 400, {'error': f"'limit' must be an integer between 1 and {MAX_PAGE_LIMIT}."}, {}
+
+        limit = int(limit)
+        after = request.args.get('after')
+        try:
+            etag = await self.bank_service.get_banks_page_etag(limit, after)
+        except ValueError:
+            return 400, {'error': "'after' is not a valid cursor for this 'sort'."}, {}
+        headers = {'etag': quote_etag(etag)}
+        if parse_etags(request.headers.get('if-none-match')).contains(etag):
+            return 304, None, headers
+
+        banks, next_cursor = await self.bank_service.list_banks_page(limit, after)
+        if next_cursor is not None:
+            next_url = f"{self.url_prefix}/?{urlencode({'limit': limit, 'after': next_cursor})}"
+            headers['link'] = f'<{next_url}>; rel="next"'
+        return 200, banks, headers
+
+    async def update_bank(self, request: '_Request', bank_id: str):
+        """
+        Exposed as: PUT /api/banks/<bank_id>, see `bank_controller.update_bank`.
+        """
+
+        data = await request.json()
+        try:
+            updated_bank = await self.bank_service.update_bank(bank_id, data, request.expected_versions())
+            return 200, updated_bank.model_dump(), {}
+        except VersionConflictError as e:
+            return 412, {'error': str(e)}, {}
+        except Exception as e:
+            return 400, {'error': str(e)}, {}
+
+    async def delete_bank(self, request: '_Request', bank_id: str):
+        """
+        Exposed as: DELETE /api/banks/<bank_id>, see `bank_controller.delete_bank`.
+        """
+
+        try:
+            is_bank_deleted = await self.bank_service.delete_bank(bank_id, request.expected_versions())
+        except VersionConflictError as e:
+            return 412, {'error': str(e)}, {}
+        if is_bank_deleted:
+            return 200, {'message': 'Bank deleted successfully'}, {}
+        return 404, {'message': 'Bank not found'}, {}
+
+    async def get_bank(self, request: '_Request', bank_id: str):
+        """
+        Exposed as: GET /api/banks/<bank_id>, see `bank_controller.get_bank`.
+        """
+
+        etag = await self.bank_service.get_bank_etag(bank_id)
+        if etag is not None and parse_etags(request.headers.get('if-none-match')).contains(etag):
+            return 304, None, {'etag': quote_etag(etag)}
+
+        bank = await self.bank_service.get_bank(bank_id) if etag is not None else None
+        if not bank:
+            return 404, {'message': 'Bank not found'}, {}
+        return 200, bank.model_dump(), {'etag': quote_etag(etag)}
+
+    async def _handle_lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.on_shutdown:
+                    await self.on_shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def _send(send, status: int, body, headers: Optional[Dict[str, str]] = None):
+        content = dumps(body) if body is not None else b''
+        raw_headers = [(name.encode(), value.encode()) for name, value in (headers or {}).items()]
+        if body is not None:
+            raw_headers.append((b'content-type', b'application/json'))
+        raw_headers.append((b'content-length', str(len(content)).encode()))
+        await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+        await send({'type': 'http.response.body', 'body': content})
+
+
+class _Request:
+    """
+    The parts of an ASGI HTTP request used by the AsyncBankController.
+    """
+
+    def __init__(self, scope, receive):
+        self.args = {name: values[0] for name, values in parse_qs(scope['query_string'].decode(), keep_blank_values=True).items()}
+        self.headers = {name.decode().lower(): value.decode() for name, value in scope['headers']}
+        self._receive = receive
+
+    async def json(self):
+        chunks: List[bytes] = []
+        more_body = True
+        while more_body:
+            message = await self._receive()
+            chunks.append(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        try:
+            return json.loads(b''.join(chunks) or b'null')
+        except ValueError:
+            return None
+
+    def expected_versions(self) -> Optional[Set[int]]:
+        """
+        :return: The versions given in the `If-Match` header, like `bank_controller._get_expected_versions`.
+        """
+
+        if_match = parse_etags(self.headers.get('if-match'))
+        if not if_match or if_match.star_tag:
+            return None
+        return {int(etag) for etag in if_match.as_set() if etag.isdigit()}
@@ -1,15 +1,143 @@
-from flask import Blueprint, request, jsonify
+import time
+from typing import List, Optional, Set, Tuple
 
+from flask import Blueprint, Response, current_app, g, request, jsonify, stream_with_context, url_for
+from pydantic import ValidationError
+from werkzeug.local import LocalProxy
+
+from ..admission_control import create_admission_control, format_retry_after
+from ..bank_formats import FORMATS, available_formats, decode_banks, encode_banks
+from ..cache.bank_cache import create_bank_cache
+from ..exceptions import ChangesExpiredError, InvalidFileError, VersionConflictError
+from ..idempotency.idempotency import create_idempotency_store, idempotent
+from ..instrumentation import serialization_timer
+from ..repository.bank_change_repository import BankChangeRepository
 from ..repository.bank_repository import BankRepository
+from ..service.bank_change_service import BankChangeService
 from ..service.bank_service import BankService
 from ..service.model.bank import Bank
+from ..service.model.bank_search import BankSearch
+from ..service.model.bank_update import BankUpdate
+from ..utils import dumps
+from ..uuids import canonical_uuid
 
 bank_controller = Blueprint('bank_controller', __name__)
-bank_repository = BankRepository()
-bank_service = BankService(bank_repository)
+# the BankService of the current app, created when the blueprint is registered on it
+bank_service = LocalProxy(lambda: current_app.extensions['bank_service'])
+bank_change_service = LocalProxy(lambda: current_app.extensions['bank_change_service'])
+
+# page size used when the client does not provide a `limit`, and the upper bound a client may request
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+# query parameters filtering and ordering the banks, and the accepted values of `sort`
+SEARCH_PARAMS = ('name', 'location', 'name_prefix', 'location_prefix', 'q', 'sort')
+SORT_OPTIONS = ('id', '-id', 'name', '-name', 'location', '-location')
+# number of rows fetched from the database per query while streaming the whole table
+STREAM_BATCH_SIZE = 500
+# maximum number of items accepted by the bulk endpoints, and the default number of rows written per statement (`BULK_CHUNK_SIZE`)
+MAX_BULK_ITEMS = 10000
+DEFAULT_BULK_CHUNK_SIZE = 1000
+# number of rows fetched at once by exports, and maximum number of invalid rows reported by imports
+EXPORT_BATCH_SIZE = 5000
+MAX_IMPORT_ERRORS = 100
+
+
+@bank_controller.record_once
+def configure_bank_service(state):
+    # the service and its cache depend on the app config, so each app gets its own once the blueprint is registered on it
+    config = state.app.config
+    bank_cache = create_bank_cache(config)
+    bank_service = state.app.extensions['bank_service'] = BankService(
+        BankRepository(),
+        bank_cache,
+        create_window=config.get('BANK_CREATE_GROUP_COMMIT_WINDOW_MS', 0) / 1000,
+        create_max_batch_size=config.get('BANK_CREATE_GROUP_COMMIT_MAX_BATCH', 100)
+    )
+
+    state.app.extensions['bank_change_service'] = BankChangeService(
+        BankChangeRepository(),
+        retention=config.get('BANK_CHANGES_RETENTION_SECONDS', 604800),
+        compact_after=config.get('BANK_CHANGES_COMPACT_AFTER_SECONDS', 3600),
+        maintenance_interval=config.get('BANK_CHANGES_MAINTENANCE_INTERVAL_SECONDS', 300),
+        settle=config.get('BANK_CHANGES_SETTLE_MS', 0) / 1000
+    )
+
+    idempotency_store = state.app.extensions['idempotency_store'] = create_idempotency_store(config)
+    admission_control = state.app.extensions['admission_control'] = create_admission_control(config)
+
+    instrumentation = state.app.extensions.get('instrumentation')
+    if instrumentation is not None and admission_control is not None:
+        instrumentation.collectors.append(admission_control.render_metrics)
+    if instrumentation is not None and idempotency_store is not None:
+        instrumentation.collectors.append(idempotency_store.requests.render)
+    if instrumentation is not None and bank_cache is not None:
+        instrumentation.collectors.append(lambda: [
+            '# TYPE bank_cache_hits_total counter', f'bank_cache_hits_total {bank_cache.hits}',
+            '# TYPE bank_cache_misses_total counter', f'bank_cache_misses_total {bank_cache.misses}'
+        ])
+    if instrumentation is not None and bank_service.create_group_commit is not None:
+        group_commit = bank_service.create_group_commit
+        instrumentation.collectors.append(lambda: [
+            '# TYPE bank_create_batches_total counter', f'bank_create_batches_total {group_commit.batches}',
+            '# TYPE bank_create_batched_total counter', f'bank_create_batched_total {group_commit.items}'
+        ])
+
+
+@bank_controller.before_request
+def admit_request():
+    # rejects the requests which cannot be served in time under load, before any work is done for them
+    admission_control = current_app.extensions.get('admission_control')
+    if admission_control is None:
+        return None
+
+    route_class = _get_route_class()
+    client_header = current_app.config.get('ADMISSION_CLIENT_HEADER')
+    client = (request.headers.get(client_header, '').split(',')[0].strip() if client_header else '') or request.remote_addr
+    arrived_at = time.monotonic()
+    status, retry_after = admission_control.admit(client, route_class)
+    if status == 429:
+        response = jsonify({'error': 'Too many requests, retry later.'})
+    elif status == 503:
+        response = jsonify({'error': 'The server is overloaded, retry later.'})
+    else:
+        g.admission = (route_class, arrived_at)
+        return None
+    response.headers['Retry-After'] = format_retry_after(retry_after)
+    return response, status
+
+
+@bank_controller.after_request
+def invalidate_compressed_pages(response):
+    # pages cached by other processes are not returned either, since their ETag no longer matches the banks once they are written
+    compression = current_app.extensions.get('compression')
+    if compression is not None and request.method not in ('GET', 'HEAD') and response.status_code < 400:
+        compression.payload_cache.clear()
+    return response
 
 
-@bank_controller.route('/', methods=['POST'])
+@bank_controller.teardown_request
+def release_request(exception):
+    # runs once the response is sent, i.e. once the last row of a streamed response is sent
+    if 'admission' in g:
+        route_class, arrived_at = g.pop('admission')
+        current_app.extensions['admission_control'].release(route_class, time.monotonic() - arrived_at)
+
+
+def _get_route_class() -> str:
+    """
+    :return: The route class of the current request for the admission control: `list` for bank lists, which may read the whole table,
+             `stream` for change feed streams, which stay open for minutes, `read` for the other reads and `write` for writes.
+    """
+
+    if request.endpoint in ('bank_controller.get_banks', 'bank_controller.export_banks'):
+        return 'list'
+    if request.endpoint == 'bank_controller.stream_bank_changes':
+        return 'stream'
+    return 'read' if request.method in ('GET', 'HEAD') else 'write'
+
+
+@bank_controller.route('/', methods=['POST'], strict_slashes=False)
+@idempotent
 def create_bank():
     """
     Exposed as: /api/banks
@@ -32,55 +160,432 @@ def create_bank():
     return jsonify({"message": "Bank created successfully"}), 200
 
 
-@bank_controller.route('/', methods=['GET'])
+@bank_controller.route('/', methods=['GET'], strict_slashes=False)
 def get_banks():
     """
     Exposed as: /api/banks
 
-    Retrieves a list of all banks.
+    Retrieves banks ordered by id, one page at a time using keyset pagination. The following query parameters are supported:
+        - `limit`: the maximum number of banks in the page (defaults to 100, at most 1000)
+        - `after`: the cursor of the page to be retrieved, as given in the `next` link of the previous page
+        - `stream`: either `ndjson` or `json`, to stream all matching banks instead of a single page
+        - `name`, `location`: only retrieve banks with exactly this name or location
+        - `name_prefix`, `location_prefix`: only retrieve banks whose name or location starts with this prefix
+        - `q`: only retrieve banks whose name or location starts with this prefix
+        - `sort`: one of `id`, `name` or `location`, prefixed with `-` for descending order (defaults to `id`)
+
+    Pages are returned with an `ETag` header. If it matches the `If-None-Match` header of the request, the page is not loaded at all.
+    Compressed pages of the unfiltered list are cached until one of their banks is written, so they are neither loaded nor compressed
+    again.
+
+    :return:
+        - HTTP 200 OK with a JSON list of banks where each bank includes its ID, name, and location. If more banks follow, a `Link`
+          header with `rel="next"` points to the next page.
+        - HTTP 304 Not Modified without a body if the page has not changed since the `If-None-Match` ETag was returned
+        - HTTP 200 OK with a chunked NDJSON or JSON array body containing all banks if `stream` is given
+        - HTTP 400 Bad Request with an error message if `limit`, `after`, `sort` or `stream` are invalid
+    """
+
+    search = _get_bank_search()
+    if search is None:
+        return jsonify({'error': f"'sort' must be one of {', '.join(SORT_OPTIONS)}."}), 400
+
+    stream = request.args.get('stream')
+    if stream is not None:
+        if stream not in ('ndjson', 'json'):
+            return jsonify({'error': "'stream' must be either 'ndjson' or 'json'."}), 400
+        return _stream_banks(stream, search)
+
+    limit = request.args.get('limit', str(DEFAULT_PAGE_LIMIT))
+    if not limit.isdigit() or not 0 < int(limit) <= MAX_PAGE_LIMIT:
+        return jsonify({'error': f"'limit' must be an integer between 1 and {MAX_PAGE_LIMIT}."}), 400
+
+    limit = int(limit)
+    after = request.args.get('after')
+    try:
+        etag = bank_service.get_banks_page_etag(limit, after, search)
+    except ValueError:
+        return jsonify({'error': "'after' is not a valid cursor for this 'sort'."}), 400
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag)
+
+    # the compressed pages of the unfiltered list are cached under their ETag, which changes with any write to their banks
+    compression = current_app.extensions.get('compression')
+    encoding = compression.negotiate() if compression is not None else None
+    cache_key = ('banks_page', limit, after, etag) if encoding is not None and search == BankSearch() else None
+    if cache_key is not None:
+        cached_response = compression.get_cached_response(cache_key, encoding)
+        if cached_response is not None:
+            return cached_response
+
+    banks, next_cursor = bank_service.list_banks_page(limit, after, search)
+    with serialization_timer():
+        response = Response(dumps(banks), mimetype='application/json')
+    response.set_etag(etag)
+    if next_cursor is not None:
+        next_url = url_for('.get_banks', limit=limit, after=next_cursor, **search.model_dump(exclude_defaults=True))
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    if cache_key is not None:
+        compression.cache_response(cache_key, response, encoding)
+    return response
+
+
+@bank_controller.route('/count', methods=['GET'])
+def count_banks():
+    """
+    Exposed as: /api/banks/count
+
+    Counts the banks matching the `name`, `location`, `name_prefix`, `location_prefix` and `q` query parameters, as supported by
+    `GET /api/banks`, without retrieving them.
+
+    :return: HTTP 200 OK with a JSON object containing the `count` of matching banks.
+    """
+
+    search = _get_bank_search(ignore_sort=True)
+    return jsonify({'count': bank_service.count_banks(search)}), 200
+
+
+@bank_controller.route('/export', methods=['GET'])
+def export_banks():
+    """
+    Exposed as: /api/banks/export
+
+    Exports all banks as a file, streamed while the banks are read from a server-side cursor so that memory usage does not grow with the
+    table size. The `format` query parameter is one of `ndjson` (default), `csv` or `parquet` (if `pyarrow` is installed). Each bank
+    includes its `id`, `name` and `location`, in no particular order.
+
+    :return:
+        - HTTP 200 OK with a chunked body containing the file, as an attachment
+        - HTTP 400 Bad Request with an error message if `format` is not supported
+    """
+
+    file_format = request.args.get('format', 'ndjson')
+    if file_format not in available_formats():
+        return jsonify({'error': f"'format' must be one of {', '.join(available_formats())}."}), 400
+
+    batches = bank_service.export_banks(EXPORT_BATCH_SIZE)
+    mimetype, extension = FORMATS[file_format]
+    response = Response(stream_with_context(encode_banks(batches, file_format)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=banks.{extension}'
+    return response
+
+
+@bank_controller.route('/import', methods=['POST'])
+def import_banks():
+    """
+    Exposed as: /api/banks/import
+
+    Imports banks from a file sent as the raw body of the request, in one of the formats of `GET /api/banks/export`, given by the `format`
+    query parameter or else by the `Content-Type` (NDJSON by default). The file is read as it is uploaded and written `BULK_CHUNK_SIZE`
+    rows per transaction, so that neither the file nor the transaction grow with its size. Each row must include the `name` and `location`
+    of a bank: rows with an existing `id` update that bank, the others create a bank with their `id`, or a new id if they have none.
+    Invalid rows are skipped and reported. If the database fails, the chunks written before stay written, and the same file can be
+    imported again since rows with an `id` are upserted.
+
+    :return:
+        - HTTP 200 OK with a JSON object containing the number of `created`, `updated` and `invalid` rows, the first 100 `errors` with the
+          `row` number (starting at 1) and the error message of each invalid row, the `duration_seconds` of the import and its
+          `rows_per_second`
+        - HTTP 400 Bad Request with an error message if the format is not supported, or if the file cannot be decoded any further (e.g. a
+          CSV file which is not encoded in UTF-8), in which case the chunks before the error stay written
+    """
+
+    default_format = next((name for name, (mimetype, _) in FORMATS.items() if mimetype == request.mimetype), 'ndjson')
+    file_format = request.args.get('format', default_format)
+    if file_format not in available_formats():
+        return jsonify({'error': f"'format' must be one of {', '.join(available_formats())}."}), 400
+
+    started_at = time.perf_counter()
+    errors = []
+    invalid = 0
+
+    def read_banks():
+        nonlocal invalid
+        for row, (item, error) in enumerate(decode_banks(request.stream, file_format), start=1):
+            bank_id = None
+            if error is None:
+                bank, error = _validate_bank(item)
+            if error is None:
+                bank_id, error = _validate_import_id(item.get('id'))
+            if error is not None:
+                invalid += 1
+                if len(errors) < MAX_IMPORT_ERRORS:
+                    errors.append({'row': row, 'error': error})
+                continue
+            yield {'id': bank_id, 'name': bank.name, 'location': bank.location}
+
+    try:
+        created, updated = bank_service.import_banks(read_banks(), _get_bulk_chunk_size())
+    except InvalidFileError as e:
+        return jsonify({'error': str(e)}), 400
+    duration = time.perf_counter() - started_at
+    return jsonify({
+        'created': created,
+        'updated': updated,
+        'invalid': invalid,
+        'errors': errors,
+        'duration_seconds': round(duration, 3),
+        'rows_per_second': round((created + updated + invalid) / duration) if duration > 0 else 0
+    }), 200
+
+
+def _validate_import_id(bank_id) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Validates the id of a bank in an imported file.
+
+    :param bank_id: The `id` of the row, which may be missing or empty for new banks.
+    :return: A tuple containing the id in its canonical form (or None if missing) and None, or None and an error message if it is invalid.
+    """
+
+    if bank_id is None or bank_id == '':
+        return None, None
+    canonical_id = canonical_uuid(bank_id)
+    if canonical_id is None:
+        return None, "The 'id' field must be a UUID."
+    return canonical_id, None
+
+
+def _canonical_bank_id(bank_id: str) -> str:
+    """
+    :param bank_id: The id of a bank given by the client, e.g. in the URL.
+    :return: The id in its canonical form, so that it matches the id of the bank whatever its case, or as given if it is not a UUID (it
+             then matches no bank).
+    """
+
+    return canonical_uuid(bank_id) or bank_id
+
+
+@bank_controller.route('/changes', methods=['GET'])
+def get_bank_changes():
+    """
+    Exposed as: /api/banks/changes
+
+    Retrieves the changes of the banks following a position of the change feed, so that clients can follow the bank writes instead of
+    polling the bank list. The following query parameters are supported:
+        - `since`: the `sequence` of the last change received, or 0 to start from the oldest retained change. If omitted, no change is
+          returned, and the `next` link points to the latest change: clients load the bank list once it is returned, then follow the link.
+        - `limit`: the maximum number of changes returned (defaults to 100, at most 1000)
+
+    :return:
+        - HTTP 200 OK with a JSON list of changes, each with its `sequence`, `operation` (`created`, `updated` or `deleted`), `bank_id`,
+          `bank` (its `id`, `name` and `location` after the change, null for deletes) and `changed_at` (a UNIX timestamp), and a `Link`
+          header with `rel="next"` pointing to the following changes
+        - HTTP 400 Bad Request with an error message if `since` or `limit` are invalid
+        - HTTP 410 Gone with an error message if changes following `since` were deleted by the retention of the feed, in which case the
+          client must load the bank list again
+    """
+
+    limit = request.args.get('limit', str(DEFAULT_PAGE_LIMIT))
+    if not limit.isdigit() or not 0 < int(limit) <= MAX_PAGE_LIMIT:
+        return jsonify({'error': f"'limit' must be an integer between 1 and {MAX_PAGE_LIMIT}."}), 400
+    since = request.args.get('since')
+    if since is not None and not since.isdigit():
+        return jsonify({'error': "'since' must be a non-negative integer."}), 400
+
+    limit = int(limit)
+    if since is None:
+        changes, next_since = [], bank_change_service.get_latest_sequence()
+    else:
+        try:
+            changes = bank_change_service.list_changes(int(since), limit)
+        except ChangesExpiredError:
+            return _changes_expired()
+        next_since = changes[-1]['sequence'] if changes else int(since)
+
+    with serialization_timer():
+        response = Response(dumps(changes), mimetype='application/json')
+    response.headers['Link'] = f'<{url_for(".get_bank_changes", since=next_since, limit=limit)}>; rel="next"'
+    return response
+
+
+@bank_controller.route('/changes/stream', methods=['GET'])
+def stream_bank_changes():
+    """
+    Exposed as: /api/banks/changes/stream
+
+    Streams the changes of the banks as Server-Sent Events, e.g. to an `EventSource` in a browser. Each change is sent as an event whose
+    `id` is its sequence, whose type is its operation and whose data is the change as returned by `GET /api/banks/changes`. The stream
+    starts after the change given by the `Last-Event-ID` header (sent by reconnecting clients) or the `since` query parameter, or after the
+    latest change if neither is given. It ends after `BANK_CHANGES_STREAM_TIMEOUT_SECONDS`, and clients reconnect from their last event.
+
+    :return:
+        - HTTP 200 OK with a `text/event-stream` body
+        - HTTP 400 Bad Request with an error message if the position is not a non-negative integer
+        - HTTP 410 Gone with an error message if changes following the position were deleted by the retention of the feed
+    """
+
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    if since is not None and not since.isdigit():
+        return jsonify({'error': "'since' must be a non-negative integer."}), 400
+
+    config = current_app.config
+    poll_interval = config.get('BANK_CHANGES_POLL_INTERVAL_MS', 1000) / 1000
+    heartbeat = config.get('BANK_CHANGES_HEARTBEAT_SECONDS', 15)
+    try:
+        polls = bank_change_service.stream_changes(
+            int(since) if since is not None else bank_change_service.get_latest_sequence(), STREAM_BATCH_SIZE, poll_interval,
+            config.get('BANK_CHANGES_STREAM_TIMEOUT_SECONDS', 300)
+        )
+    except ChangesExpiredError:
+        return _changes_expired()
+
+    def generate_events():
+        # clients reconnecting after the stream ends wait for the poll interval, rather than the few seconds chosen by the browser
+        yield f'retry: {int(poll_interval * 1000)}\n\n'.encode()
+        sent_at = time.monotonic()
+        for changes in polls:
+            if changes:
+                yield b''.join(
+                    b'id: %d\nevent: %s\ndata: %s\n\n' % (change['sequence'], change['operation'].encode(), dumps(change))
+                    for change in changes
+                )
+                sent_at = time.monotonic()
+            elif time.monotonic() - sent_at >= heartbeat:
+                # a comment, which keeps proxies from closing the idle connection and reveals a client which disconnected
+                yield b': heartbeat\n\n'
+                sent_at = time.monotonic()
+
+    response = Response(stream_with_context(generate_events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # keeps proxies such as nginx from buffering the events
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _changes_expired() -> Tuple[Response, int]:
+    """
+    :return: The response to a read of the change feed from a position whose following changes were deleted.
+    """
+
+    return jsonify({'error': "The changes following 'since' were deleted, reload the banks and follow the feed again."}), 410
 
-    :return: A JSON response containing a list of banks where each bank includes its ID, name, and location
+
+def _get_bank_search(ignore_sort: bool = False) -> Optional[BankSearch]:
     """
+    Reads the filters and ordering of the banks from the query parameters of the request.
+
+    :param ignore_sort: Whether the `sort` query parameter is ignored.
+    :return: The BankSearch service model, or None if the `sort` query parameter is invalid.
+    """
+
+    params = {field: request.args[field] for field in SEARCH_PARAMS if field in request.args}
+    if ignore_sort:
+        params.pop('sort', None)
+    try:
+        return BankSearch(**params)
+    except ValidationError:
+        return None
+
+
+def _stream_banks(stream_format: str, search: BankSearch) -> Response:
+    """
+    Builds a chunked response streaming all matching banks, so that neither the rows nor the encoded body are held in memory at once.
+
+    :param stream_format: `ndjson` to stream one JSON object per line, or `json` to stream a single JSON array.
+    :param search: The filters and ordering of the banks.
+    :return: A streamed response containing all matching banks.
+    """
+
+    batches = bank_service.stream_banks(STREAM_BATCH_SIZE, search)
 
-    banks = bank_service.list_banks()
-    return jsonify([bank.dict() for bank in banks])
+    def generate_ndjson():
+        for batch in batches:
+            yield b''.join(dumps(bank) + b'\n' for bank in batch)
+
+    def generate_json_array():
+        separator = b'['
+        for batch in batches:
+            # encode the whole batch as an array at once, and strip its brackets to splice it into the streamed array
+            yield separator + dumps(batch)[1:-1]
+            separator = b','
+        yield b'[]' if separator == b'[' else b']'
+
+    if stream_format == 'ndjson':
+        return Response(stream_with_context(generate_ndjson()), mimetype='application/x-ndjson')
+    return Response(stream_with_context(generate_json_array()), mimetype='application/json')
 
 
 @bank_controller.route('/<bank_id>', methods=['PUT'])
+@idempotent
 def update_bank(bank_id):
     """
     Exposed as: /api/banks/<bank_id>
 
-    Updates the data of a specific bank based on the given <bank_id> and the data in the payload.
+    Updates the data of a specific bank based on the given <bank_id> and the data in the payload. If an `If-Match` header is given, the
+    bank is only updated if its ETag matches.
 
     :param bank_id: The unique identifier of the bank to be updated.
     :return:
         - HTTP 200 OK with a JSON object representing the updated bank if the update is successful
         - HTTP 400 Bad Request with an error message if the update fails due to invalid input or if the bank does not exist
+        - HTTP 412 Precondition Failed with an error message if the bank was modified since the `If-Match` ETag was returned
     """
 
+    bank_id = _canonical_bank_id(bank_id)
     data = request.json
     try:
-        updated_bank = bank_service.update_bank(bank_id, data)
-        return jsonify(updated_bank.dict()), 200
+        updated_bank = bank_service.update_bank(bank_id, data, _get_expected_versions())
+        return jsonify(updated_bank.model_dump()), 200
+    except VersionConflictError as e:
+        return jsonify({'error': str(e)}), 412
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@bank_controller.route('/<bank_id>', methods=['PATCH'])
+@idempotent
+def patch_bank(bank_id):
+    """
+    Exposed as: /api/banks/<bank_id>
+
+    Updates only the fields of a specific bank given in the payload, `name` and/or `location`, leaving the others unchanged. If an
+    `If-Match` header is given, the bank is only updated if its ETag matches.
+
+    :param bank_id: The unique identifier of the bank to be updated.
+    :return:
+        - HTTP 200 OK with a JSON object representing the updated bank if the update is successful
+        - HTTP 400 Bad Request with an error message if the update fails due to invalid input or if the bank does not exist
+        - HTTP 412 Precondition Failed with an error message if the bank was modified since the `If-Match` ETag was returned
+    """
+
+    bank_id = _canonical_bank_id(bank_id)
+    data = request.json
+    try:
+        bank_update = BankUpdate(**data) if isinstance(data, dict) else None
+    except ValidationError:
+        bank_update = None
+    if bank_update is None or not bank_update.model_dump(exclude_none=True):
+        return jsonify({'error': "At least one of 'name' or 'location' is required, and no other field can be updated."}), 400
+
+    try:
+        updated_bank = bank_service.patch_bank(bank_id, bank_update, _get_expected_versions())
+        return jsonify(updated_bank.model_dump()), 200
+    except VersionConflictError as e:
+        return jsonify({'error': str(e)}), 412
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 
 @bank_controller.route('/<bank_id>', methods=['DELETE'])
+@idempotent
 def delete_bank(bank_id):
     """
     Exposed as: /api/banks/<bank_id>
 
-    Deletes a specific bank based on the given <bank_id>.
+    Deletes a specific bank based on the given <bank_id>. If an `If-Match` header is given, the bank is only deleted if its ETag matches.
 
     :param bank_id: The unique identifier of the bank to be deleted.
     :return:
         - HTTP 200 OK with a message indicating that delete is successful
         - HTTP 404 Not Found with an error message indicating that the bank to be deleted was not found
+        - HTTP 412 Precondition Failed with an error message if the bank was modified since the `If-Match` ETag was returned
     """
 
-    is_bank_deleted = bank_service.delete_bank(bank_id)
+    bank_id = _canonical_bank_id(bank_id)
+    try:
+        is_bank_deleted = bank_service.delete_bank(bank_id, _get_expected_versions())
+    except VersionConflictError as e:
+        return jsonify({'error': str(e)}), 412
     if is_bank_deleted:
         return jsonify({'message': 'Bank deleted successfully'}), 200
     else:
@@ -92,15 +597,194 @@ def get_bank(bank_id):
     """
     Exposed as: /api/banks/<bank_id>
 
-    Retrieves the data of a specific bank based on the given <bank_id>.
+    Retrieves the data of a specific bank based on the given <bank_id>. The bank is returned with an `ETag` header. If it matches the
+    `If-None-Match` header of the request, only the version of the bank is loaded.
 
     :param bank_id: The unique identifier of the bank to be retrieved.
     :return:
         - HTTP 200 OK with a JSON object containing the details of the requested bank.
+        - HTTP 304 Not Modified without a body if the bank has not changed since the `If-None-Match` ETag was returned
         - HTTP 404 Not Found with an error message indicating that the bank requested was not found
     """
 
-    bank = bank_service.get_bank(bank_id)
+    bank_id = _canonical_bank_id(bank_id)
+    etag = bank_service.get_bank_etag(bank_id)
+    if etag is not None and request.if_none_match.contains(etag):
+        return _not_modified(etag)
+
+    bank = bank_service.get_bank(bank_id) if etag is not None else None
     if not bank:
         return jsonify({'message': 'Bank not found'}), 404
-    return jsonify(bank.dict())
+    with serialization_timer():
+        response = jsonify(bank.model_dump())
+    response.set_etag(etag)
+    return response
+
+
+def _not_modified(etag: str) -> Response:
+    """
+    :param etag: The current ETag of the requested resource.
+    :return: An empty HTTP 304 Not Modified response carrying the given ETag.
+    """
+
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def _get_expected_versions() -> Optional[Set[int]]:
+    """
+    Reads the versions a bank is expected to have from the `If-Match` header of the request, the ETag of a bank being its version.
+
+    :return: None if the header is missing or `*`, otherwise the versions given as strong ETags (empty if none is a valid version).
+    """
+
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+    return {int(etag) for etag in if_match.as_set() if etag.isdigit()}
+
+
+@bank_controller.route('/bulk', methods=['POST'])
+@idempotent
+def bulk_create_banks():
+    """
+    Exposed as: /api/banks/bulk
+
+    Creates many banks in a single transaction. The payload must be a JSON array where each item includes the `name` and `location` of a
+    bank. All items are validated first; the valid ones are then written with batched inserts, while the invalid ones are reported.
+
+    :return:
+        - HTTP 200 OK with a JSON object whose `results` list contains, for each item in the payload, its `index` and either a `201`
+          status with the `id` of the created bank or a `400` status with an `error` message
+        - HTTP 400 Bad Request with an error message if the payload is not a JSON array of at most 10000 items
+    """
+
+    items, error_response = _get_bulk_items()
+    if error_response:
+        return error_response
+
+    results = [None] * len(items)
+    banks = {}
+    for index, item in enumerate(items):
+        bank, error = _validate_bank(item)
+        if error:
+            results[index] = {'index': index, 'status': 400, 'error': error}
+        else:
+            banks[index] = bank
+
+    if banks:
+        created_ids = bank_service.bulk_create_banks(list(banks.values()), _get_bulk_chunk_size())
+        for index, bank_id in zip(banks.keys(), created_ids):
+            results[index] = {'index': index, 'status': 201, 'id': bank_id}
+
+    return jsonify({'results': results}), 200
+
+
+@bank_controller.route('/bulk', methods=['PUT'])
+@idempotent
+def bulk_update_banks():
+    """
+    Exposed as: /api/banks/bulk
+
+    Updates many banks in a single transaction. The payload must be a JSON array where each item includes the `id`, `name` and `location`
+    of a bank. All items are validated first; the valid ones are then written with batched updates, while the invalid ones are reported.
+
+    :return:
+        - HTTP 200 OK with a JSON object whose `results` list contains, for each item in the payload, its `index`, its `id` and either a
+          `200` status if the bank was updated, a `404` status if it does not exist or a `400` status with an `error` message
+        - HTTP 400 Bad Request with an error message if the payload is not a JSON array of at most 10000 items
+    """
+
+    items, error_response = _get_bulk_items()
+    if error_response:
+        return error_response
+
+    results = [None] * len(items)
+    banks = {}
+    for index, item in enumerate(items):
+        bank, error = _validate_bank(item)
+        if not error and not isinstance(item.get('id'), str):
+            error = "The 'id' field is required."
+        if error:
+            results[index] = {'index': index, 'status': 400, 'error': error}
+        else:
+            banks[index] = (_canonical_bank_id(item['id']), bank)
+
+    if banks:
+        updated_ids = bank_service.bulk_update_banks(dict(banks.values()), _get_bulk_chunk_size())
+        for index, (bank_id, _) in banks.items():
+            results[index] = {'index': index, 'id': bank_id, 'status': 200 if bank_id in updated_ids else 404}
+
+    return jsonify({'results': results}), 200
+
+
+@bank_controller.route('/bulk', methods=['DELETE'])
+@idempotent
+def bulk_delete_banks():
+    """
+    Exposed as: /api/banks/bulk
+
+    Deletes many banks in a single transaction. The payload must be a JSON array containing the ids of the banks to be deleted.
+
+    :return:
+        - HTTP 200 OK with a JSON object whose `results` list contains, for each item in the payload, its `index` and either a `200`
+          status if the bank was deleted, a `404` status if it does not exist or a `400` status with an `error` message
+        - HTTP 400 Bad Request with an error message if the payload is not a JSON array of at most 10000 items
+    """
+
+    items, error_response = _get_bulk_items()
+    if error_response:
+        return error_response
+
+    results = [None] * len(items)
+    bank_ids = {}
+    for index, bank_id in enumerate(items):
+        if isinstance(bank_id, str):
+            bank_ids[index] = _canonical_bank_id(bank_id)
+        else:
+            results[index] = {'index': index, 'status': 400, 'error': 'Each item must be a bank id.'}
+
+    if bank_ids:
+        deleted_ids = bank_service.bulk_delete_banks(list(set(bank_ids.values())), _get_bulk_chunk_size())
+        for index, bank_id in bank_ids.items():
+            results[index] = {'index': index, 'id': bank_id, 'status': 200 if bank_id in deleted_ids else 404}
+
+    return jsonify({'results': results}), 200
+
+
+def _get_bulk_items() -> Tuple[Optional[List], Optional[Tuple[Response, int]]]:
+    """
+    Reads the JSON array sent to a bulk endpoint.
+
+    :return: A tuple containing the items of the array and None, or None and a 400 Bad Request response if the payload is invalid.
+    """
+
+    items = request.get_json(silent=True)
+    if not isinstance(items, list) or not 0 < len(items) <= MAX_BULK_ITEMS:
+        return None, (jsonify({'error': f'The payload must be a JSON array of 1 to {MAX_BULK_ITEMS} items.'}), 400)
+    return items, None
+
+
+def _validate_bank(bank_data) -> Tuple[Optional[Bank], Optional[str]]:
+    """
+    Validates the data of a single bank sent to a bulk endpoint, applying the same rules as the single bank endpoints.
+
+    :param bank_data: The item of the payload to be validated.
+    :return: A tuple containing the Bank service model and None, or None and an error message if the data is invalid.
+    """
+
+    if not isinstance(bank_data, dict) or "name" not in bank_data or "location" not in bank_data:
+        return None, "Both 'name' and 'location' fields are required."
+    try:
+        return Bank(name=bank_data['name'], location=bank_data['location']), None
+    except ValidationError as e:
+        return None, str(e)
+
+
+def _get_bulk_chunk_size() -> int:
+    """
+    :return: The maximum number of rows written per statement by the bulk endpoints, taken from the `BULK_CHUNK_SIZE` config if set.
+    """
+
+    return current_app.config.get('BULK_CHUNK_SIZE', DEFAULT_BULK_CHUNK_SIZE)
@@ -0,0 +1,52 @@
+from typing import Iterable
+
+from flask import Blueprint, Response, current_app, jsonify
+
+from ..db import db
+from ..db_pool import get_pool_stats
+
+monitoring_controller = Blueprint('monitoring_controller', __name__)
+
+
+@monitoring_controller.route('/health/pool', methods=['GET'])
+def get_pool_health():
+    """
+    Exposed as: /health/pool
+
+    Retrieves the live statistics of the database connection pool, to help sizing the pool and the number of workers.
+
+    :return: A JSON object containing the pool `size`, the number of connections `checked_out` and `checked_in`, the `overflow` and the
+             statistics of the time spent waiting for a connection.
+    """
+
+    return jsonify(get_pool_stats(db.engine))
+
+
+@monitoring_controller.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Exposed as: /metrics
+
+    Retrieves the metrics of the app in the Prometheus text format: latency histograms per route, SQL query counts and times, slow and
+    N+1 query counters, and the connection pool statistics.
+
+    :return: A plain text response containing the metrics.
+    """
+
+    instrumentation = current_app.extensions['instrumentation']
+    metrics = instrumentation.render_metrics() + '\n'.join(_render_pool_metrics()) + '\n'
+    return Response(metrics, mimetype='text/plain; version=0.0.4')
+
+
+def _render_pool_metrics() -> Iterable[str]:
+    stats = get_pool_stats(db.engine)
+    for key in ('size', 'checked_out', 'checked_in', 'overflow'):
+        if key in stats:
+            yield f'# TYPE db_pool_{key} gauge'
+            yield f'db_pool_{key} {stats[key]}'
+    if 'wait' in stats:
+        yield '# TYPE db_pool_checkout_wait_seconds summary'
+        yield f"db_pool_checkout_wait_seconds_sum {stats['wait']['total_wait_seconds']}"
+        yield f"db_pool_checkout_wait_seconds_count {stats['wait']['checkouts']}"
+        yield '# TYPE db_pool_checkout_timeouts_total counter'
+        yield f"db_pool_checkout_timeouts_total {stats['wait']['timeouts']}"
@@ -1,3 +1,32 @@
+import sqlite3
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .db_routing import RoutingSession
+
+# the session sends the reads wrapped in `read_from_replica` to the replicas, if any are configured
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+def create_schema():
+    """
+    Creates the tables of all models which do not exist yet, together with their indexes. Indexes declared after a table was created are
+    added to the existing table as well, which `create_all` alone does not do. Must be called within an application context.
+
+    :return: None.
+    """
+
+    # only the tables of the primary are created, the replicas get them by replication
+    db.create_all(bind_key=None)
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
 
-db = SQLAlchemy()
+@event.listens_for(Engine, 'connect')
+def _enable_sqlite_case_sensitive_like(dbapi_connection, connection_record):
+    # SQLite only uses an index for LIKE 'prefix%' if LIKE is case sensitive, as `=` and the indexes themselves are
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute('PRAGMA case_sensitive_like = ON')
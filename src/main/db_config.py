@@ -1,21 +1,86 @@
 import os
+from typing import Any, Dict, List, Mapping
+
 from dotenv import load_dotenv
 
+from .db_pool import build_engine_options
+from .db_routing import replica_bind_key
+
 load_dotenv()
 
 
+def _build_database_uri(server: str) -> str:
+    return (
+        f"mssql+pyodbc://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{server}/{os.getenv('DB_NAME')}"
+        f"?driver={os.getenv('DB_DRIVER', '').replace(' ', '+')}&TrustServerCertificate=yes"
+    )
+
+
 class DbConfig:
     """
     Configuration class which reads the database connection environment variables from `.env`.
+
+    The connection pool can be tuned with the `DB_POOL_*` variables, see `build_engine_options` for their meaning. The engine options
+    depend on the final database URI, which may be overridden when creating the app, so they are built by `get_engine_options` instead.
+
+    Reads which tolerate slightly stale data are served by the read replicas listed in `DB_REPLICA_SERVERS`, separated by `;`, which share
+    the name and credentials of the primary database. `DB_REPLICA_SELECTION` is either `round_robin` or `least_loaded`, and an unhealthy
+    replica is checked again every `DB_REPLICA_HEALTH_CHECK_INTERVAL` seconds. A client which wrote reads from the primary for the next
+    `DB_READ_YOUR_WRITES_SECONDS`, which should exceed the replication lag.
     """
 
     DB_SERVER = os.getenv('DB_SERVER')
     DB_NAME = os.getenv('DB_NAME')
     DB_USER = os.getenv('DB_USER')
     DB_PASSWORD = os.getenv('DB_PASSWORD')
-    DB_DRIVER = os.getenv('DB_DRIVER').replace(' ', '+')
+    DB_DRIVER = os.getenv('DB_DRIVER', '').replace(' ', '+')
+
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+    DB_POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', '20'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+    DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', '15'))
+    DB_FAST_EXECUTEMANY = os.getenv('DB_FAST_EXECUTEMANY', 'true').lower() == 'true'
+
+    DB_REPLICA_SERVERS = [server for server in os.getenv('DB_REPLICA_SERVERS', '').split(';') if server]
+    DB_REPLICA_SELECTION = os.getenv('DB_REPLICA_SELECTION', 'round_robin')
+    DB_REPLICA_HEALTH_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_HEALTH_CHECK_INTERVAL', '5'))
+    DB_READ_YOUR_WRITES_SECONDS = float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '5'))
+
+    SQLALCHEMY_DATABASE_URI = _build_database_uri(DB_SERVER)
+    DB_REPLICA_URIS: List[str] = [_build_database_uri(server) for server in DB_REPLICA_SERVERS]
+
 
-    SQLALCHEMY_DATABASE_URI = (
-        f"mssql+pyodbc://{DB_USER}:{DB_PASSWORD}@{DB_SERVER}/{DB_NAME}"
-        f"?driver={DB_DRIVER}&TrustServerCertificate=yes"
+def get_engine_options(config: Mapping[str, Any]) -> Dict:
+    """
+    Builds the `SQLALCHEMY_ENGINE_OPTIONS` of the database of the given config from its `DB_POOL_*` values.
+
+    :param config: A config containing the `SQLALCHEMY_DATABASE_URI` and the values read by DbConfig, e.g. the Flask app config.
+    :return: The keyword arguments to be given to `create_engine`.
+    """
+
+    return build_engine_options(
+        config['SQLALCHEMY_DATABASE_URI'],
+        pool_size=config['DB_POOL_SIZE'],
+        max_overflow=config['DB_POOL_MAX_OVERFLOW'],
+        pool_recycle=config['DB_POOL_RECYCLE'],
+        pool_pre_ping=config['DB_POOL_PRE_PING'],
+        pool_timeout=config['DB_POOL_TIMEOUT'],
+        connect_timeout=config['DB_CONNECT_TIMEOUT'],
+        fast_executemany=config['DB_FAST_EXECUTEMANY']
     )
+
+
+def get_replica_binds(config: Mapping[str, Any]) -> Dict[str, Dict]:
+    """
+    Builds the `SQLALCHEMY_BINDS` of the read replicas of the given config, each with the same pool options as the primary database.
+
+    :param config: A config containing the `DB_REPLICA_URIS` and the values read by DbConfig, e.g. the Flask app config.
+    :return: A dictionary mapping the bind key of each replica to its URL and engine options.
+    """
+
+    return {
+        replica_bind_key(index): {'url': uri, **get_engine_options({**config, 'SQLALCHEMY_DATABASE_URI': uri})}
+        for index, uri in enumerate(config['DB_REPLICA_URIS'])
+    }
@@ -0,0 +1,117 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolWaitStats:
+    """
+    Thread-safe counters of the time spent waiting for a connection to be checked out of a pool.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, wait: float, timed_out: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'total_wait_seconds': self.total_wait,
+                'max_wait_seconds': self.max_wait,
+                'avg_wait_seconds': self.total_wait / self.checkouts if self.checkouts else 0.0
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    A QueuePool which records how long each checkout waits for a connection, including the time spent opening new connections.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.wait_stats.record(time.perf_counter() - start, timed_out)
+
+
+def build_engine_options(database_uri: str, pool_size: int, max_overflow: int, pool_recycle: int, pool_pre_ping: bool,
+                         pool_timeout: float, connect_timeout: Optional[int] = None, fast_executemany: bool = True) -> Dict:
+    """
+    Builds the `SQLALCHEMY_ENGINE_OPTIONS` of a database, using an InstrumentedQueuePool so that its statistics can be monitored.
+
+    :param database_uri: The SQLAlchemy URI of the database.
+    :param pool_size: The number of connections kept open in the pool.
+    :param max_overflow: The number of connections which may be opened on top of `pool_size` under load, and closed once returned.
+    :param pool_recycle: The number of seconds after which a connection is replaced, so that connections dropped by the server or a
+                         failover are not reused.
+    :param pool_pre_ping: Whether connections are tested before being checked out, replacing stale connections transparently.
+    :param pool_timeout: The number of seconds to wait for a connection when the pool is exhausted before failing.
+    :param connect_timeout: The number of seconds to wait when opening a connection to SQL Server, or None for the driver default.
+    :param fast_executemany: Whether pyodbc sends the parameters of executemany statements (e.g. bulk inserts) in a single round trip.
+    :return: The keyword arguments to be given to `create_engine`.
+    """
+
+    if database_uri.startswith('sqlite') and database_uri.split('?')[0] in ('sqlite://', 'sqlite:///:memory:'):
+        # an in-memory SQLite database only lives as long as its single connection, so it cannot be pooled
+        return {}
+
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': pool_pre_ping,
+        'pool_timeout': pool_timeout
+    }
+    if database_uri.startswith('mssql+pyodbc'):
+        options['fast_executemany'] = fast_executemany
+        if connect_timeout is not None:
+            options['connect_args'] = {'timeout': connect_timeout}
+    return options
+
+
+def get_pool_stats(engine) -> Dict:
+    """
+    Retrieves the live statistics of the connection pool of an engine.
+
+    :param engine: The SQLAlchemy engine.
+    :return: A dictionary containing the pool `size`, the number of connections `checked_out` and `checked_in`, the `overflow` (negative
+             while fewer than `size` connections were opened) and, for an InstrumentedQueuePool, the checkout `wait` statistics.
+    """
+
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {'status': pool.status()}
+
+    stats = {
+        'size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'checked_in': pool.checkedin(),
+        'overflow': pool.overflow()
+    }
+    if isinstance(pool, InstrumentedQueuePool):
+        stats['wait'] = pool.wait_stats.to_dict()
+    return stats
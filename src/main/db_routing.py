@@ -0,0 +1,224 @@
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, TypeVar
+
+from flask import Flask, current_app, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# cookie holding the time until which a client which wrote reads from the primary, as a UNIX timestamp
+PRIMARY_UNTIL_COOKIE = 'db_primary_until'
+REPLICA_SELECTIONS = ('round_robin', 'least_loaded')
+
+
+class RoutingSession(Session):
+    """
+    Session sending the statements executed within `read_from_replica` to the replica chosen for it, and all others to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('replica')
+        if bind is None and replica is not None and not self._flushing:
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class Replica:
+    """
+    A read replica, with its health and the number of reads in progress on it.
+    """
+
+    def __init__(self, name: str, engine: Engine):
+        self.name = name
+        self.engine = engine
+        self.healthy = True
+        self.checked_at = 0.0
+        self.active_reads = 0
+        self.reads = 0
+
+
+class ReplicaRouter:
+    """
+    Chooses the replica serving each read, either in turn (`round_robin`) or the one with the fewest reads in progress (`least_loaded`).
+
+    A replica on which a read fails with an operational error, e.g. because it cannot be connected to, is marked unhealthy and is not
+    chosen again until it answers a `SELECT 1`, which is tried at most once every `health_check_interval` seconds, when a replica is
+    chosen. When no replica is healthy, reads go to the primary.
+    """
+
+    def __init__(self, replicas: List[Replica], selection: str = 'round_robin', health_check_interval: float = 5):
+        if selection not in REPLICA_SELECTIONS:
+            raise ValueError(f"Unknown replica selection '{selection}', expected one of {', '.join(REPLICA_SELECTIONS)}")
+        self.replicas = replicas
+        self.selection = selection
+        self.health_check_interval = health_check_interval
+        self.primary_reads = 0
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def choose(self) -> Optional[Replica]:
+        """
+        :return: The replica which should serve the next read, or None if no replica is healthy.
+        """
+
+        now = time.monotonic()
+        for replica in self.replicas:
+            if not replica.healthy and now - replica.checked_at >= self.health_check_interval:
+                self._check_health(replica, now)
+
+        healthy_replicas = [replica for replica in self.replicas if replica.healthy]
+        if not healthy_replicas:
+            return None
+        with self._lock:
+            if self.selection == 'least_loaded':
+                replica = min(healthy_replicas, key=lambda candidate: candidate.active_reads)
+            else:
+                replica = healthy_replicas[next(self._turn) % len(healthy_replicas)]
+            replica.active_reads += 1
+            replica.reads += 1
+        return replica
+
+    def release(self, replica: Replica):
+        """
+        Ends a read served by a replica returned by `choose`.
+        """
+
+        with self._lock:
+            replica.active_reads -= 1
+
+    def record_primary_read(self):
+        with self._lock:
+            self.primary_reads += 1
+
+    def mark_unhealthy(self, replica: Replica, error: Exception):
+        replica.healthy = False
+        replica.checked_at = time.monotonic()
+        logger.warning('Replica %s is unhealthy, reading from the primary instead: %s', replica.name, error)
+
+    def render_metrics(self) -> Iterable[str]:
+        """
+        :return: The health and read counts of the replicas, in the Prometheus text format.
+        """
+
+        yield '# TYPE db_replica_healthy gauge'
+        for replica in self.replicas:
+            yield f'db_replica_healthy{{replica="{replica.name}"}} {int(replica.healthy)}'
+        yield '# TYPE db_replica_reads_total counter'
+        for replica in self.replicas:
+            yield f'db_replica_reads_total{{replica="{replica.name}"}} {replica.reads}'
+        yield '# TYPE db_primary_reads_total counter'
+        yield f'db_primary_reads_total {self.primary_reads}'
+
+    def _check_health(self, replica: Replica, now: float):
+        replica.checked_at = now
+        try:
+            with replica.engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+        except DBAPIError as e:
+            logger.warning('Replica %s is still unhealthy: %s', replica.name, e)
+            return
+        replica.healthy = True
+        logger.info('Replica %s is healthy again', replica.name)
+
+
+def init_replica_routing(app: Flask):
+    """
+    Creates the ReplicaRouter of an app from its replica binds, and pins the clients which write to the primary for
+    `DB_READ_YOUR_WRITES_SECONDS`, by setting a cookie on the responses of their successful writes. Does nothing if no replica is
+    configured. Must be called once the database extension is initialized.
+
+    :param app: The Flask app, whose config contains the `DB_REPLICA_*` values read by DbConfig, and whose replica binds were created by
+                the Flask-SQLAlchemy extension.
+    :return: None.
+    """
+
+    replica_count = len(app.config['DB_REPLICA_URIS'])
+    if not replica_count:
+        return
+
+    db = app.extensions['sqlalchemy']
+    with app.app_context():
+        replicas = [Replica(str(index), db.engines[replica_bind_key(index)]) for index in range(replica_count)]
+    router = app.extensions['replica_router'] = ReplicaRouter(
+        replicas, app.config['DB_REPLICA_SELECTION'], app.config['DB_REPLICA_HEALTH_CHECK_INTERVAL']
+    )
+    read_your_writes_seconds = app.config['DB_READ_YOUR_WRITES_SECONDS']
+
+    @app.after_request
+    def pin_writer_to_primary(response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400 and read_your_writes_seconds > 0:
+            response.set_cookie(PRIMARY_UNTIL_COOKIE, str(time.time() + read_your_writes_seconds), max_age=read_your_writes_seconds,
+                                httponly=True, samesite='Lax')
+        return response
+
+    instrumentation = app.extensions.get('instrumentation')
+    if instrumentation is not None:
+        instrumentation.collectors.append(router.render_metrics)
+
+
+def replica_bind_key(index: int) -> str:
+    """
+    :return: The key of the `SQLALCHEMY_BINDS` entry of the replica at the given index of `DB_REPLICA_URIS`.
+    """
+
+    return f'replica_{index}'
+
+
+def is_pinned_to_primary() -> bool:
+    """
+    :return: True if the client of the current request wrote recently, and must therefore read its own writes from the primary.
+    """
+
+    if not has_request_context():
+        return False
+    try:
+        return float(request.cookies.get(PRIMARY_UNTIL_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_from_replica(read: Callable[[], T]) -> T:
+    """
+    Calls a function whose queries may be served by a replica, i.e. which tolerates reading data a little older than the primary's. The
+    queries go to the primary instead if no replica is configured or healthy, if the client is pinned to the primary after writing, or if
+    the session has pending changes. If the replica fails, it is marked unhealthy and the function is called again on the primary.
+
+    :param read: The function executing the read queries with the session of the Flask-SQLAlchemy extension.
+    :return: The result of `read`.
+    """
+
+    router = current_app.extensions.get('replica_router') if has_app_context() else None
+    if router is None:
+        return read()
+
+    session = current_app.extensions['sqlalchemy'].session()
+    if 'replica' in session.info or session.new or session.dirty or session.deleted or is_pinned_to_primary():
+        router.record_primary_read()
+        return read()
+
+    replica = router.choose()
+    if replica is None:
+        router.record_primary_read()
+        return read()
+
+    session.info['replica'] = replica.engine
+    try:
+        return read()
+    except (OperationalError, InterfaceError) as e:
+        # the failed connection must be discarded before reading again
+        session.rollback()
+        router.mark_unhealthy(replica, e)
+    finally:
+        del session.info['replica']
+        router.release(replica)
+
+    router.record_primary_read()
+    return read()
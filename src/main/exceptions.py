@@ -0,0 +1,16 @@
+class VersionConflictError(Exception):
+    """
+    Raised when a bank is written with an expected version (e.g. from an `If-Match` header) which is not its current version.
+    """
+
+
+class ChangesExpiredError(Exception):
+    """
+    Raised when the change feed is read from a position whose following changes were already deleted by the retention of the feed.
+    """
+
+
+class InvalidFileError(Exception):
+    """
+    Raised when an imported file cannot be read any further, e.g. because it is not encoded in UTF-8 or its format is corrupted.
+    """
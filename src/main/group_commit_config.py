@@ -0,0 +1,17 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class GroupCommitConfig:
+    """
+    Configuration class which reads the group commit environment variables from `.env`.
+
+    If `BANK_CREATE_GROUP_COMMIT_WINDOW_MS` is greater than 0, banks created concurrently within this window are inserted in a single
+    transaction, of at most `BANK_CREATE_GROUP_COMMIT_MAX_BATCH` banks. A longer window and a larger batch save more commits under load, at
+    the cost of up to one window of latency per create. Batches are only formed within a process.
+    """
+
+    BANK_CREATE_GROUP_COMMIT_WINDOW_MS = float(os.getenv('BANK_CREATE_GROUP_COMMIT_WINDOW_MS', '0'))
+    BANK_CREATE_GROUP_COMMIT_MAX_BATCH = int(os.getenv('BANK_CREATE_GROUP_COMMIT_MAX_BATCH', '100'))
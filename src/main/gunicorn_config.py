@@ -0,0 +1,44 @@
+# Configuration of the production server, run from the `src` folder with:
+#   gunicorn --config main/gunicorn_config.py main.wsgi:app
+#
+# The app is created once in the master process and forked into pre-forked workers, which share its memory as long as they do not write
+# to it, and start without importing anything. Signals sent to the master:
+#   - HUP: reloads this config and replaces the workers gracefully. With `preload_app` the code is not reloaded, use USR2 instead.
+#   - USR2, then WINCH and QUIT to the old master: starts a new master with the new code next to the old one, then stops the old one once
+#     its workers finished their requests, without refusing any connection.
+#   - TERM: stops the server, letting the workers finish their requests for up to `graceful_timeout` seconds.
+#
+# Every worker has its own connection pool, so the database may receive up to workers * (DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW) connections.
+
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count() * 2 + 1)))
+# requests mostly wait on the database, so each worker serves a few of them concurrently in threads. A change feed stream holds a thread
+# until it ends, so ADMISSION_MAX_CONCURRENT_STREAMS (one less than the threads by default) must stay below it
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+preload_app = True
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+# replace workers after a number of requests, spread so that they are not all restarted at once
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '10000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '1000'))
+
+
+def when_ready(server):
+    # move the preloaded objects out of the garbage collector's reach, so that collections in the workers do not write to (and copy)
+    # the memory pages they share with the master
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # a connection opened by the master while preloading must not be shared by several processes, so the workers drop the pools they
+    # inherited without closing their connections, and open their own
+    app = worker.app.wsgi()
+    with app.app_context():
+        for engine in app.extensions['sqlalchemy'].engines.values():
+            engine.dispose(close=False)
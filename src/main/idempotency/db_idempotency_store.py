@@ -0,0 +1,59 @@
+import json
+import threading
+import time
+from typing import Dict, Optional
+
+from .idempotency_store import IdempotencyStore
+from ..repository.idempotency_repository import IdempotencyRepository
+
+
+class DbIdempotencyStore(IdempotencyStore):
+    """
+    An idempotency store keeping the records in the `idempotency_keys` table of the primary database, so that they are shared by all
+    processes of the API. A key is claimed by inserting its record, which fails if another request holds it. Expired records are deleted at
+    most once every `purge_interval` seconds, when a key is claimed.
+
+    Must be used within an application context.
+    """
+
+    def __init__(self, ttl: float, lock_timeout: float, purge_interval: float = 60):
+        super().__init__(ttl, lock_timeout)
+        self.purge_interval = purge_interval
+        self._purged_at = time.monotonic()
+        self._purge_lock = threading.Lock()
+
+    def claim(self, key: str, fingerprint: str) -> Optional[Dict]:
+        while True:
+            now = time.time()
+            if IdempotencyRepository.insert_key(key, fingerprint, now + self.lock_timeout):
+                self._purge_expired(now)
+                return None
+            entity = IdempotencyRepository.get_key(key)
+            if entity is not None and entity.expires_at > now:
+                return self._to_record(entity)
+            # the record expired, or was deleted since the insert failed: delete it unless another request claimed the key meanwhile
+            if entity is not None:
+                IdempotencyRepository.delete_key(key, expired_before=now)
+
+    def get(self, key: str) -> Optional[Dict]:
+        entity = IdempotencyRepository.get_key(key)
+        if entity is None or entity.expires_at <= time.time():
+            return None
+        return self._to_record(entity)
+
+    def complete(self, key: str, response: Dict):
+        IdempotencyRepository.complete_key(key, json.dumps(response), time.time() + self.ttl)
+
+    def release(self, key: str):
+        IdempotencyRepository.delete_key(key)
+
+    def _purge_expired(self, now: float):
+        with self._purge_lock:
+            if time.monotonic() - self._purged_at < self.purge_interval:
+                return
+            self._purged_at = time.monotonic()
+        IdempotencyRepository.delete_expired_keys(now)
+
+    @staticmethod
+    def _to_record(entity) -> Dict:
+        return {'fingerprint': entity.fingerprint, 'response': json.loads(entity.response) if entity.response is not None else None}
@@ -0,0 +1,122 @@
+import functools
+import hashlib
+import time
+from typing import Callable, Dict, Optional
+
+from flask import Response, current_app, jsonify, request
+
+from .db_idempotency_store import DbIdempotencyStore
+from .idempotency_store import IdempotencyStore
+from .memory_idempotency_store import MemoryIdempotencyStore
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# headers replayed with a stored response, the others (e.g. `Server-Timing`) only describing the request which produced it
+STORED_HEADERS = ('Content-Type', 'ETag', 'Location', 'Link')
+
+
+def idempotent(view: Callable) -> Callable:
+    """
+    Decorator making a write endpoint idempotent for the requests sent with an `Idempotency-Key` header, if the app has an idempotency
+    store.
+
+    The first request with a key is executed and its response stored, unless it is a server error, so that the requests retrying it with
+    the same key get the stored response, with an `Idempotent-Replayed: true` header, without executing the endpoint again. A retry arriving
+    while the first request is still in progress waits for its response, for at most `IDEMPOTENCY_WAIT_TIMEOUT` seconds. A key reused for a
+    different request, i.e. another method, URL or payload, is rejected.
+
+    :param view: The view function of the endpoint.
+    :return: The decorated view function, which returns:
+        - the response of the endpoint, or the stored response of the request first sent with the same key
+        - HTTP 400 Bad Request if the key is empty or longer than 255 characters
+        - HTTP 409 Conflict if the request first sent with the same key is still in progress after the wait timeout
+        - HTTP 422 Unprocessable Entity if the key was first sent with a different request
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        store: Optional[IdempotencyStore] = current_app.extensions.get('idempotency_store')
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if store is None or key is None:
+            return view(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f"'{IDEMPOTENCY_HEADER}' must be between 1 and {MAX_KEY_LENGTH} characters."}), 400
+
+        fingerprint = request_fingerprint()
+        deadline = time.monotonic() + current_app.config.get('IDEMPOTENCY_WAIT_TIMEOUT', 10)
+        record = store.claim(key, fingerprint)
+        while record is not None:
+            if record['fingerprint'] != fingerprint:
+                store.requests.inc('mismatch')
+                return jsonify({'error': f"This '{IDEMPOTENCY_HEADER}' was already used for a different request."}), 422
+            if record['response'] is not None:
+                store.requests.inc('replayed')
+                return _replay(record['response'])
+
+            record = store.wait(key, max(deadline - time.monotonic(), 0))
+            if record is None:
+                # the request holding the key failed, so this one executes in its place
+                record = store.claim(key, fingerprint)
+            elif record['response'] is None:
+                store.requests.inc('in_progress')
+                response = jsonify({'error': f"A request with this '{IDEMPOTENCY_HEADER}' is still in progress, retry later."})
+                response.headers['Retry-After'] = '1'
+                return response, 409
+
+        store.requests.inc('executed')
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except Exception:
+            store.release(key)
+            raise
+        if response.status_code >= 500 or response.is_streamed:
+            store.release(key)
+        else:
+            store.complete(key, _to_stored_response(response))
+        return response
+
+    return wrapper
+
+
+def request_fingerprint() -> str:
+    """
+    :return: A hash of the method, URL and payload of the current request, which are equal for the retries of a request.
+    """
+
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.full_path.encode(), request.get_data()):
+        digest.update(len(part).to_bytes(8, 'big'))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def create_idempotency_store(config) -> Optional[IdempotencyStore]:
+    """
+    Creates the IdempotencyStore described by the given configuration.
+
+    :param config: A mapping (e.g. the Flask app config) which may contain the `IDEMPOTENCY_*` settings defined in IdempotencyConfig.
+    :return: The IdempotencyStore, or None if idempotency keys are ignored.
+    :raise ValueError: If `IDEMPOTENCY_BACKEND` is not one of `none`, `memory` or `db`.
+    """
+
+    backend_name = config.get('IDEMPOTENCY_BACKEND', 'none')
+    ttl = config.get('IDEMPOTENCY_TTL', 86400)
+    lock_timeout = config.get('IDEMPOTENCY_LOCK_TIMEOUT', 60)
+    if backend_name == 'none':
+        return None
+    if backend_name == 'memory':
+        return MemoryIdempotencyStore(config.get('IDEMPOTENCY_MAX_SIZE', 10000), ttl, lock_timeout)
+    if backend_name == 'db':
+        return DbIdempotencyStore(ttl, lock_timeout)
+    raise ValueError(f"Unsupported IDEMPOTENCY_BACKEND '{backend_name}', expected one of 'none', 'memory' or 'db'.")
+
+
+def _to_stored_response(response: Response) -> Dict:
+    headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+    return {'status': response.status_code, 'headers': headers, 'body': response.get_data(as_text=True)}
+
+
+def _replay(stored_response: Dict) -> Response:
+    response = Response(stored_response['body'], status=stored_response['status'], headers=stored_response['headers'])
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
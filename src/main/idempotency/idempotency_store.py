@@ -0,0 +1,82 @@
+import time
+from typing import Dict, Optional
+
+from ..instrumentation import CounterMetric
+
+
+class IdempotencyStore:
+    """
+    Base class of the stores keeping the responses of the requests sent with an `Idempotency-Key` header.
+
+    Each key has a record, a dictionary containing the `fingerprint` of the request which claimed it, and its `response` once the request
+    completed, or None while it is in progress. Responses are dictionaries containing the `status`, `headers` and `body` of an HTTP
+    response, which must be JSON serializable. A completed record expires after `ttl` seconds, and a record in progress after `lock_timeout`
+    seconds, so that a request which never completes does not hold its key forever.
+    """
+
+    # the number of seconds between two reads of a record, while waiting for its request to complete
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, ttl: float, lock_timeout: float):
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        # the requests sent with a key, by outcome: `executed`, `replayed`, `mismatch` (reused for another request) or `in_progress`
+        self.requests = CounterMetric('idempotency_requests_total', 'Number of requests sent with an idempotency key.', ('outcome',))
+
+    def claim(self, key: str, fingerprint: str) -> Optional[Dict]:
+        """
+        Atomically claims a key for a request, unless another request holds it.
+
+        :param key: The idempotency key sent by the client.
+        :param fingerprint: The fingerprint of the request, which identifies the requests a key may be reused for.
+        :return: None if the key was claimed, and the request must therefore be executed, otherwise the record of the request holding it.
+        """
+
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Retrieves the record of a key.
+
+        :param key: The idempotency key.
+        :return: The record of the key, or None if it is not claimed or expired.
+        """
+
+        raise NotImplementedError
+
+    def complete(self, key: str, response: Dict):
+        """
+        Stores the response of the request holding a key, which is returned to the requests reusing the key until it expires.
+
+        :param key: The idempotency key.
+        :param response: The response of the request.
+        :return: None.
+        """
+
+        raise NotImplementedError
+
+    def release(self, key: str):
+        """
+        Releases a key without storing a response, e.g. because its request failed, so that a retry can claim it again.
+
+        :param key: The idempotency key.
+        :return: None.
+        """
+
+        raise NotImplementedError
+
+    def wait(self, key: str, timeout: float) -> Optional[Dict]:
+        """
+        Waits until the request holding a key completes or releases it. This implementation reads the record every POLL_INTERVAL seconds.
+
+        :param key: The idempotency key.
+        :param timeout: The maximum number of seconds to wait.
+        :return: The record of the key, which is still in progress if the timeout was reached, or None if the key was released.
+        """
+
+        deadline = time.monotonic() + timeout
+        while True:
+            record = self.get(key)
+            if record is None or record['response'] is not None or time.monotonic() >= deadline:
+                return record
+            time.sleep(min(self.POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
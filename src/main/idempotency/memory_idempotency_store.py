@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .idempotency_store import IdempotencyStore
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """
+    An in-process, thread-safe idempotency store, which evicts the oldest records once `max_size` is reached. The requests waiting for a
+    key are woken up as soon as its request completes.
+
+    Records are only shared by the threads of a single process, so this store must only be used when the API runs in one process.
+    """
+
+    def __init__(self, max_size: int, ttl: float, lock_timeout: float):
+        super().__init__(ttl, lock_timeout)
+        self.max_size = max_size
+        # maps each key to a tuple of its record and its expiry time, in the order the keys were claimed
+        self._records = OrderedDict()
+        self._condition = threading.Condition()
+
+    def claim(self, key: str, fingerprint: str) -> Optional[Dict]:
+        with self._condition:
+            record = self._get(key)
+            if record is not None:
+                return record
+            self._records[key] = ({'fingerprint': fingerprint, 'response': None}, time.monotonic() + self.lock_timeout)
+            self._records.move_to_end(key)
+            while len(self._records) > self.max_size:
+                self._records.popitem(last=False)
+            return None
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._condition:
+            return self._get(key)
+
+    def complete(self, key: str, response: Dict):
+        with self._condition:
+            record = self._get(key)
+            if record is not None:
+                self._records[key] = ({**record, 'response': response}, time.monotonic() + self.ttl)
+            self._condition.notify_all()
+
+    def release(self, key: str):
+        with self._condition:
+            self._records.pop(key, None)
+            self._condition.notify_all()
+
+    def wait(self, key: str, timeout: float) -> Optional[Dict]:
+        def is_settled():
+            record = self._get(key)
+            return record is None or record['response'] is not None
+
+        with self._condition:
+            self._condition.wait_for(is_settled, timeout)
+            return self._get(key)
+
+    def _get(self, key: str) -> Optional[Dict]:
+        entry = self._records.get(key)
+        if entry is None:
+            return None
+        record, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._records[key]
+            return None
+        return record
@@ -0,0 +1,22 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class IdempotencyConfig:
+    """
+    Configuration class which reads the idempotency key environment variables from `.env`.
+
+    `IDEMPOTENCY_BACKEND` is one of `none` (default, the `Idempotency-Key` header is ignored), `memory` (an in-process store, only suitable
+    when running a single process) or `db` (a table of the database, shared by all processes). Responses are kept for `IDEMPOTENCY_TTL`
+    seconds, and the memory store keeps at most `IDEMPOTENCY_MAX_SIZE` of them. A duplicate of a request still in progress waits up to
+    `IDEMPOTENCY_WAIT_TIMEOUT` seconds for its response, and a request which never completes, e.g. because its process died, stops holding
+    its key after `IDEMPOTENCY_LOCK_TIMEOUT` seconds.
+    """
+
+    IDEMPOTENCY_BACKEND = os.getenv('IDEMPOTENCY_BACKEND', 'none')
+    IDEMPOTENCY_TTL = float(os.getenv('IDEMPOTENCY_TTL', '86400'))
+    IDEMPOTENCY_MAX_SIZE = int(os.getenv('IDEMPOTENCY_MAX_SIZE', '10000'))
+    IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv('IDEMPOTENCY_WAIT_TIMEOUT', '10'))
+    IDEMPOTENCY_LOCK_TIMEOUT = float(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT', '60'))
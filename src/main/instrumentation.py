@@ -0,0 +1,219 @@
+import bisect
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    """
+    A thread-safe Prometheus-style histogram, with one series of buckets per combination of label values.
+    """
+
+    def __init__(self, name: str, description: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        # maps the label values to the count of observations per bucket (not cumulative), their sum and their count
+        self._series: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._series.setdefault(label_values, [[0] * len(self.buckets), 0.0, 0])
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.description}'
+        yield f'# TYPE {self.name} histogram'
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for label_values, (counts, total, count) in sorted(series.items()):
+            labels = _format_labels(self.label_names, label_values)
+            cumulative = 0
+            for bucket, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{{{labels},le="{bucket}"}} {cumulative}'
+            yield f'{self.name}_bucket{{{labels},le="+Inf"}} {count}'
+            yield f'{self.name}_sum{{{labels}}} {total}'
+            yield f'{self.name}_count{{{labels}}} {count}'
+
+
+class CounterMetric:
+    """
+    A thread-safe Prometheus-style counter, with one value per combination of label values.
+    """
+
+    def __init__(self, name: str, description: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self._values = Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values):
+        with self._lock:
+            self._values[label_values] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.description}'
+        yield f'# TYPE {self.name} counter'
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            yield f'{self.name}{{{_format_labels(self.label_names, label_values)}}} {value}'
+
+
+class Instrumentation:
+    """
+    Flask extension measuring every request: its wall time, the number and total time of its SQL queries and the time spent encoding
+    its response (see `serialization_timer`).
+
+    The measurements are returned in a `Server-Timing` header and aggregated into latency histograms per route, rendered in the
+    Prometheus text format by `render_metrics`. Queries slower than `SLOW_QUERY_THRESHOLD_MS` are logged, as well as requests executing
+    the same query `N_PLUS_ONE_THRESHOLD` times or more, which usually reveals an N+1 query pattern.
+    """
+
+    def __init__(self, app=None):
+        self.request_duration = Histogram(
+            'http_request_duration_seconds', 'Wall time of the requests.', ('method', 'route', 'status')
+        )
+        self.request_sql_duration = Histogram(
+            'http_request_sql_duration_seconds', 'Total time spent in SQL queries per request.', ('method', 'route')
+        )
+        self.request_queries = Histogram(
+            'http_request_sql_queries', 'Number of SQL queries per request.', ('method', 'route'), buckets=(1, 2, 5, 10, 25, 50, 100)
+        )
+        self.slow_queries = CounterMetric('sql_slow_queries_total', 'Number of queries slower than the threshold.', ('route',))
+        self.n_plus_one_requests = CounterMetric(
+            'http_n_plus_one_requests_total', 'Number of requests which executed the same query too many times.', ('method', 'route')
+        )
+        # functions returning additional metric lines, e.g. the statistics of the connection pool
+        self.collectors: List[Callable[[], Iterable[str]]] = []
+        self.slow_query_threshold = 0.1
+        self.n_plus_one_threshold = 10
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.slow_query_threshold = app.config.get('SLOW_QUERY_THRESHOLD_MS', 100) / 1000
+        self.n_plus_one_threshold = app.config.get('N_PLUS_ONE_THRESHOLD', 10)
+        app.extensions['instrumentation'] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def render_metrics(self) -> str:
+        """
+        :return: All metrics, in the Prometheus text exposition format.
+        """
+
+        metrics = (self.request_duration, self.request_sql_duration, self.request_queries, self.slow_queries, self.n_plus_one_requests)
+        lines = [line for metric in metrics for line in metric.render()]
+        for collector in self.collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _before_request():
+        g.instrumentation_start = time.perf_counter()
+        g.sql_time = 0.0
+        g.serialization_time = 0.0
+        g.sql_statements = Counter()
+
+    def _after_request(self, response):
+        if 'instrumentation_start' not in g:
+            return response
+
+        wall_time = time.perf_counter() - g.instrumentation_start
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        query_count = sum(g.sql_statements.values())
+
+        self.request_duration.observe(wall_time, request.method, route, str(response.status_code))
+        self.request_sql_duration.observe(g.sql_time, request.method, route)
+        self.request_queries.observe(query_count, request.method, route)
+
+        if g.sql_statements:
+            statement, executions = g.sql_statements.most_common(1)[0]
+            if executions >= self.n_plus_one_threshold:
+                self.n_plus_one_requests.inc(request.method, route)
+                logger.warning('Probable N+1 query pattern in %s %s: executed %d times: %s', request.method, route, executions, statement)
+
+        # the time of a streamed response body is not included, since it is generated after this hook
+        response.headers['Server-Timing'] = (
+            f'db;desc="{query_count} queries";dur={g.sql_time * 1000:.2f}, '
+            f'ser;dur={g.serialization_time * 1000:.2f}, '
+            f'total;dur={wall_time * 1000:.2f}'
+        )
+        return response
+
+    def _record_query(self, statement: str, duration: float):
+        if duration >= self.slow_query_threshold:
+            route = request.url_rule.rule if has_request_context() and request.url_rule else 'none'
+            self.slow_queries.inc(route)
+            logger.warning('Slow query (%.1f ms): %s', duration * 1000, statement)
+        if has_request_context() and 'sql_statements' in g:
+            g.sql_time += duration
+            g.sql_statements[statement] += 1
+
+
+@contextmanager
+def serialization_timer():
+    """
+    Context manager adding the time spent in its block to the serialization time of the current request, if it is instrumented.
+    """
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if has_request_context() and 'serialization_time' in g:
+            g.serialization_time += time.perf_counter() - start
+
+
+# the listeners are registered on the Engine class when this module is imported, so that they apply to every engine, including the ones
+# created lazily, and measure the queries of the app which issued them (see `_after_cursor_execute`)
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # the start is kept on the execution context rather than on `conn.info`, which outlives the statement: a statement which fails never
+    # reaches `after_cursor_execute`, so its start would stay on the pooled connection
+    if context is not None:
+        context.instrumentation_query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, 'instrumentation_query_start', None)
+    if start is None:
+        return
+    duration = time.perf_counter() - start
+    try:
+        extension = current_app.extensions.get('instrumentation')
+    except RuntimeError:
+        # queries executed outside of an app context are only measured by the app that issued them
+        return
+    if extension is not None:
+        extension._record_query(statement, duration)
+
+
+def _format_labels(label_names: Tuple[str, ...], label_values: Tuple) -> str:
+    return ','.join(f'{name}="{_escape_label(value)}"' for name, value in zip(label_names, label_values))
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
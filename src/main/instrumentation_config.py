@@ -0,0 +1,16 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class InstrumentationConfig:
+    """
+    Configuration class which reads the request instrumentation environment variables from `.env`.
+
+    Queries slower than `SLOW_QUERY_THRESHOLD_MS` are logged, and a request executing the same query at least `N_PLUS_ONE_THRESHOLD` times
+    is logged as a probable N+1 query pattern.
+    """
+
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '100'))
+    N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', '10'))
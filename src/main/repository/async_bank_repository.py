@@ -0,0 +1,149 @@
+from typing import Collection, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .bank_change_repository import BankChangeRepository
+from .bank_repository import BankRepository
+from .model.bank import BankEntity
+from ..exceptions import VersionConflictError
+
+
+class AsyncBankRepository:
+    """
+    Provides the same methods as the BankRepository for interacting with the BankEntity in the database, as coroutines running on the
+    SQLAlchemy asyncio engine. Each method uses its own session. Writes record their changes in the change feed like the BankRepository.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker):
+        self.session_factory = session_factory
+
+    async def create_bank(self, bank_entity: BankEntity):
+        """
+        Persists a new BankEntity to the database.
+
+        :param bank_entity: The BankEntity object to be created.
+        :return: None.
+        """
+
+        async with self.session_factory() as session:
+            session.add(bank_entity)
+            await session.flush()
+            await self._insert_changes(session, 'created', [{'id': bank_entity.id, 'name': bank_entity.name,
+                                                              'location': bank_entity.location}])
+            await session.commit()
+
+    async def get_banks_page(self, limit: int, after: Optional[str] = None) -> List[Dict]:
+        """
+        Retrieves a single page of banks ordered by id, using keyset pagination.
+
+        :param limit: The maximum number of banks to be returned.
+        :param after: The id of the last bank of the previous page, or None to start from the beginning.
+        :return: A list containing at most `limit` dictionaries with the `id`, `name` and `location` of the banks whose id is greater than
+                 `after`.
+        """
+
+        query = select(*BankRepository.BANK_COLUMNS).order_by(BankEntity.id)
+        if after is not None:
+            query = query.where(BankEntity.id > after)
+        async with self.session_factory() as session:
+            result = await session.execute(query.limit(limit))
+            return [dict(row) for row in result.mappings()]
+
+    async def get_bank_versions_page(self, limit: int, after: Optional[str] = None) -> List[Tuple[str, int]]:
+        """
+        Retrieves the id and version of the banks in a single page, without loading the other columns.
+
+        :param limit: The maximum number of banks to be returned.
+        :param after: The id of the last bank of the previous page, or None to start from the beginning.
+        :return: A list containing at most `limit` tuples of a bank id and its version.
+        """
+
+        query = select(BankEntity.id, BankEntity.version).order_by(BankEntity.id)
+        if after is not None:
+            query = query.where(BankEntity.id > after)
+        async with self.session_factory() as session:
+            return [tuple(row) for row in await session.execute(query.limit(limit))]
+
+    async def update_bank(self, bank_id: str, data: Dict, expected_versions: Optional[Collection[int]] = None) -> Dict:
+        """
+        Updates an existing bank in the database with the single UPDATE statement of `BankRepository.update_bank`.
+
+        :param bank_id: The unique identifier of the bank to be updated.
+        :param data: A dictionary containing the columns to be updated for the bank, `name` and/or `location`. Other keys are ignored.
+        :param expected_versions: If given, the bank is only updated if its current version is one of these.
+        :return: A dictionary containing all columns of the updated bank.
+        :raise Exception: If bank is not found.
+        :raise VersionConflictError: If the version of the bank is not one of `expected_versions`.
+        """
+
+        async with self.session_factory() as session:
+            result = await session.execute(BankRepository.build_update_statement(bank_id, data, expected_versions))
+            updated_bank = result.mappings().first()
+            if updated_bank is None:
+                await session.rollback()
+                if expected_versions is not None and await self.get_bank_version(bank_id) is not None:
+                    raise VersionConflictError("Bank was modified")
+                raise Exception("Bank not found")
+
+            updated_bank = dict(updated_bank)
+            await self._insert_changes(session, 'updated', [updated_bank])
+            await session.commit()
+            return updated_bank
+
+    async def delete_bank(self, bank_id: str, expected_versions: Optional[Collection[int]] = None) -> bool:
+        """
+        Deletes a bank from the database based on the given bank id, with the single DELETE statement of `BankRepository.delete_bank`.
+
+        :param bank_id: The unique identifier of the bank to be deleted.
+        :param expected_versions: If given, the bank is only deleted if its current version is one of these.
+        :return: True if the bank was successfully deleted, False otherwise (if not found).
+        :raise VersionConflictError: If the version of the bank is not one of `expected_versions`.
+        """
+
+        async with self.session_factory() as session:
+            result = await session.execute(BankRepository.build_delete_statement(bank_id, expected_versions))
+            if result.rowcount == 0:
+                await session.rollback()
+                if expected_versions is not None and await self.get_bank_version(bank_id) is not None:
+                    raise VersionConflictError("Bank was modified")
+                return False
+
+            await self._insert_changes(session, 'deleted', [{'id': bank_id}])
+            await session.commit()
+            return True
+
+    async def get_bank_by_id(self, bank_id: str) -> Optional[BankEntity]:
+        """
+        Retrieves a specific BankEntity from the database based on the given bank id.
+
+        :param bank_id: The unique identifier of the bank to be retrieved.
+        :return: The BankEntity object with the matching bank id, or None if not found.
+        """
+
+        async with self.session_factory() as session:
+            return await session.get(BankEntity, bank_id)
+
+    async def get_bank_version(self, bank_id: str) -> Optional[int]:
+        """
+        Retrieves the version of a specific bank, without loading its other columns.
+
+        :param bank_id: The unique identifier of the bank.
+        :return: The version of the bank, or None if not found.
+        """
+
+        async with self.session_factory() as session:
+            return await session.scalar(select(BankEntity.version).where(BankEntity.id == bank_id))
+
+    @staticmethod
+    async def _insert_changes(session, operation: str, banks: List[Dict]):
+        """
+        Adds changes to the transaction of the given session, without committing it.
+
+        :param session: The session of the write.
+        :param operation: One of `created`, `updated` or `deleted`.
+        :param banks: The changed banks, as accepted by `BankChangeRepository.insert_changes`.
+        :return: None.
+        """
+
+        await session.execute(BankChangeRepository.INSERT_STATEMENT, BankChangeRepository.to_change_rows(operation, banks))
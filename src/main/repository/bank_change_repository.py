@@ -0,0 +1,149 @@
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import delete, exists, func, insert, select
+from sqlalchemy.orm import aliased
+
+from .model.bank_change import BankChangeEntity
+from ..db import db
+from ..db_routing import read_from_replica
+
+T = TypeVar('T')
+
+
+class BankChangeRepository:
+    """
+    Provides the necessary methods for interacting with the BankChangeEntity in the database, i.e. the transactional outbox of the bank
+    writes. Changes are inserted by the BankRepository within the transaction of the write, so that a change is in the feed if and only if
+    the write was committed.
+    """
+
+    # columns returned to the consumers of the feed
+    CHANGE_COLUMNS = (BankChangeEntity.sequence, BankChangeEntity.operation, BankChangeEntity.bank_id, BankChangeEntity.name,
+                      BankChangeEntity.location, BankChangeEntity.changed_at)
+    # a Core insert, so that the sequences assigned by the database are not fetched back
+    INSERT_STATEMENT = insert(BankChangeEntity.__table__)
+
+    @staticmethod
+    def read_from_replica(read: Callable[[], T]) -> T:
+        """
+        Calls a function reading the feed, whose queries may be served by a read replica, see `BankRepository.read_from_replica`.
+
+        :param read: The function calling the read methods of this repository.
+        :return: The result of `read`.
+        """
+
+        return read_from_replica(read)
+
+    @staticmethod
+    def insert_changes(operation: str, banks: Iterable[Dict]):
+        """
+        Adds changes to the current transaction, without committing it.
+
+        :param operation: One of `created`, `updated` or `deleted`.
+        :param banks: Dictionaries containing the `id` of each changed bank, and its `name` and `location` unless it was deleted.
+        :return: None.
+        """
+
+        rows = BankChangeRepository.to_change_rows(operation, banks)
+        if rows:
+            db.session.execute(BankChangeRepository.INSERT_STATEMENT, rows)
+
+    @staticmethod
+    def to_change_rows(operation: str, banks: Iterable[Dict]) -> List[Dict]:
+        """
+        Builds the rows inserted by `insert_changes`, also used by the AsyncBankRepository.
+
+        :param operation: One of `created`, `updated` or `deleted`.
+        :param banks: Dictionaries containing the `id` of each changed bank, and its `name` and `location` unless it was deleted.
+        :return: The rows of the changes, to be executed with INSERT_STATEMENT.
+        """
+
+        changed_at = time.time()
+        return [
+            {'bank_id': bank['id'], 'operation': operation, 'name': bank.get('name'), 'location': bank.get('location'),
+             'changed_at': changed_at}
+            for bank in banks
+        ]
+
+    @staticmethod
+    def get_changes(since: int, limit: int, changed_before: Optional[float] = None) -> List[Dict]:
+        """
+        Retrieves the changes following a position of the feed, in order.
+
+        :param since: The sequence of the last change already received, 0 to start from the oldest retained change.
+        :param limit: The maximum number of changes to be returned.
+        :param changed_before: If given, only the changes older than this UNIX timestamp are returned, along with none of the changes
+                               following them.
+        :return: A list containing at most `limit` dictionaries with the CHANGE_COLUMNS of the changes whose sequence is greater than
+                 `since`.
+        """
+
+        query = select(*BankChangeRepository.CHANGE_COLUMNS).where(BankChangeEntity.sequence > since)
+        changes = [dict(row) for row in db.session.execute(query.order_by(BankChangeEntity.sequence).limit(limit)).mappings()]
+        if changed_before is not None:
+            # stop at the first recent change, since a change with a lower sequence may still be committed before it
+            recent = next((index for index, change in enumerate(changes) if change['changed_at'] >= changed_before), len(changes))
+            changes = changes[:recent]
+        return changes
+
+    @staticmethod
+    def get_sequence_range() -> Tuple[Optional[int], Optional[int]]:
+        """
+        :return: A tuple of the lowest and the highest sequence in the feed, or of None and None if the feed is empty.
+        """
+
+        return tuple(db.session.execute(select(func.min(BankChangeEntity.sequence), func.max(BankChangeEntity.sequence))).one())
+
+    @staticmethod
+    def delete_changes_before(changed_before: float) -> int:
+        """
+        Deletes the changes older than the retention period. The changes are deleted up to the oldest change which is kept, so that the
+        lowest sequence left in the feed tells which changes were deleted, and the latest change is always kept.
+
+        :param changed_before: The UNIX timestamp before which the changes are deleted.
+        :return: The number of deleted changes.
+        """
+
+        oldest_kept = db.session.scalar(select(func.min(BankChangeEntity.sequence)).where(BankChangeEntity.changed_at >= changed_before))
+        if oldest_kept is None:
+            oldest_kept = db.session.scalar(select(func.max(BankChangeEntity.sequence)))
+        if oldest_kept is None:
+            return 0
+        deleted = db.session.execute(delete(BankChangeEntity).where(BankChangeEntity.sequence < oldest_kept)).rowcount
+        db.session.commit()
+        return deleted
+
+    @staticmethod
+    def compact_changes(changed_before: float) -> int:
+        """
+        Deletes the changes of a bank followed by a later change of the same bank, among the changes older than the given timestamp. A
+        consumer reading the compacted feed receives the latest state of each bank rather than every intermediate state. The oldest change
+        of the feed is never compacted, since it marks the changes deleted by `delete_changes_before`.
+
+        :param changed_before: The UNIX timestamp before which the changes are compacted.
+        :return: The number of deleted changes.
+        """
+
+        oldest = db.session.scalar(select(func.min(BankChangeEntity.sequence)))
+        if oldest is None:
+            return 0
+        later = aliased(BankChangeEntity)
+        statement = delete(BankChangeEntity).where(
+            BankChangeEntity.changed_at < changed_before,
+            BankChangeEntity.sequence > oldest,
+            exists().where(later.bank_id == BankChangeEntity.bank_id, later.sequence > BankChangeEntity.sequence)
+        )
+        deleted = db.session.execute(statement).rowcount
+        db.session.commit()
+        return deleted
+
+    @staticmethod
+    def end_read():
+        """
+        Ends the transaction of the session, returning its connections to the pool, e.g. while a stream of the feed waits for new changes.
+
+        :return: None.
+        """
+
+        db.session.close()
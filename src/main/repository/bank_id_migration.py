@@ -0,0 +1,95 @@
+from typing import List
+
+from sqlalchemy import MetaData, String, Table, inspect, insert, select, text
+
+from .model.bank import BankEntity
+from .model.bank_change import BankChangeEntity
+from ..db import db
+
+# the tables whose bank id columns were strings of 36 characters before they were stored as UUIDs, and the name of these columns
+BANK_ID_COLUMNS = ((BankEntity.__table__, 'id'), (BankChangeEntity.__table__, 'bank_id'))
+
+
+def migrate_bank_ids(batch_size: int = 10000) -> List[str]:
+    """
+    Converts the bank id columns created as strings (e.g. by `create_schema` before ids were stored as UUIDs) to the 16 bytes of
+    `UUIDType`, keeping the existing ids, so that their URLs keep working. Must be called within an application context, once the writes
+    to the banks are stopped, and before the app storing UUIDs is started.
+
+    On SQL Server the columns are converted in place to `uniqueidentifier`. On the other databases, whose columns cannot be converted from
+    strings to binary, each table is renamed, created again, and its rows are copied `batch_size` at a time. All tables are migrated in a
+    single transaction where the database supports it.
+
+    :param batch_size: The number of rows copied per statement.
+    :return: The names of the migrated tables, empty if the columns were already stored as UUIDs.
+    :raise sqlalchemy.exc.DBAPIError: If an existing id is not a UUID, in which case nothing is migrated.
+    """
+
+    migrated_tables = []
+    with db.engine.begin() as connection:
+        inspector = inspect(connection)
+        for table, column_name in BANK_ID_COLUMNS:
+            if not inspector.has_table(table.name):
+                continue
+            column = next(column for column in inspector.get_columns(table.name) if column['name'] == column_name)
+            if not isinstance(column['type'], String):
+                continue
+            if connection.dialect.name == 'mssql':
+                _convert_to_uniqueidentifier(connection, inspector, table, column_name)
+            else:
+                _copy_table(connection, table, batch_size)
+            migrated_tables.append(table.name)
+    return migrated_tables
+
+
+def _convert_to_uniqueidentifier(connection, inspector, table: Table, column_name: str):
+    """
+    Converts a string column to `uniqueidentifier` in place, dropping the primary key and the indexes including the column during the
+    conversion, since SQL Server cannot alter an indexed column.
+    """
+
+    quote = connection.dialect.identifier_preparer.quote
+    primary_key = inspector.get_pk_constraint(table.name)
+    is_primary_key = column_name in primary_key['constrained_columns']
+    index_names = {index['name'] for index in inspector.get_indexes(table.name) if column_name in index['column_names']}
+    for index_name in index_names:
+        connection.execute(text(f'DROP INDEX {quote(index_name)} ON {quote(table.name)}'))
+    if is_primary_key:
+        connection.execute(text(f"ALTER TABLE {quote(table.name)} DROP CONSTRAINT {quote(primary_key['name'])}"))
+    connection.execute(text(f'ALTER TABLE {quote(table.name)} ALTER COLUMN {quote(column_name)} uniqueidentifier NOT NULL'))
+    if is_primary_key:
+        connection.execute(text(
+            f"ALTER TABLE {quote(table.name)} ADD CONSTRAINT {quote(primary_key['name'])} PRIMARY KEY CLUSTERED ({quote(column_name)})"
+        ))
+    for index in table.indexes:
+        if index.name in index_names:
+            index.create(connection)
+
+
+def _copy_table(connection, table: Table, batch_size: int):
+    """
+    Renames a table whose bank ids are strings, creates it again with the columns of its model, copies its rows, and drops the renamed
+    table.
+    """
+
+    old_table = Table(table.name, MetaData(), autoload_with=connection)
+    # the indexes keep their names when their table is renamed, so they are dropped first to be created again on the new table
+    for index in old_table.indexes:
+        index.drop(connection)
+    old_name = f'{table.name}_string_ids'
+    quote = connection.dialect.identifier_preparer.quote
+    connection.execute(text(f'ALTER TABLE {quote(table.name)} RENAME TO {quote(old_name)}'))
+    old_table = Table(old_name, MetaData(), autoload_with=connection)
+    table.create(connection)
+
+    columns = [old_table.c[column.name] for column in table.columns if column.name in old_table.c]
+    result = connection.execution_options(yield_per=batch_size).execute(select(*columns))
+    for rows in result.mappings().partitions():
+        # the string ids are converted by the UUIDType of the new columns
+        connection.execute(insert(table), [dict(row) for row in rows])
+    old_table.drop(connection)
+
+    if connection.dialect.name == 'postgresql' and table is BankChangeEntity.__table__:
+        # the sequences were copied as they are, so the next one must follow them
+        connection.execute(text("SELECT setval(pg_get_serial_sequence('bank_changes', 'sequence'), "
+                                "(SELECT COALESCE(MAX(sequence), 0) + 1 FROM bank_changes), false)"))
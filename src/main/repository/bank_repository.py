@@ -1,14 +1,55 @@
-from typing import List, Dict
+from typing import Callable, Collection, List, Dict, Iterator, Optional, Set, Tuple, TypeVar, Union
 
+from sqlalchemy import Delete, Select, Update, and_, bindparam, delete, func, insert, or_, select, update
+
+from .bank_change_repository import BankChangeRepository
 from .model.bank import BankEntity
 from ..db import db
+from ..db_routing import is_pinned_to_primary, read_from_replica
+from ..exceptions import VersionConflictError
+from ..uuids import new_uuid
+
+T = TypeVar('T')
 
 
 class BankRepository:
     """
-    Provides the necessary methods for interacting with the BankEntity in the database.
+    Provides the necessary methods for interacting with the BankEntity in the database. Every write also records its changes in the change
+    feed (see BankChangeRepository), in the same transaction.
     """
 
+    # columns returned to clients, selected on their own by the read queries which do not need BankEntity objects
+    BANK_COLUMNS = (BankEntity.id, BankEntity.name, BankEntity.location)
+    # columns the banks can be sorted by, each backed by the primary key or an index ending with the id
+    SORT_COLUMNS = {'id': BankEntity.id, 'name': BankEntity.name, 'location': BankEntity.location}
+
+    # executed once per row by `bulk_update_banks`, incrementing the version like the ORM does for single updates
+    _BULK_UPDATE_STATEMENT = (
+        update(BankEntity.__table__)
+        .where(BankEntity.__table__.c.id == bindparam('bank_id'))
+        .values(name=bindparam('bank_name'), location=bindparam('bank_location'), version=BankEntity.__table__.c.version + 1)
+    )
+
+    @staticmethod
+    def read_from_replica(read: Callable[[], T]) -> T:
+        """
+        Calls a function whose read queries may be served by a read replica, if any is configured and healthy, unless the current client
+        wrote recently. Queries not wrapped by this method, including all writes, go to the primary database.
+
+        :param read: The function calling the read methods of this repository.
+        :return: The result of `read`.
+        """
+
+        return read_from_replica(read)
+
+    @staticmethod
+    def is_pinned_to_primary() -> bool:
+        """
+        :return: True if the client of the current request wrote recently, so that its reads go to the primary database.
+        """
+
+        return is_pinned_to_primary()
+
     @staticmethod
     def create_bank(bank_entity: BankEntity):
         """
@@ -19,6 +60,9 @@ class BankRepository:
         """
 
         db.session.add(bank_entity)
+        # flushed before the change is recorded, so that the id generated for the bank is known
+        db.session.flush()
+        BankChangeRepository.insert_changes('created', [{'id': bank_entity.id, 'name': bank_entity.name, 'location': bank_entity.location}])
         db.session.commit()
 
     @staticmethod
@@ -32,45 +76,268 @@ class BankRepository:
         return BankEntity.query.all()
 
     @staticmethod
-    def update_bank(bank_id: str, data: Dict) -> BankEntity:
+    def get_banks_page(limit: int, after: Optional[Union[str, Tuple[str, str]]] = None, sort: str = 'id', descending: bool = False,
+                       filters: Optional[Dict[str, str]] = None) -> List[Dict]:
         """
-        Updates an existing BankEntity in the database.
+        Retrieves a single page of banks, using keyset pagination. Only the BANK_COLUMNS are selected, and the rows are returned as plain
+        dictionaries rather than BankEntity objects.
+
+        :param limit: The maximum number of banks to be returned.
+        :param after: The position of the last bank of the previous page, or None to start from the beginning. When sorting by `id` this is
+                      the id of the bank, otherwise a tuple of its value of the `sort` column and its id.
+        :param sort: The name of the column the banks are ordered by, one of SORT_COLUMNS. Ties are ordered by id.
+        :param descending: Whether the banks are ordered in descending rather than ascending order.
+        :param filters: The filters the banks must match, as accepted by `_apply_filters`.
+        :return: A list containing at most `limit` dictionaries with the `id`, `name` and `location` of the banks following `after`.
+        """
+
+        query = BankRepository._build_page_query(BankRepository.BANK_COLUMNS, after, sort, descending, filters)
+        return [dict(row) for row in db.session.execute(query.limit(limit)).mappings()]
+
+    @staticmethod
+    def iter_banks(batch_size: int, sort: str = 'id', descending: bool = False,
+                   filters: Optional[Dict[str, str]] = None) -> Iterator[List[Dict]]:
+        """
+        Iterates over all banks in the database in batches, so that only one batch is held in memory at a time.
+
+        :param batch_size: The number of banks to be fetched per query.
+        :param sort: The name of the column the banks are ordered by, as accepted by `get_banks_page`.
+        :param descending: Whether the banks are ordered in descending rather than ascending order.
+        :param filters: The filters the banks must match, as accepted by `_apply_filters`.
+        :return: A generator yielding lists of at most `batch_size` dictionaries as returned by `get_banks_page`.
+        """
+
+        after = None
+        while True:
+            batch = BankRepository.get_banks_page(batch_size, after, sort, descending, filters)
+            if not batch:
+                return
+            yield batch
+            if len(batch) < batch_size:
+                return
+            after = BankRepository.get_page_position(batch[-1], sort)
+
+    @staticmethod
+    def iter_all_banks(batch_size: int) -> Iterator[List[Dict]]:
+        """
+        Retrieves all banks with a single query, whose rows are fetched from a server-side cursor `batch_size` at a time, so that only one
+        batch is held in memory. The query is executed before this method returns, and its connection is held until all rows are fetched.
+
+        :param batch_size: The number of rows fetched at once.
+        :return: An iterator yielding lists of at most `batch_size` dictionaries with the BANK_COLUMNS of the banks, in no particular order.
+        """
+
+        result = db.session.execute(select(*BankRepository.BANK_COLUMNS).execution_options(yield_per=batch_size))
+        return ([dict(row) for row in partition] for partition in result.mappings().partitions())
+
+    @staticmethod
+    def get_bank_versions_page(limit: int, after: Optional[Union[str, Tuple[str, str]]] = None, sort: str = 'id', descending: bool = False,
+                               filters: Optional[Dict[str, str]] = None) -> List[Tuple[str, int]]:
+        """
+        Retrieves the id and version of the banks in a single page, using the same ordering and keyset pagination as `get_banks_page`
+        but without loading the other columns.
+
+        :param limit: The maximum number of banks to be returned.
+        :param after: The position of the last bank of the previous page, as accepted by `get_banks_page`.
+        :param sort: The name of the column the banks are ordered by, as accepted by `get_banks_page`.
+        :param descending: Whether the banks are ordered in descending rather than ascending order.
+        :param filters: The filters the banks must match, as accepted by `_apply_filters`.
+        :return: A list containing at most `limit` tuples of a bank id and its version.
+        """
+
+        columns = (BankEntity.id, BankEntity.version)
+        if sort != 'id':
+            # the sort column is needed by the ORDER BY anyway, and selecting it lets the database answer from the index alone
+            columns += (BankRepository.SORT_COLUMNS[sort],)
+        query = BankRepository._build_page_query(columns, after, sort, descending, filters)
+        return [(row[0], row[1]) for row in db.session.execute(query.limit(limit))]
+
+    @staticmethod
+    def count_banks(filters: Optional[Dict[str, str]] = None) -> int:
+        """
+        Counts the banks matching the given filters, without fetching any of them.
+
+        :param filters: The filters the banks must match, as accepted by `_apply_filters`.
+        :return: The number of matching banks.
+        """
+
+        query = BankRepository._apply_filters(select(func.count()).select_from(BankEntity), filters)
+        return db.session.scalar(query)
+
+    @staticmethod
+    def get_page_position(bank: Dict, sort: str = 'id') -> Union[str, Tuple[str, str]]:
+        """
+        Computes the position of a bank returned by `get_banks_page`, to be given as `after` to retrieve the banks following it.
+
+        :param bank: The dictionary of the bank, as returned by `get_banks_page`.
+        :param sort: The name of the column the banks are ordered by.
+        :return: The id of the bank when sorting by `id`, otherwise a tuple of its value of the `sort` column and its id.
+        """
+
+        return bank['id'] if sort == 'id' else (bank[sort], bank['id'])
+
+    @staticmethod
+    def _build_page_query(columns: Tuple, after: Optional[Union[str, Tuple[str, str]]], sort: str, descending: bool,
+                          filters: Optional[Dict[str, str]]) -> Select:
+        """
+        Builds the query of a single page of banks, without its limit. The ORDER BY matches the `ix_banks_name` and `ix_banks_location`
+        indexes, which end with the id, so that the database can read a page by scanning the index from the position of `after`.
+
+        :param columns: The columns to be selected.
+        :param after: The position of the last bank of the previous page, as accepted by `get_banks_page`.
+        :param sort: The name of the column the banks are ordered by, one of SORT_COLUMNS.
+        :param descending: Whether the banks are ordered in descending rather than ascending order.
+        :param filters: The filters the banks must match, as accepted by `_apply_filters`.
+        :return: The SELECT statement.
+        :raise ValueError: If `sort` is not one of SORT_COLUMNS.
+        """
+
+        if sort not in BankRepository.SORT_COLUMNS:
+            raise ValueError(f"Banks cannot be sorted by '{sort}'")
+
+        sort_column = BankRepository.SORT_COLUMNS[sort]
+        query = BankRepository._apply_filters(select(*columns), filters)
+        if sort == 'id':
+            order_by = (sort_column.desc() if descending else sort_column,)
+            if after is not None:
+                query = query.where(sort_column < after if descending else sort_column > after)
+        else:
+            order_by = (sort_column.desc(), BankEntity.id.desc()) if descending else (sort_column, BankEntity.id)
+            if after is not None:
+                # row value comparisons are not supported by SQL Server, so (sort_column, id) > (value, id) is expanded
+                value, bank_id = after
+                if descending:
+                    query = query.where(or_(sort_column < value, and_(sort_column == value, BankEntity.id < bank_id)))
+                else:
+                    query = query.where(or_(sort_column > value, and_(sort_column == value, BankEntity.id > bank_id)))
+        return query.order_by(*order_by)
+
+    @staticmethod
+    def _apply_filters(query: Select, filters: Optional[Dict[str, str]]) -> Select:
+        """
+        Adds the WHERE clauses of the given filters to a query. Prefix filters are translated to `LIKE 'prefix%'`, which the database can
+        answer with a range scan of the `ix_banks_name` or `ix_banks_location` index.
+
+        :param query: The query selecting from the banks table.
+        :param filters: A dictionary which may contain:
+            - `name` or `location`: the exact name or location of the banks
+            - `name_prefix` or `location_prefix`: the beginning of the name or location of the banks
+            - `q`: the beginning of either the name or the location of the banks
+        :return: The filtered query.
+        """
+
+        filters = filters or {}
+        if filters.get('name') is not None:
+            query = query.where(BankEntity.name == filters['name'])
+        if filters.get('location') is not None:
+            query = query.where(BankEntity.location == filters['location'])
+        if filters.get('name_prefix') is not None:
+            query = query.where(BankEntity.name.like(BankRepository._prefix_pattern(filters['name_prefix']), escape='/'))
+        if filters.get('location_prefix') is not None:
+            query = query.where(BankEntity.location.like(BankRepository._prefix_pattern(filters['location_prefix']), escape='/'))
+        if filters.get('q') is not None:
+            pattern = BankRepository._prefix_pattern(filters['q'])
+            query = query.where(or_(BankEntity.name.like(pattern, escape='/'), BankEntity.location.like(pattern, escape='/')))
+        return query
+
+    @staticmethod
+    def _prefix_pattern(prefix: str) -> str:
+        """
+        Builds the LIKE pattern matching the values starting with the given prefix, escaping the wildcards of SQLite and SQL Server with
+        `/`. The pattern is bound as a whole, since databases only use an index for LIKE if the pattern is a literal or a parameter,
+        unlike `startswith()` which appends the `%` in SQL.
+
+        :param prefix: The prefix, which may contain wildcard characters to be matched literally.
+        :return: The pattern, to be used with `escape='/'`.
+        """
+
+        return ''.join(f'/{char}' if char in '/%_[' else char for char in prefix) + '%'
+
+    @staticmethod
+    def update_bank(bank_id: str, data: Dict, expected_versions: Optional[Collection[int]] = None) -> Dict:
+        """
+        Updates an existing bank in the database with a single UPDATE statement, which increments its version and returns its new data
+        (using OUTPUT on SQL Server and RETURNING on SQLite) without loading it first.
 
         :param bank_id: The unique identifier of the bank to be updated.
-        :param data: A dictionary containing the data to be updated for the bank.
-        :return: The updated BankEntity object.
+        :param data: A dictionary containing the columns to be updated for the bank, `name` and/or `location`. Other keys are ignored.
+        :param expected_versions: If given, the bank is only updated if its current version is one of these.
+        :return: A dictionary containing all columns of the updated bank.
         :raise Exception: If bank is not found.
+        :raise VersionConflictError: If the version of the bank is not one of `expected_versions`.
         """
 
-        bank_to_update = BankEntity.query.filter_by(id=bank_id).first()
-        if not bank_to_update:
+        statement = BankRepository.build_update_statement(bank_id, data, expected_versions)
+        updated_bank = db.session.execute(statement).mappings().first()
+        if updated_bank is None:
+            db.session.rollback()
+            # only a failed conditional update needs a second query, to tell a missing bank from a modified one
+            if expected_versions is not None and BankRepository.get_bank_version(bank_id) is not None:
+                raise VersionConflictError("Bank was modified")
             raise Exception("Bank not found")
 
-        # update fields based on given data
-        bank_to_update.name = data['name']
-        bank_to_update.location = data['location']
-
-        # save and return the updated BankEntity
+        updated_bank = dict(updated_bank)
+        BankChangeRepository.insert_changes('updated', [updated_bank])
         db.session.commit()
-        return bank_to_update
+        return updated_bank
 
     @staticmethod
-    def delete_bank(bank_id: int) -> bool:
+    def delete_bank(bank_id: str, expected_versions: Optional[Collection[int]] = None) -> bool:
         """
-        Deletes a BankEntity object from the database based on the given bank id.
+        Deletes a bank from the database based on the given bank id, with a single DELETE statement checked by its row count.
 
         :param bank_id: The unique identifier of the bank to be deleted.
+        :param expected_versions: If given, the bank is only deleted if its current version is one of these.
         :return: True if the bank was successfully deleted, False otherwise (if not found).
+        :raise VersionConflictError: If the version of the bank is not one of `expected_versions`.
         """
 
-        bank = BankEntity.query.get(bank_id)
-        if not bank:
+        result = db.session.execute(BankRepository.build_delete_statement(bank_id, expected_versions))
+        if result.rowcount == 0:
+            db.session.rollback()
+            if expected_versions is not None and BankRepository.get_bank_version(bank_id) is not None:
+                raise VersionConflictError("Bank was modified")
             return False
 
-        db.session.delete(bank)
+        BankChangeRepository.insert_changes('deleted', [{'id': bank_id}])
         db.session.commit()
         return True
 
+    @staticmethod
+    def build_update_statement(bank_id: str, data: Dict, expected_versions: Optional[Collection[int]] = None) -> Update:
+        """
+        Builds the UPDATE statement of `update_bank`. The version condition is part of the WHERE clause, so that a bank modified between
+        the version check and the update cannot be overwritten.
+
+        :param bank_id: The unique identifier of the bank to be updated.
+        :param data: A dictionary containing the columns to be updated for the bank, `name` and/or `location`.
+        :param expected_versions: If given, the bank is only updated if its current version is one of these.
+        :return: The UPDATE statement, returning all columns of the updated bank.
+        """
+
+        table = BankEntity.__table__
+        values = {key: data[key] for key in ('name', 'location') if key in data}
+        statement = update(table).where(table.c.id == bank_id)
+        if expected_versions is not None:
+            statement = statement.where(table.c.version.in_(list(expected_versions)))
+        return statement.values(**values, version=table.c.version + 1).returning(*table.c)
+
+    @staticmethod
+    def build_delete_statement(bank_id: str, expected_versions: Optional[Collection[int]] = None) -> Delete:
+        """
+        Builds the DELETE statement of `delete_bank`.
+
+        :param bank_id: The unique identifier of the bank to be deleted.
+        :param expected_versions: If given, the bank is only deleted if its current version is one of these.
+        :return: The DELETE statement.
+        """
+
+        table = BankEntity.__table__
+        statement = delete(table).where(table.c.id == bank_id)
+        if expected_versions is not None:
+            statement = statement.where(table.c.version.in_(list(expected_versions)))
+        return statement
+
     @staticmethod
     def get_bank_by_id(bank_id: str) -> BankEntity:
         """
@@ -81,3 +348,135 @@ class BankRepository:
         """
 
         return BankEntity.query.filter_by(id=bank_id).first()
+
+    @staticmethod
+    def get_bank_version(bank_id: str) -> Optional[int]:
+        """
+        Retrieves the version of a specific bank, without loading its other columns.
+
+        :param bank_id: The unique identifier of the bank.
+        :return: The version of the bank, or None if not found.
+        """
+
+        return db.session.scalar(select(BankEntity.version).where(BankEntity.id == bank_id))
+
+    @staticmethod
+    def bulk_create_banks(banks_data: List[Dict], chunk_size: int) -> List[str]:
+        """
+        Persists many banks to the database in a single transaction, using one batched (executemany) INSERT per chunk.
+
+        :param banks_data: A list of dictionaries containing the `name` and `location` of each bank to be created.
+        :param chunk_size: The maximum number of rows sent to the database per statement.
+        :return: The ids assigned to the created banks, in the same order as `banks_data`.
+        """
+
+        # generate the ids up front, so they can be returned without reading the rows back
+        dialect_name = db.engine.dialect.name
+        rows = [{'id': new_uuid(dialect_name), 'name': data['name'], 'location': data['location']} for data in banks_data]
+        try:
+            for start in range(0, len(rows), chunk_size):
+                db.session.execute(insert(BankEntity), rows[start:start + chunk_size])
+                BankChangeRepository.insert_changes('created', rows[start:start + chunk_size])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return [row['id'] for row in rows]
+
+    @staticmethod
+    def bulk_update_banks(banks_data: List[Dict], chunk_size: int) -> Set[str]:
+        """
+        Updates many existing banks in the database in a single transaction, using one batched (executemany) UPDATE per chunk.
+
+        :param banks_data: A list of dictionaries containing the `id`, `name` and `location` of each bank to be updated.
+        :param chunk_size: The maximum number of rows sent to the database per statement.
+        :return: The ids of the banks that were found and updated. Banks that do not exist are skipped.
+        """
+
+        updated_ids = set()
+        try:
+            for start in range(0, len(banks_data), chunk_size):
+                chunk = banks_data[start:start + chunk_size]
+                existing_ids = BankRepository._find_existing_ids([data['id'] for data in chunk])
+                rows = [
+                    {'bank_id': data['id'], 'bank_name': data['name'], 'bank_location': data['location']}
+                    for data in chunk if data['id'] in existing_ids
+                ]
+                if rows:
+                    db.session.execute(BankRepository._BULK_UPDATE_STATEMENT, rows)
+                    BankChangeRepository.insert_changes('updated', [data for data in chunk if data['id'] in existing_ids])
+                updated_ids |= existing_ids
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return updated_ids
+
+    @staticmethod
+    def bulk_delete_banks(bank_ids: List[str], chunk_size: int) -> Set[str]:
+        """
+        Deletes many banks from the database in a single transaction, using one DELETE statement per chunk.
+
+        :param bank_ids: The unique identifiers of the banks to be deleted.
+        :param chunk_size: The maximum number of ids sent to the database per statement.
+        :return: The ids of the banks that were found and deleted.
+        """
+
+        deleted_ids = set()
+        try:
+            for start in range(0, len(bank_ids), chunk_size):
+                existing_ids = BankRepository._find_existing_ids(bank_ids[start:start + chunk_size])
+                if existing_ids:
+                    db.session.execute(delete(BankEntity).where(BankEntity.id.in_(existing_ids)))
+                    BankChangeRepository.insert_changes('deleted', [{'id': bank_id} for bank_id in existing_ids])
+                deleted_ids |= existing_ids
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return deleted_ids
+
+    @staticmethod
+    def upsert_banks(banks_data: List[Dict]) -> Tuple[int, int]:
+        """
+        Writes a chunk of banks in a single transaction, updating the banks whose id exists with a batched UPDATE and inserting the others
+        with a batched INSERT.
+
+        :param banks_data: A list of dictionaries containing the `name` and `location` of each bank, and its `id` or None to generate one.
+                           Each id may only appear once.
+        :return: A tuple of the number of created and updated banks.
+        """
+
+        bank_ids = [data['id'] for data in banks_data if data.get('id')]
+        existing_ids = BankRepository._find_existing_ids(bank_ids) if bank_ids else set()
+        dialect_name = db.engine.dialect.name
+        created_rows = [
+            {'id': data.get('id') or new_uuid(dialect_name), 'name': data['name'], 'location': data['location']}
+            for data in banks_data if data.get('id') not in existing_ids
+        ]
+        updated_rows = [data for data in banks_data if data.get('id') in existing_ids]
+        try:
+            if created_rows:
+                db.session.execute(insert(BankEntity), created_rows)
+                BankChangeRepository.insert_changes('created', created_rows)
+            if updated_rows:
+                db.session.execute(BankRepository._BULK_UPDATE_STATEMENT, [
+                    {'bank_id': data['id'], 'bank_name': data['name'], 'bank_location': data['location']} for data in updated_rows
+                ])
+                BankChangeRepository.insert_changes('updated', updated_rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return len(created_rows), len(updated_rows)
+
+    @staticmethod
+    def _find_existing_ids(bank_ids: List[str]) -> Set[str]:
+        """
+        Finds which of the given bank ids exist in the database, using a single query.
+
+        :param bank_ids: The unique identifiers of the banks to be looked up.
+        :return: The subset of `bank_ids` that exist in the database.
+        """
+
+        return set(db.session.scalars(select(BankEntity.id).where(BankEntity.id.in_(set(bank_ids)))))
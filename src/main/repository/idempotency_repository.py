@@ -0,0 +1,91 @@
+from typing import Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .model.idempotency_key import IdempotencyKeyEntity
+from ..db import db
+
+
+class IdempotencyRepository:
+    """
+    Provides the necessary methods for interacting with the IdempotencyKeyEntity in the database. Every write is committed on its own,
+    before or after the request holding the key, and always on the primary database.
+    """
+
+    @staticmethod
+    def insert_key(key: str, fingerprint: str, expires_at: float) -> bool:
+        """
+        Inserts the record of a key, unless the key already has one.
+
+        :param key: The idempotency key.
+        :param fingerprint: The fingerprint of the request claiming the key.
+        :param expires_at: The UNIX timestamp after which the record expires.
+        :return: True if the record was inserted, False if the key already has a record.
+        """
+
+        db.session.add(IdempotencyKeyEntity(key, fingerprint, expires_at))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return False
+        return True
+
+    @staticmethod
+    def get_key(key: str) -> Optional[IdempotencyKeyEntity]:
+        """
+        Retrieves the record of a key, as currently committed rather than as possibly held by the session.
+
+        :param key: The idempotency key.
+        :return: The IdempotencyKeyEntity of the key, or None if not found.
+        """
+
+        return db.session.scalar(select(IdempotencyKeyEntity).where(IdempotencyKeyEntity.key == key)
+                                 .execution_options(populate_existing=True))
+
+    @staticmethod
+    def complete_key(key: str, response: str, expires_at: float):
+        """
+        Stores the response of the request holding a key.
+
+        :param key: The idempotency key.
+        :param response: The JSON encoded response.
+        :param expires_at: The UNIX timestamp after which the record expires.
+        :return: None.
+        """
+
+        db.session.execute(update(IdempotencyKeyEntity).where(IdempotencyKeyEntity.key == key)
+                           .values(response=response, expires_at=expires_at))
+        db.session.commit()
+
+    @staticmethod
+    def delete_key(key: str, expired_before: Optional[float] = None) -> bool:
+        """
+        Deletes the record of a key. The uncommitted changes of the session, e.g. of a request which failed, are discarded first.
+
+        :param key: The idempotency key.
+        :param expired_before: If given, the record is only deleted if it expired before this UNIX timestamp.
+        :return: True if the record was deleted, False otherwise.
+        """
+
+        db.session.rollback()
+        statement = delete(IdempotencyKeyEntity).where(IdempotencyKeyEntity.key == key)
+        if expired_before is not None:
+            statement = statement.where(IdempotencyKeyEntity.expires_at < expired_before)
+        deleted = db.session.execute(statement).rowcount > 0
+        db.session.commit()
+        return deleted
+
+    @staticmethod
+    def delete_expired_keys(expired_before: float) -> int:
+        """
+        Deletes the records of all keys which expired.
+
+        :param expired_before: The UNIX timestamp before which the records expired.
+        :return: The number of deleted records.
+        """
+
+        deleted = db.session.execute(delete(IdempotencyKeyEntity).where(IdempotencyKeyEntity.expires_at < expired_before)).rowcount
+        db.session.commit()
+        return deleted
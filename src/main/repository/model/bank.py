@@ -1,6 +1,6 @@
-import uuid
-
+from .uuid_type import UUIDType
 from ...db import db
+from ...uuids import new_uuid
 
 
 class BankEntity(db.Model):
@@ -10,10 +10,19 @@ class BankEntity(db.Model):
 
     __tablename__ = 'banks'
 
-    # automatically generate a unique UUID4 string as the default primary key value
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    # stored in 16 bytes, and generated in creation order so that new banks are appended to the end of the primary key index
+    id = db.Column(UUIDType, primary_key=True, default=lambda context: new_uuid(context.dialect.name))
     name = db.Column(db.String(100), nullable=False)
     location = db.Column(db.String(100), nullable=False)
+    # incremented on every update, used as the ETag of the bank and to detect concurrent modifications
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    # support the filters and sorting on name and location, ending with the id so that keyset pagination can scan them in order
+    __table_args__ = (
+        db.Index('ix_banks_name', 'name', 'id'),
+        db.Index('ix_banks_location', 'location', 'id'),
+    )
+    __mapper_args__ = {'version_id_col': version}
 
     def __init__(self, name, location):
         self.name = name
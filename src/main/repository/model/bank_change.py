@@ -0,0 +1,26 @@
+from .uuid_type import UUIDType
+from ...db import db
+
+
+class BankChangeEntity(db.Model):
+    """
+    A repository model class representing a change of a bank in the change feed, written in the same transaction as the change itself
+    """
+
+    __tablename__ = 'bank_changes'
+
+    # assigned by the database in increasing order (IDENTITY on SQL Server, the rowid on SQLite), the position of the change in the feed
+    sequence = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    bank_id = db.Column(UUIDType, nullable=False)
+    # one of `created`, `updated` or `deleted`
+    operation = db.Column(db.String(10), nullable=False)
+    # the data of the bank after the change, None for deletes
+    name = db.Column(db.String(100), nullable=True)
+    location = db.Column(db.String(100), nullable=True)
+    # UNIX timestamp of the change, indexed to find the changes to be compacted or deleted without scanning the table
+    changed_at = db.Column(db.Float, nullable=False, index=True)
+
+    # find the later changes of the same bank when compacting the feed
+    __table_args__ = (
+        db.Index('ix_bank_changes_bank_id', 'bank_id', 'sequence'),
+    )
@@ -0,0 +1,21 @@
+from ...db import db
+
+
+class IdempotencyKeyEntity(db.Model):
+    """
+    A repository model class representing the record of an idempotency key, see `IdempotencyStore`
+    """
+
+    __tablename__ = 'idempotency_keys'
+
+    key = db.Column(db.String(255), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    # the JSON encoded response, or None while the request is in progress
+    response = db.Column(db.Text, nullable=True)
+    # UNIX timestamp after which the record is ignored and deleted, indexed to delete the expired records without scanning the table
+    expires_at = db.Column(db.Float, nullable=False, index=True)
+
+    def __init__(self, key, fingerprint, expires_at):
+        self.key = key
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
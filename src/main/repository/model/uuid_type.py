@@ -0,0 +1,40 @@
+import uuid
+
+from sqlalchemy.dialects import mssql, postgresql
+from sqlalchemy.types import BINARY, TypeDecorator
+
+from ...uuids import canonical_uuid
+
+
+class UUIDType(TypeDecorator):
+    """
+    Column type storing UUIDs in 16 bytes rather than as 36 characters: as `uniqueidentifier` on SQL Server, `uuid` on PostgreSQL and
+    `BINARY(16)` on the other databases. The UUIDs are given and returned as canonical strings (lower case, with dashes).
+
+    Values which are not UUIDs, e.g. an id taken from a URL, are bound as NULL, which no id is equal to, so that looking them up finds
+    nothing as before rather than failing.
+    """
+
+    impl = BINARY(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'mssql':
+            return dialect.type_descriptor(mssql.UNIQUEIDENTIFIER(as_uuid=False))
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(BINARY(16))
+
+    def process_bind_param(self, value, dialect):
+        value = canonical_uuid(value)
+        if value is None or dialect.name in ('mssql', 'postgresql'):
+            return value
+        return uuid.UUID(value).bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            return str(uuid.UUID(bytes=value))
+        # SQL Server returns them in upper case
+        return canonical_uuid(value)
@@ -0,0 +1,127 @@
+import asyncio
+from typing import Collection, Dict, Iterable, List, Optional, Tuple
+
+from .bank_service import decode_cursor, hash_bank_versions
+from .model.bank import Bank
+from ..cache.bank_cache import BankCache
+from ..repository.async_bank_repository import AsyncBankRepository
+from ..repository.model.bank import BankEntity
+from ..utils import to_dict
+
+
+class AsyncBankService:
+    """
+    Provides the business logic of the BankService as coroutines, on top of the AsyncBankRepository.
+
+    Reads are not served from the BankCache, whose Redis backend performs blocking calls which would stall the event loop. Writes still
+    invalidate it if it is given, in a thread, so that the Flask app sharing it does not serve the banks written here from its cache.
+    """
+
+    def __init__(self, bank_repository: AsyncBankRepository, bank_cache: Optional[BankCache] = None):
+        self.bank_repository = bank_repository
+        self.bank_cache = bank_cache
+
+    async def create_bank(self, bank: Bank):
+        """
+        Creates a new bank in the database.
+
+        :param bank: A service Bank model containing the bank's data.
+        :return: None.
+        """
+
+        await self.bank_repository.create_bank(BankEntity(name=bank.name, location=bank.location))
+        await self._invalidate_cache()
+
+    async def list_banks_page(self, limit: int, after: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Retrieves a single page of banks from the database, ordered by id.
+
+        :param limit: The maximum number of banks to be returned.
+        :param after: The cursor returned with the previous page, or None to retrieve the first page.
+        :return: A tuple containing the list of banks, as dictionaries with the fields of the Bank service model, and the cursor of the
+                 next page, or None if this is the last page.
+        :raise ValueError: If `after` is not a valid cursor.
+        """
+
+        # fetch one extra row to find out whether another page follows without issuing a separate count query
+        banks = await self.bank_repository.get_banks_page(limit + 1, decode_cursor(after, 'id'))
+        has_next_page = len(banks) > limit
+        banks = banks[:limit]
+        return banks, banks[-1]['id'] if has_next_page else None
+
+    async def get_banks_page_etag(self, limit: int, after: Optional[str] = None) -> str:
+        """
+        Computes the ETag of a single page of banks, from the id and version of its banks rather than from their data.
+
+        :param limit: The maximum number of banks in the page.
+        :param after: The cursor of the page, or None for the first page.
+        :return: The strong ETag (without quotes) of the page returned by `list_banks_page` with the same parameters.
+        :raise ValueError: If `after` is not a valid cursor.
+        """
+
+        return hash_bank_versions(await self.bank_repository.get_bank_versions_page(limit + 1, decode_cursor(after, 'id')))
+
+    async def update_bank(self, bank_id: str, data: Dict, expected_versions: Optional[Collection[int]] = None) -> Bank:
+        """
+        Updates an existing bank in the database.
+
+        :param bank_id: The unique identifier of the bank to be updated.
+        :param data: A dictionary containing the data to be updated for the bank.
+        :param expected_versions: If given, the bank is only updated if its current version is one of these.
+        :return: The updated Bank service model.
+        :raise VersionConflictError: If the version of the bank is not one of `expected_versions`.
+        """
+
+        updated_bank_data = await self.bank_repository.update_bank(bank_id, {'name': data['name'], 'location': data['location']},
+                                                                   expected_versions)
+        await self._invalidate_cache([bank_id])
+        return Bank.model_construct(**updated_bank_data)
+
+    async def delete_bank(self, bank_id: str, expected_versions: Optional[Collection[int]] = None) -> bool:
+        """
+        Deletes a bank from the database based on the given bank id.
+
+        :param bank_id: The unique identifier of the bank to be deleted.
+        :param expected_versions: If given, the bank is only deleted if its current version is one of these.
+        :return: True if the bank was successfully deleted, False otherwise (if not found).
+        :raise VersionConflictError: If the version of the bank is not one of `expected_versions`.
+        """
+
+        is_bank_deleted = await self.bank_repository.delete_bank(bank_id, expected_versions)
+        if is_bank_deleted:
+            await self._invalidate_cache([bank_id])
+        return is_bank_deleted
+
+    async def get_bank(self, bank_id: str) -> Optional[Bank]:
+        """
+        Retrieves a specific bank from the database based on the given bank id.
+
+        :param bank_id: The unique identifier of the bank to be retrieved.
+        :return: The Bank service model representing the bank, or None if not found.
+        """
+
+        bank_entity = await self.bank_repository.get_bank_by_id(bank_id)
+        return Bank.model_construct(**to_dict(bank_entity)) if bank_entity else None
+
+    async def get_bank_etag(self, bank_id: str) -> Optional[str]:
+        """
+        Retrieves the ETag of a specific bank, which is its version.
+
+        :param bank_id: The unique identifier of the bank.
+        :return: The strong ETag (without quotes) of the bank, or None if not found.
+        """
+
+        version = await self.bank_repository.get_bank_version(bank_id)
+        return str(version) if version is not None else None
+
+    async def _invalidate_cache(self, bank_ids: Iterable[str] = ()):
+        """
+        Invalidates the cached data of the given banks and all cached bank lists like `BankService._invalidate_cache`, if a cache is used.
+        Must be called once a write is committed.
+
+        :param bank_ids: The unique identifiers of the banks which were updated or deleted.
+        :return: None.
+        """
+
+        if self.bank_cache:
+            await asyncio.to_thread(self.bank_cache.invalidate, list(bank_ids))
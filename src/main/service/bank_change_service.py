@@ -0,0 +1,131 @@
+import threading
+import time
+from typing import Dict, Iterator, List, Tuple
+
+from ..exceptions import ChangesExpiredError
+from ..repository.bank_change_repository import BankChangeRepository
+
+
+class BankChangeService:
+    """
+    Provides the change feed of the banks, so that consumers can follow the bank writes instead of polling the bank list.
+
+    Every bank write records its changes in the feed, in the same transaction, each with a sequence number assigned by the database in
+    increasing order. A consumer reads the changes following the sequence of the last change it received. The feed is maintained at most
+    once every `maintenance_interval` seconds, when it is read:
+        - changes older than `compact_after` seconds are compacted, keeping only the latest change of each bank
+        - changes older than `retention` seconds are deleted; a consumer which has not read them gets a ChangesExpiredError, and must
+          reload the bank list before following the feed again
+
+    Sequences are assigned when the changes are written, so a transaction may commit a change after a concurrent transaction committed a
+    change with a higher sequence. A consumer reading a snapshot of the database, e.g. from a readable secondary or with read committed
+    snapshot, could skip the first change. Changes younger than `settle` seconds are held back to avoid this, if `settle` is set.
+    """
+
+    def __init__(self, bank_change_repository: BankChangeRepository, retention: float, compact_after: float,
+                 maintenance_interval: float = 300, settle: float = 0):
+        self.bank_change_repository = bank_change_repository
+        self.retention = retention
+        self.compact_after = compact_after
+        self.maintenance_interval = maintenance_interval
+        self.settle = settle
+        self._maintained_at = time.monotonic()
+        self._maintenance_lock = threading.Lock()
+
+    def get_latest_sequence(self) -> int:
+        """
+        :return: The sequence of the latest change of the feed, from which a consumer which just loaded the bank list follows the feed, or 0
+                 if no bank was written yet.
+        """
+
+        _, latest = self.bank_change_repository.read_from_replica(self.bank_change_repository.get_sequence_range)
+        return latest or 0
+
+    def list_changes(self, since: int, limit: int) -> List[Dict]:
+        """
+        Retrieves the changes following a position of the feed.
+
+        :param since: The sequence of the last change received by the consumer, or 0 to read the feed from its oldest retained change, which
+                      never expires.
+        :param limit: The maximum number of changes to be returned.
+        :return: A list containing at most `limit` changes, in order, as dictionaries with their `sequence`, `operation` (`created`,
+                 `updated` or `deleted`), `bank_id`, `bank` (the data of the bank after the change, None for deletes) and `changed_at`
+                 (a UNIX timestamp).
+        :raise ChangesExpiredError: If changes following `since` were deleted, unless `since` is 0.
+        """
+
+        self.maintain()
+
+        def load_changes():
+            changes = self.bank_change_repository.get_changes(since, limit, time.time() - self.settle if self.settle else None)
+            # the range is only needed if changes may be missing, compaction leaving gaps in the sequences without losing any bank
+            if since == 0 or changes and changes[0]['sequence'] == since + 1:
+                return changes, None
+            return changes, self.bank_change_repository.get_sequence_range()
+
+        changes, sequence_range = self.bank_change_repository.read_from_replica(load_changes)
+        if sequence_range is not None and sequence_range[0] is not None and 0 < since < sequence_range[0] - 1:
+            raise ChangesExpiredError(f'Changes following {since} were deleted')
+        return [to_change(change) for change in changes]
+
+    def stream_changes(self, since: int, batch_size: int, poll_interval: float, timeout: float) -> Iterator[List[Dict]]:
+        """
+        Follows the feed from a position, polling it for new changes.
+
+        :param since: The sequence of the last change received by the consumer, as accepted by `list_changes`.
+        :param batch_size: The maximum number of changes read per query.
+        :param poll_interval: The number of seconds between two queries, once no more changes are found.
+        :param timeout: The number of seconds after which the stream ends.
+        :return: A generator yielding the changes found by each query, as returned by `list_changes`, which is an empty list if no change
+                 was found.
+        :raise ChangesExpiredError: If changes following `since` were deleted, before the generator is returned.
+        """
+
+        changes = self.list_changes(since, batch_size)
+        return self._poll_changes(changes, since, batch_size, poll_interval, time.monotonic() + timeout)
+
+    def maintain(self, force: bool = False) -> Tuple[int, int]:
+        """
+        Compacts the feed and deletes its expired changes, unless it was done less than `maintenance_interval` seconds ago.
+
+        :param force: Whether to maintain the feed regardless of the last maintenance.
+        :return: A tuple of the number of compacted and deleted changes.
+        """
+
+        with self._maintenance_lock:
+            if not force and time.monotonic() - self._maintained_at < self.maintenance_interval:
+                return 0, 0
+            self._maintained_at = time.monotonic()
+        now = time.time()
+        compacted = self.bank_change_repository.compact_changes(now - self.compact_after)
+        deleted = self.bank_change_repository.delete_changes_before(now - self.retention)
+        return compacted, deleted
+
+    def _poll_changes(self, changes: List[Dict], since: int, batch_size: int, poll_interval: float,
+                      deadline: float) -> Iterator[List[Dict]]:
+        while True:
+            yield changes
+            if changes:
+                since = changes[-1]['sequence']
+            if len(changes) < batch_size:
+                # the connection is not held while waiting
+                self.bank_change_repository.end_read()
+                if time.monotonic() + poll_interval > deadline:
+                    return
+                time.sleep(poll_interval)
+            changes = self.list_changes(since, batch_size)
+
+
+def to_change(change: Dict) -> Dict:
+    """
+    Maps a change as returned by `BankChangeRepository.get_changes` to the change returned to the consumers of the feed.
+
+    :param change: The dictionary of the change.
+    :return: The dictionary of the change, with the data of the bank in `bank`.
+    """
+
+    bank = None
+    if change['operation'] != 'deleted':
+        bank = {'id': change['bank_id'], 'name': change['name'], 'location': change['location']}
+    return {'sequence': change['sequence'], 'operation': change['operation'], 'bank_id': change['bank_id'], 'bank': bank,
+            'changed_at': change['changed_at']}
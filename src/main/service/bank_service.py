@@ -1,9 +1,21 @@
-from typing import List, Dict, Optional
+import base64
+import binascii
+import hashlib
+import itertools
+import json
+from typing import Callable, Collection, List, Dict, Iterable, Iterator, Optional, Set, Tuple, TypeVar, Union
 
+from .group_commit import GroupCommit
 from .model.bank import Bank
+from .model.bank_search import BankSearch
+from .model.bank_update import BankUpdate
+from ..cache.bank_cache import BankCache
 from ..repository.bank_repository import BankRepository
 from ..repository.model.bank import BankEntity
 from ..utils import to_dict
+from ..uuids import canonical_uuid
+
+T = TypeVar('T')
 
 
 class BankService:
@@ -11,11 +23,25 @@ class BankService:
     Provides business logic for managing bank data.
 
     This class acts as an intermediary between the controller and the repository, handling data transformation, validation, and
-    orchestration of bank-related operations.
+    orchestration of bank-related operations. Data read from the database was validated when it was written, so it is not validated
+    again: Bank service models are built without validation, and lists of banks are returned as plain dictionaries. If a BankCache is
+    given, bank reads are served from it and every write invalidates it.
+
+    Bank reads which are not cached may be served by a read replica (see `BankRepository.read_from_replica`), except for a client which
+    wrote recently. The cache is only filled from the primary: a replica lagging behind a write would fill it with data older than the
+    write, which would be served to every client until it expires rather than for the replication lag.
+
+    If a `create_window` (in seconds) is given, banks created concurrently within this window are inserted by a GroupCommit in a single
+    transaction of at most `create_max_batch_size` banks.
     """
 
-    def __init__(self, bank_repository: BankRepository):
+    def __init__(self, bank_repository: BankRepository, bank_cache: Optional[BankCache] = None, create_window: float = 0,
+                 create_max_batch_size: int = 100):
         self.bank_repository = bank_repository
+        self.bank_cache = bank_cache
+        self.create_group_commit = (
+            GroupCommit(self._create_banks_batch, create_window, create_max_batch_size) if create_window > 0 else None
+        )
 
     def create_bank(self, bank: Bank):
         """
@@ -25,9 +51,15 @@ class BankService:
         :return: None.
         """
 
+        if self.create_group_commit:
+            # wait for the bank to be inserted together with the ones created concurrently
+            self.create_group_commit.submit({'name': bank.name, 'location': bank.location})
+            return
+
         # map the Bank service model to a BankEntity repository model and persist it
-        bank_entity = BankEntity(**bank.dict())
+        bank_entity = BankEntity(name=bank.name, location=bank.location)
         self.bank_repository.create_bank(bank_entity)
+        self._invalidate_cache()
 
     def list_banks(self) -> List[Bank]:
         """
@@ -36,34 +68,209 @@ class BankService:
         :return: A list of Bank service models representing banks.
         """
 
-        bank_entities = self.bank_repository.get_all_banks()
-        # map each BankEntity repository model to a Bank service model
-        banks = [Bank(**to_dict(entity)) for entity in bank_entities]
+        bank_cache = self._get_read_cache()
+
+        def load_banks():
+            return self._read(lambda: [to_dict(entity) for entity in self.bank_repository.get_all_banks()], bank_cache)
+
+        banks_data = bank_cache.get_banks('all', load_banks) if bank_cache else load_banks()
+        # map each bank's data to a Bank service model
+        banks = [Bank.model_construct(**bank_data) for bank_data in banks_data]
         return banks
 
-    def update_bank(self, bank_id: str, data: Dict) -> Bank:
+    def list_banks_page(self, limit: int, after: Optional[str] = None,
+                        search: Optional[BankSearch] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Retrieves a single page of banks from the database, ordered by id unless the search specifies otherwise.
+
+        :param limit: The maximum number of banks to be returned.
+        :param after: The cursor returned with the previous page, or None to retrieve the first page.
+        :param search: The filters and ordering of the banks, or None to retrieve all banks ordered by id.
+        :return: A tuple containing the list of banks, as dictionaries with the fields of the Bank service model, and the cursor of the
+                 next page, or None if this is the last page.
+        :raise ValueError: If `after` is not a valid cursor for the ordering of the search.
+        """
+
+        search = search or BankSearch()
+        position = decode_cursor(after, search.sort_column)
+        bank_cache = self._get_read_cache()
+
+        def load_page():
+            # fetch one extra row to find out whether another page follows without issuing a separate count query
+            banks = self._read(
+                lambda: self.bank_repository.get_banks_page(limit + 1, position, search.sort_column, search.descending, search.filters()),
+                bank_cache
+            )
+            has_next_page = len(banks) > limit
+            banks = banks[:limit]
+            next_cursor = encode_cursor(self.bank_repository.get_page_position(banks[-1], search.sort_column)) if has_next_page else None
+            return {'banks': banks, 'next_cursor': next_cursor}
+
+        cache_key = f'page:{limit}:{after}:{search_key(search)}'
+        page = bank_cache.get_banks(cache_key, load_page) if bank_cache else load_page()
+        return page['banks'], page['next_cursor']
+
+    def get_banks_page_etag(self, limit: int, after: Optional[str] = None, search: Optional[BankSearch] = None) -> str:
+        """
+        Computes the ETag of a single page of banks, from the id and version of its banks rather than from their data.
+
+        :param limit: The maximum number of banks in the page.
+        :param after: The cursor of the page, or None for the first page.
+        :param search: The filters and ordering of the banks, or None for all banks ordered by id.
+        :return: The strong ETag (without quotes) of the page returned by `list_banks_page` with the same parameters.
+        :raise ValueError: If `after` is not a valid cursor for the ordering of the search.
+        """
+
+        search = search or BankSearch()
+        position = decode_cursor(after, search.sort_column)
+        bank_cache = self._get_read_cache()
+
+        def compute_etag():
+            # include the extra row used to detect the next page, since a change of the next page cursor changes the response
+            bank_versions = self._read(
+                lambda: self.bank_repository.get_bank_versions_page(limit + 1, position, search.sort_column, search.descending,
+                                                                    search.filters()),
+                bank_cache
+            )
+            return hash_bank_versions(bank_versions)
+
+        cache_key = f'etag:{limit}:{after}:{search_key(search)}'
+        return bank_cache.get_banks(cache_key, compute_etag) if bank_cache else compute_etag()
+
+    def count_banks(self, search: Optional[BankSearch] = None) -> int:
+        """
+        Counts the banks matching a search, without loading them from the database.
+
+        :param search: The filters of the banks, or None to count all banks. The ordering of the search is ignored.
+        :return: The number of matching banks.
+        """
+
+        search = search or BankSearch()
+        bank_cache = self._get_read_cache()
+
+        def load_count():
+            return self._read(lambda: self.bank_repository.count_banks(search.filters()), bank_cache)
+
+        cache_key = f'count:{search_key(search.model_copy(update={"sort": "id"}))}'
+        return bank_cache.get_banks(cache_key, load_count) if bank_cache else load_count()
+
+    def stream_banks(self, batch_size: int, search: Optional[BankSearch] = None) -> Iterator[List[Dict]]:
+        """
+        Lazily retrieves all banks from the database, fetching them in batches so that memory usage does not grow with the table size.
+
+        :param batch_size: The number of banks to be fetched from the database per query.
+        :param search: The filters and ordering of the banks, or None to retrieve all banks ordered by id.
+        :return: A generator yielding batches of banks, as dictionaries with the fields of the Bank service model.
+        """
+
+        search = search or BankSearch()
+        # the batches are fetched like `BankRepository.iter_banks` does, each on its own so that it can be retried on the primary if the
+        # replica serving it fails
+        after = None
+        while True:
+            batch = self.bank_repository.read_from_replica(
+                lambda: self.bank_repository.get_banks_page(batch_size, after, search.sort_column, search.descending, search.filters())
+            )
+            if not batch:
+                return
+            yield batch
+            if len(batch) < batch_size:
+                return
+            after = self.bank_repository.get_page_position(batch[-1], search.sort_column)
+
+    def export_banks(self, batch_size: int) -> Iterator[List[Dict]]:
+        """
+        Retrieves all banks for an export. Unlike `stream_banks`, the banks are read by a single query from a server-side cursor, which is
+        faster for the whole table and reads it at a single point in time, but cannot be retried on the primary if its replica fails.
+
+        :param batch_size: The number of banks fetched from the database at once.
+        :return: An iterator yielding batches of banks, as dictionaries with the fields of the Bank service model, in no particular order.
+        """
+
+        return self.bank_repository.read_from_replica(lambda: self.bank_repository.iter_all_banks(batch_size))
+
+    def import_banks(self, banks: Iterable[Dict], chunk_size: int) -> Tuple[int, int]:
+        """
+        Creates or updates banks read from a file, one chunk at a time: each chunk is written in its own transaction, so that the file is
+        neither held in memory nor written in a single transaction. If a chunk fails, the chunks before it stay written. Banks with an
+        `id` are upserted, so importing the same file again updates them rather than creating them twice.
+
+        :param banks: Dictionaries containing the `name` and `location` of each bank, and its `id` or None to create it with a new id.
+        :param chunk_size: The number of banks written per transaction.
+        :return: A tuple of the number of created and updated banks.
+        """
+
+        created = updated = 0
+        banks = iter(banks)
+        while True:
+            chunk = list(itertools.islice(banks, chunk_size))
+            if not chunk:
+                return created, updated
+            # keep the last row of each id in the chunk, as upserting each row in turn would
+            rows_by_id = {data['id']: data for data in chunk if data.get('id')}
+            chunk_created, chunk_updated = self.bank_repository.upsert_banks(
+                [data for data in chunk if not data.get('id')] + list(rows_by_id.values())
+            )
+            created += chunk_created
+            updated += chunk_updated
+            self._invalidate_cache(rows_by_id.keys())
+
+    def update_bank(self, bank_id: str, data: Dict, expected_versions: Optional[Collection[int]] = None) -> Bank:
         """
         Updates an existing bank in the database.
 
         :param bank_id: The unique identifier of the bank to be updated.
         :param data: A dictionary containing the data to be updated for the bank.
+        :param expected_versions: If given, the bank is only updated if its current version is one of these.
+        :return: The updated Bank service model.
+        :raise VersionConflictError: If the version of the bank is not one of `expected_versions`.
+        """
+
+        return self._update_bank(bank_id, {'name': data['name'], 'location': data['location']}, expected_versions)
+
+    def patch_bank(self, bank_id: str, bank_update: BankUpdate, expected_versions: Optional[Collection[int]] = None) -> Bank:
+        """
+        Updates only the given fields of an existing bank in the database.
+
+        :param bank_id: The unique identifier of the bank to be updated.
+        :param bank_update: A service BankUpdate model containing the fields to be updated, fields which are not set are left unchanged.
+        :param expected_versions: If given, the bank is only updated if its current version is one of these.
+        :return: The updated Bank service model.
+        :raise VersionConflictError: If the version of the bank is not one of `expected_versions`.
+        """
+
+        return self._update_bank(bank_id, bank_update.model_dump(exclude_none=True), expected_versions)
+
+    def _update_bank(self, bank_id: str, data: Dict, expected_versions: Optional[Collection[int]]) -> Bank:
+        """
+        Updates the given columns of an existing bank in the database, and invalidates its cached data.
+
+        :param bank_id: The unique identifier of the bank to be updated.
+        :param data: A dictionary containing the columns to be updated, `name` and/or `location`.
+        :param expected_versions: If given, the bank is only updated if its current version is one of these.
         :return: The updated Bank service model.
+        :raise VersionConflictError: If the version of the bank is not one of `expected_versions`.
         """
 
-        updated_bank_entity = self.bank_repository.update_bank(bank_id, data)
-        # map the updated BankEntity repository model to a Bank service model
-        updated_bank = Bank(**to_dict(updated_bank_entity))
-        return updated_bank
+        updated_bank_data = self.bank_repository.update_bank(bank_id, data, expected_versions)
+        self._invalidate_cache([bank_id])
+        # map the updated bank's data to a Bank service model
+        return Bank.model_construct(**updated_bank_data)
 
-    def delete_bank(self, bank_id: int) -> bool:
+    def delete_bank(self, bank_id: int, expected_versions: Optional[Collection[int]] = None) -> bool:
         """
         Deletes a bank from the database based on the given bank id.
 
         :param bank_id: The unique identifier of the bank to be deleted.
+        :param expected_versions: If given, the bank is only deleted if its current version is one of these.
         :return: True if the bank was successfully deleted, False otherwise (if not found).
+        :raise VersionConflictError: If the version of the bank is not one of `expected_versions`.
         """
 
-        return self.bank_repository.delete_bank(bank_id)
+        is_bank_deleted = self.bank_repository.delete_bank(bank_id, expected_versions)
+        if is_bank_deleted:
+            self._invalidate_cache([bank_id])
+        return is_bank_deleted
 
     def get_bank(self, bank_id: str) -> Optional[Bank]:
         """
@@ -73,10 +280,203 @@ class BankService:
         :return: The Bank service model representing the bank, or None if not found.
         """
 
-        bank_entity = self.bank_repository.get_bank_by_id(bank_id)
-        if not bank_entity:
+        bank_cache = self._get_read_cache()
+        if bank_cache:
+            bank_data = bank_cache.get_bank(bank_id, lambda: self._load_bank_data(bank_id))
+        else:
+            bank_data = self.bank_repository.read_from_replica(lambda: self._load_bank_data(bank_id))
+        if not bank_data:
             return None
 
-        # map the retrieved BankEntity repository model to a Bank service model
-        bank = Bank(**to_dict(bank_entity))
+        # map the retrieved bank's data to a Bank service model
+        bank = Bank.model_construct(**bank_data)
         return bank
+
+    def get_bank_etag(self, bank_id: str) -> Optional[str]:
+        """
+        Retrieves the ETag of a specific bank, which is its version. Unlike `get_bank`, only the version is loaded from the database.
+
+        :param bank_id: The unique identifier of the bank.
+        :return: The strong ETag (without quotes) of the bank, or None if not found.
+        """
+
+        bank_cache = self._get_read_cache()
+        if bank_cache:
+            bank_data = bank_cache.get_bank(bank_id, lambda: self._load_bank_data(bank_id))
+            version = bank_data['version'] if bank_data else None
+        else:
+            version = self.bank_repository.read_from_replica(lambda: self.bank_repository.get_bank_version(bank_id))
+        return str(version) if version is not None else None
+
+    def bulk_create_banks(self, banks: List[Bank], chunk_size: int) -> List[str]:
+        """
+        Creates many banks in the database in a single transaction.
+
+        :param banks: The service Bank models containing the data of the banks to be created.
+        :param chunk_size: The maximum number of banks written to the database per statement.
+        :return: The ids assigned to the created banks, in the same order as `banks`.
+        """
+
+        created_ids = self.bank_repository.bulk_create_banks([bank.model_dump() for bank in banks], chunk_size)
+        self._invalidate_cache()
+        return created_ids
+
+    def bulk_update_banks(self, banks: Dict[str, Bank], chunk_size: int) -> Set[str]:
+        """
+        Updates many existing banks in the database in a single transaction.
+
+        :param banks: A dictionary mapping the unique identifier of each bank to be updated to a Bank service model with its new data.
+        :param chunk_size: The maximum number of banks written to the database per statement.
+        :return: The ids of the banks that were found and updated.
+        """
+
+        banks_data = [{**bank.model_dump(), 'id': bank_id} for bank_id, bank in banks.items()]
+        updated_ids = self.bank_repository.bulk_update_banks(banks_data, chunk_size)
+        self._invalidate_cache(updated_ids)
+        return updated_ids
+
+    def bulk_delete_banks(self, bank_ids: List[str], chunk_size: int) -> Set[str]:
+        """
+        Deletes many banks from the database in a single transaction.
+
+        :param bank_ids: The unique identifiers of the banks to be deleted.
+        :param chunk_size: The maximum number of banks deleted per statement.
+        :return: The ids of the banks that were found and deleted.
+        """
+
+        deleted_ids = self.bank_repository.bulk_delete_banks(bank_ids, chunk_size)
+        self._invalidate_cache(deleted_ids)
+        return deleted_ids
+
+    def _create_banks_batch(self, banks_data: List[Dict]) -> List[Union[str, Exception]]:
+        """
+        Creates a batch of banks coalesced by the group commit, in a single transaction. If it fails, each bank is created in its own
+        transaction instead, so that only the creates which fail on their own are answered with an error.
+
+        :param banks_data: A list of dictionaries containing the `name` and `location` of each bank to be created.
+        :return: The id assigned to each bank, or the error raised while creating it, in the same order as `banks_data`.
+        """
+
+        try:
+            results = self.bank_repository.bulk_create_banks(banks_data, len(banks_data))
+        except Exception:
+            if len(banks_data) == 1:
+                raise
+            results = []
+            for bank_data in banks_data:
+                try:
+                    results.extend(self.bank_repository.bulk_create_banks([bank_data], 1))
+                except Exception as e:
+                    results.append(e)
+        self._invalidate_cache()
+        return results
+
+    def _load_bank_data(self, bank_id: str) -> Optional[Dict]:
+        """
+        Loads the data of a specific bank from the database, as stored in the cache. Its query goes to the primary unless it is called
+        within `BankRepository.read_from_replica`.
+
+        :param bank_id: The unique identifier of the bank to be loaded.
+        :return: A dictionary containing all columns of the bank, or None if not found.
+        """
+
+        bank_entity = self.bank_repository.get_bank_by_id(bank_id)
+        return to_dict(bank_entity) if bank_entity else None
+
+    def _read(self, read: Callable[[], T], bank_cache: Optional[BankCache]) -> T:
+        """
+        Calls a function reading banks from the database, on a read replica unless its result is cached.
+
+        :param read: The function calling the read methods of the repository.
+        :param bank_cache: The cache the result is stored in, as returned by `_get_read_cache`, or None if it is not cached.
+        :return: The result of `read`.
+        """
+
+        return read() if bank_cache else self.bank_repository.read_from_replica(read)
+
+    def _get_read_cache(self) -> Optional[BankCache]:
+        """
+        :return: The cache bank reads are served from, or None if there is no cache or the current client must read its own writes.
+        """
+
+        if self.bank_cache is None or self.bank_repository.is_pinned_to_primary():
+            return None
+        return self.bank_cache
+
+    def _invalidate_cache(self, bank_ids: Iterable[str] = ()):
+        """
+        Invalidates the cached data of the given banks and all cached bank lists, if a cache is used. Must be called once a write is
+        committed.
+
+        :param bank_ids: The unique identifiers of the banks which were updated or deleted.
+        :return: None.
+        """
+
+        if self.bank_cache:
+            self.bank_cache.invalidate(bank_ids)
+
+
+def hash_bank_versions(bank_versions: Iterable[Tuple[str, int]]) -> str:
+    """
+    Computes the ETag of a list of banks from the id and version of each bank.
+
+    :param bank_versions: The id and version of each bank in the list, in order.
+    :return: The strong ETag (without quotes) of the list.
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+    for bank_id, version in bank_versions:
+        digest.update(f'{bank_id}:{version};'.encode())
+    return digest.hexdigest()
+
+
+def search_key(search: BankSearch) -> str:
+    """
+    Computes the part of a cache key identifying a search, which is empty for the default search.
+
+    :param search: The filters and ordering of the search.
+    :return: A string which is equal for equal searches.
+    """
+
+    return search.model_dump_json(exclude_defaults=True) if search != BankSearch() else ''
+
+
+def encode_cursor(position: Union[str, Tuple[str, str]]) -> str:
+    """
+    Encodes the position of a bank, as returned by `BankRepository.get_page_position`, as an opaque cursor. When banks are ordered by id
+    the cursor is the id itself, which keeps the cursors of existing clients valid.
+
+    :param position: The id of the bank, or a tuple of its value of the sort column and its id.
+    :return: The cursor.
+    """
+
+    if isinstance(position, str):
+        return position
+    return base64.urlsafe_b64encode(json.dumps(list(position), separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str], sort: str) -> Optional[Union[str, Tuple[str, str]]]:
+    """
+    Decodes a cursor returned by `encode_cursor`.
+
+    :param cursor: The cursor, or None.
+    :param sort: The name of the column the banks are ordered by.
+    :return: The position of the bank, as accepted by `BankRepository.get_banks_page`, or None if `cursor` is None.
+    :raise ValueError: If the cursor was not returned for the given ordering.
+    """
+
+    if cursor is None:
+        return None
+    if sort == 'id':
+        bank_id = canonical_uuid(cursor)
+        if bank_id is None:
+            raise ValueError('Invalid cursor')
+        return bank_id
+    try:
+        value, bank_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+    bank_id = canonical_uuid(bank_id)
+    if not isinstance(value, str) or bank_id is None:
+        raise ValueError('Invalid cursor')
+    return value, bank_id
@@ -0,0 +1,102 @@
+import threading
+from typing import Any, Callable, List, Optional
+
+
+class GroupCommit:
+    """
+    Coalesces writes submitted concurrently by several threads into batches, each written by a single call of `write_batch`, i.e. in a
+    single transaction.
+
+    The first thread submitting an item to an empty batch becomes its leader: it waits up to `window` seconds for other threads to add
+    their items, or until the batch holds `max_batch_size` items, then writes the whole batch on behalf of all of them while the others wait
+    for its result. Every thread is then answered with the result of its own item, or the error raised for it. The `window` bounds the
+    latency added to a write, in exchange for fewer and larger transactions under concurrency.
+
+    Batches are written one at a time: while a batch is being written, the next one keeps collecting items, so that batches grow with the
+    time the database takes to commit them.
+    """
+
+    def __init__(self, write_batch: Callable[[List[Any]], List[Any]], window: float, max_batch_size: int):
+        """
+        :param write_batch: A function writing a batch of items in a single transaction, returning one result per item in the same order.
+                            A result which is an exception is raised in the thread which submitted its item.
+        :param window: The maximum number of seconds a batch waits for more items.
+        :param max_batch_size: The maximum number of items in a batch, which is written as soon as it is full.
+        """
+
+        self.write_batch = write_batch
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.items = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._open_batch: Optional[_Batch] = None
+
+    def submit(self, item: Any) -> Any:
+        """
+        Adds an item to the open batch, and waits until the batch is written.
+
+        :param item: The item to be written.
+        :return: The result of `write_batch` for the item.
+        :raise Exception: The error raised by `write_batch`, or returned by it for the item.
+        """
+
+        with self._lock:
+            batch = self._open_batch
+            is_leader = batch is None
+            if is_leader:
+                batch = self._open_batch = _Batch()
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self.max_batch_size:
+                # later items go to a new batch, and the leader stops waiting
+                self._open_batch = None
+                batch.full.set()
+
+        if is_leader:
+            self._write(batch)
+        else:
+            batch.written.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        result = batch.results[index]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _write(self, batch: '_Batch'):
+        """
+        Waits for the batch to be full or for the window to end, and for the previous batch to be written, closes it and writes it, then
+        wakes up the threads waiting for it.
+        """
+
+        batch.full.wait(self.window)
+        # while the previous batch is being written, this one stays open and keeps growing
+        with self._write_lock:
+            with self._lock:
+                if self._open_batch is batch:
+                    self._open_batch = None
+                self.batches += 1
+                self.items += len(batch.items)
+
+            try:
+                batch.results = self.write_batch(batch.items)
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.written.set()
+
+
+class _Batch:
+    """
+    The items of a batch, and once it is written, their results or the error raised while writing them.
+    """
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.results: List[Any] = []
+        self.error: Optional[Exception] = None
+        self.full = threading.Event()
+        self.written = threading.Event()
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -6,5 +8,7 @@ class Bank(BaseModel):
     A service model class representing a Bank
     """
 
+    # assigned by the database, so it is not required when creating a bank
+    id: Optional[str] = None
     name: str
     location: str
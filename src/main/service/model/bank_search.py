@@ -0,0 +1,34 @@
+from typing import Dict, Literal, Optional
+
+from pydantic import BaseModel
+
+
+class BankSearch(BaseModel):
+    """
+    A service model class representing the filters and ordering of a search for banks
+    """
+
+    # exact matches
+    name: Optional[str] = None
+    location: Optional[str] = None
+    # prefix matches, `q` matching banks whose name or location starts with it
+    name_prefix: Optional[str] = None
+    location_prefix: Optional[str] = None
+    q: Optional[str] = None
+    # the column the banks are ordered by, in descending order if prefixed with `-`
+    sort: Literal['id', '-id', 'name', '-name', 'location', '-location'] = 'id'
+
+    @property
+    def sort_column(self) -> str:
+        return self.sort.lstrip('-')
+
+    @property
+    def descending(self) -> bool:
+        return self.sort.startswith('-')
+
+    def filters(self) -> Dict[str, str]:
+        """
+        :return: A dictionary containing only the filters which are set.
+        """
+
+        return self.model_dump(exclude={'sort'}, exclude_none=True)
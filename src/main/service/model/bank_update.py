@@ -0,0 +1,14 @@
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class BankUpdate(BaseModel):
+    """
+    A service model class representing a partial update of a Bank, in which only the given fields are updated
+    """
+
+    model_config = ConfigDict(extra='forbid')
+
+    name: Optional[str] = None
+    location: Optional[str] = None
@@ -1,8 +1,34 @@
+import json
+from functools import lru_cache
+from typing import Tuple
+
 from sqlalchemy import inspect
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library encoder is used without it
+    orjson = None
+
+
+@lru_cache(maxsize=None)
+def column_keys(model) -> Tuple[str, ...]:
+    """
+    Return the keys of the columns mapped by a SQLAlchemy model class. The mapper is only inspected once per model class.
+    """
+    return tuple(c.key for c in inspect(model).column_attrs)
+
 
 def to_dict(entity):
     """
     Convert SQLAlchemy model instance to dict excluding internal attributes.
     """
-    return {c.key: getattr(entity, c.key) for c in inspect(entity).mapper.column_attrs}
+    return {key: getattr(entity, key) for key in column_keys(type(entity))}
+
+
+def dumps(obj) -> bytes:
+    """
+    Encode an object made of dicts, lists, strings and numbers to compact JSON bytes, using orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode()
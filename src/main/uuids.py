@@ -0,0 +1,62 @@
+import os
+import time
+import uuid
+from typing import Optional
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Generates a version 7 UUID (RFC 9562): a 48-bit UNIX timestamp in milliseconds followed by 74 random bits. UUIDs generated later sort
+    after the earlier ones (except within the same millisecond), so that they are inserted at the end of an index rather than at random
+    places of it, which would split its pages and spread the writes over the whole index.
+
+    :return: The UUID.
+    """
+
+    timestamp_ms = time.time_ns() // 1_000_000 & 0xFFFF_FFFF_FFFF
+    random_a = int.from_bytes(os.urandom(2), 'big') & 0xFFF
+    random_b = int.from_bytes(os.urandom(8), 'big') & 0x3FFF_FFFF_FFFF_FFFF
+    # the timestamp, the version (7), 12 random bits, the variant (0b10) and 62 random bits
+    return uuid.UUID(int=timestamp_ms << 80 | 0x7 << 76 | random_a << 64 | 0x2 << 62 | random_b)
+
+
+def sql_server_ordered_uuid() -> uuid.UUID:
+    """
+    Generates a version 7 UUID whose 6 timestamp bytes are moved to its end. SQL Server does not order `uniqueidentifier` values by their
+    bytes from left to right, but compares their last 6 bytes first, so version 7 UUIDs would be inserted at random places of its indexes.
+    Moving the timestamp there makes SQL Server order them by time, as the ids of `NEWSEQUENTIALID()`. The result is not a valid version 7
+    UUID anymore, but is as unique.
+
+    :return: The UUID.
+    """
+
+    data = uuid7().bytes
+    return uuid.UUID(bytes=data[6:] + data[:6])
+
+
+def new_uuid(dialect_name: str) -> str:
+    """
+    Generates the id of a new row, ordered by creation time in the indexes of the given database.
+
+    :param dialect_name: The name of the SQLAlchemy dialect of the database, e.g. `mssql` or `sqlite`.
+    :return: The id, as a canonical UUID string.
+    """
+
+    return str(sql_server_ordered_uuid() if dialect_name == 'mssql' else uuid7())
+
+
+def canonical_uuid(value) -> Optional[str]:
+    """
+    Converts a UUID given in any of the forms accepted by `uuid.UUID` (e.g. in upper case, or without dashes) to its canonical form: lower
+    case, with dashes. Ids are compared in this form, e.g. by the bank cache.
+
+    :param value: The UUID, as a string or a `uuid.UUID`.
+    :return: The canonical UUID string, or None if the value is not a UUID.
+    """
+
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    try:
+        return str(uuid.UUID(value))
+    except (AttributeError, TypeError, ValueError):
+        return None
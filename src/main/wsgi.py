@@ -0,0 +1,4 @@
+from .app import create_app
+
+# the app served by a WSGI server, e.g. `gunicorn --config main/gunicorn_config.py main.wsgi:app` from the `src` folder
+app = create_app()
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from src.main.admission_control import ConcurrencyLimiter, RateLimiter
+from src.main.app import create_app
+from src.main.db import create_schema
+
+
+class AdmissionControlTests(unittest.TestCase):
+    """
+    Unit test class that tests the admission control of the bank API, using a SQLite database file instead of SQL Server.
+    """
+
+    def create_app(self, **config):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory.name, 'banks.db')}",
+                          "BANK_CACHE_BACKEND": "none", "ADMISSION_CONTROL": True, **config})
+        with app.app_context():
+            create_schema()
+        return app
+
+    def test_clients_exceeding_their_rate_are_rejected(self):
+        # given (an app allowing each client a burst of 2 requests, refilled at 1 request per second)
+        app = self.create_app(ADMISSION_RATE_LIMIT=1, ADMISSION_BURST=2, ADMISSION_CLIENT_HEADER="X-Forwarded-For")
+        client = app.test_client()
+
+        # when (a client sends 3 requests at once, and another client sends 1)
+        responses = [client.get('/api/banks/count', headers={"X-Forwarded-For": "10.0.0.1, 10.0.0.254"}) for _ in range(3)]
+        other_client_response = client.get('/api/banks/count', headers={"X-Forwarded-For": "10.0.0.2"})
+
+        # then (the third request of the first client is rejected with a delay to retry after, while the other client is served)
+        self.assertEqual([response.status_code for response in responses], [200, 200, 429])
+        self.assertEqual(responses[2].headers["Retry-After"], "1")
+        self.assertEqual(other_client_response.status_code, 200)
+        metrics = client.get('/metrics').get_data(as_text=True)
+        self.assertIn('http_requests_shed_total{route_class="read",reason="rate_limited"} 1', metrics)
+
+    def test_requests_beyond_the_concurrency_limit_are_shed(self):
+        # given (an app serving one bank list at a time without queueing, whose lists are slow)
+        app = self.create_app(ADMISSION_MAX_CONCURRENT_LISTS=1, ADMISSION_MAX_QUEUE=0)
+        bank_service = app.extensions["bank_service"]
+        list_banks_page = bank_service.list_banks_page
+        list_started = threading.Event()
+
+        def slow_list_banks_page(*args, **kwargs):
+            list_started.set()
+            time.sleep(0.2)
+            return list_banks_page(*args, **kwargs)
+
+        bank_service.list_banks_page = slow_list_banks_page
+        slow_responses = []
+        thread = threading.Thread(target=lambda: slow_responses.append(app.test_client().get('/api/banks')))
+
+        # when (a second list, and a count, are requested while the first list is in progress)
+        thread.start()
+        list_started.wait(1)
+        shed_response = app.test_client().get('/api/banks')
+        count_response = app.test_client().get('/api/banks/count')
+        thread.join()
+
+        # then (the second list is rejected at once, while the first list and the count, another route class, are served)
+        self.assertEqual(shed_response.status_code, 503)
+        self.assertEqual(shed_response.headers["Retry-After"], "1")
+        self.assertEqual(count_response.status_code, 200)
+        self.assertEqual(slow_responses[0].status_code, 200)
+        metrics = app.test_client().get('/metrics').get_data(as_text=True)
+        self.assertIn('http_requests_shed_total{route_class="list",reason="queue_full"} 1', metrics)
+        self.assertIn('admission_requests_in_flight{route_class="list"} 0', metrics)
+
+    def test_concurrency_limiter_queue(self):
+        # given (a limiter with a single slot, which is taken)
+        limiter = ConcurrencyLimiter(limit=1, max_queue=1, queue_timeout=0.05, latency_threshold=1)
+        limiter.acquire()
+
+        # when (requests arrive while the slot is taken, then while the latency is above the threshold)
+        timed_out = limiter.acquire()
+        threading.Timer(0.05, lambda: limiter.release(0.1)).start()
+        limiter.queue_timeout = 1
+        acquired_once_released = limiter.acquire()
+        limiter.release(10)
+        limiter.acquire()
+        slow = limiter.acquire()
+
+        # then (they wait for the slot, until the timeout, unless the latency shows they would not be served in time)
+        self.assertEqual(timed_out, 'queue_timeout')
+        self.assertIsNone(acquired_once_released)
+        self.assertEqual(slow, 'latency')
+
+    def test_rate_limiter_refills_and_bounds_its_clients(self):
+        # given (a rate limiter of 100 requests per second without bursts, keeping at most 1 client)
+        rate_limiter = RateLimiter(rate=100, burst=1, max_clients=1)
+
+        # when (a client sends requests before and after its bucket is refilled, and another client evicts it)
+        first = rate_limiter.take("a")
+        too_soon = rate_limiter.take("a")
+        time.sleep(0.02)
+        refilled = rate_limiter.take("a")
+        rate_limiter.take("b")
+
+        # then (the request sent too soon waits for the refill, and only the latest client is kept)
+        self.assertEqual(first, 0)
+        self.assertGreater(too_soon, 0)
+        self.assertEqual(refilled, 0)
+        self.assertEqual(list(rate_limiter._buckets), ["b"])
+
+
+if __name__ == '__main__':
+    unittest.main()
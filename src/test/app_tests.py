@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from src.main.app import create_app
+from src.main.db import create_schema
+from src.main.db_pool import InstrumentedQueuePool
+
+
+class AppTests(unittest.TestCase):
+    """
+    Unit test class that tests the app factory, using SQLite databases instead of SQL Server.
+    """
+
+    def test_create_app_with_config_overrides(self):
+        # given (a SQLite database file)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database_uri = f"sqlite:///{os.path.join(directory.name, 'banks.db')}"
+
+        # when (an app is created for it)
+        app = create_app({"SQLALCHEMY_DATABASE_URI": database_uri, "BANK_CACHE_BACKEND": "memory"})
+
+        # then (the config overrides the one read from `.env`, and the pool options are built for the overridden database)
+        self.assertEqual(app.config["SQLALCHEMY_DATABASE_URI"], database_uri)
+        self.assertEqual(app.config["SQLALCHEMY_ENGINE_OPTIONS"]["poolclass"], InstrumentedQueuePool)
+        self.assertNotIn("fast_executemany", app.config["SQLALCHEMY_ENGINE_OPTIONS"])
+        self.assertIsNotNone(app.extensions["bank_service"].bank_cache)
+
+    def test_apps_have_their_own_bank_service(self):
+        # given (two apps using different in-memory databases)
+        first_app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "BANK_CACHE_BACKEND": "none"})
+        second_app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "BANK_CACHE_BACKEND": "none"})
+        for app in (first_app, second_app):
+            with app.app_context():
+                create_schema()
+
+        # when (a bank is created through the first app)
+        response = first_app.test_client().post('/api/banks', json={"name": "TEB", "location": "Kosovo"})
+
+        # then (it is only visible through the first app)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNot(first_app.extensions["bank_service"], second_app.extensions["bank_service"])
+        self.assertEqual(first_app.test_client().get('/api/banks/count').get_json(), {"count": 1})
+        self.assertEqual(second_app.test_client().get('/api/banks/count').get_json(), {"count": 0})
+
+    def test_apps_have_their_own_metrics(self):
+        # given (two apps created in the same process, the first of which served a request)
+        first_app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "BANK_CACHE_BACKEND": "memory"})
+        first_app.test_client().get('/api/banks/unknown-route/nested')
+        second_app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "BANK_CACHE_BACKEND": "memory"})
+
+        # when (the metrics of the second app are retrieved)
+        metrics = second_app.test_client().get('/metrics').get_data(as_text=True)
+
+        # then (each metric family is rendered once, and the requests served by the first app are not included)
+        families = [line.split()[2] for line in metrics.splitlines() if line.startswith('# TYPE ')]
+        self.assertIn('bank_cache_hits_total', families)
+        self.assertEqual(len(families), len(set(families)))
+        self.assertIsNot(first_app.extensions["instrumentation"], second_app.extensions["instrumentation"])
+        self.assertNotIn('http_request_duration_seconds_count{method="GET",route="unmatched"', metrics)
+
+
+if __name__ == '__main__':
+    unittest.main()
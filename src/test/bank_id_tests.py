@@ -0,0 +1,91 @@
+import os
+import tempfile
+import time
+import unittest
+import uuid
+
+from sqlalchemy import Column, Float, Index, Integer, MetaData, String, Table, create_engine, insert
+
+from src.main.app import create_app
+from src.main.db import create_schema, db
+from src.main.repository.bank_id_migration import migrate_bank_ids
+from src.main.uuids import new_uuid
+
+
+class BankIdTests(unittest.TestCase):
+    """
+    Unit test class that tests the bank ids stored as time-ordered UUIDs, using a SQLite database file instead of SQL Server.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database_uri = f"sqlite:///{os.path.join(directory.name, 'banks.db')}"
+
+    def create_app(self):
+        app = create_app({"SQLALCHEMY_DATABASE_URI": self.database_uri, "BANK_CACHE_BACKEND": "none"})
+        with app.app_context():
+            create_schema()
+            self.addCleanup(db.engine.dispose)
+        return app
+
+    def test_banks_get_time_ordered_ids_which_can_be_given_in_any_case(self):
+        # given (an app where banks are created one at a time and in bulk, a few milliseconds apart)
+        client = self.create_app().test_client()
+        client.post('/api/banks', json={"name": "TEB", "location": "Kosovo"})
+        time.sleep(0.002)
+        bulk_results = client.post('/api/banks/bulk', json=[{"name": "BKT", "location": "Kosovo"}]).get_json()["results"]
+        bulk_ids = [result["id"] for result in bulk_results]
+        time.sleep(0.002)
+        client.post('/api/banks', json={"name": "NLB", "location": "Kosovo"})
+
+        # when (the banks are listed in id order, and retrieved and updated with their ids in upper case)
+        banks = client.get('/api/banks').get_json()
+        retrieved = client.get(f'/api/banks/{bulk_ids[0].upper()}')
+        updated = client.patch(f'/api/banks/{bulk_ids[0].upper()}', json={"location": "Albania"})
+        unknown = client.get('/api/banks/not-a-uuid')
+
+        # then (the ids are version 7 UUIDs in creation order, and the upper case ids find the same bank)
+        self.assertEqual([bank["name"] for bank in banks], ["TEB", "BKT", "NLB"])
+        self.assertEqual({uuid.UUID(bank["id"]).version for bank in banks}, {7})
+        self.assertEqual(retrieved.get_json()["id"], bulk_ids[0])
+        self.assertEqual(updated.get_json()["location"], "Albania")
+        self.assertEqual(unknown.status_code, 404)
+        self.assertEqual(client.get('/api/banks?after=not-a-uuid').status_code, 400)
+        # on SQL Server the timestamp is moved to the last 6 bytes, which it compares first (the ids may be generated a millisecond apart)
+        sql_server_id = uuid.UUID(new_uuid('mssql'))
+        sqlite_id = uuid.UUID(new_uuid('sqlite'))
+        self.assertIn(int.from_bytes(sqlite_id.bytes[:6], 'big') - int.from_bytes(sql_server_id.bytes[10:], 'big'), (0, 1))
+
+    def test_string_ids_are_migrated_to_uuids(self):
+        # given (a database created when bank ids were stored as strings, with a bank and its change)
+        bank_id = str(uuid.uuid4())
+        metadata = MetaData()
+        banks = Table('banks', metadata, Column('id', String(36), primary_key=True), Column('name', String(100)),
+                      Column('location', String(100)), Column('version', Integer), Index('ix_banks_name', 'name', 'id'))
+        bank_changes = Table('bank_changes', metadata, Column('sequence', Integer, primary_key=True), Column('bank_id', String(36)),
+                             Column('operation', String(10)), Column('name', String(100)), Column('location', String(100)),
+                             Column('changed_at', Float), Index('ix_bank_changes_bank_id', 'bank_id', 'sequence'))
+        engine = create_engine(self.database_uri)
+        metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(insert(banks).values(id=bank_id, name="TEB", location="Kosovo", version=1))
+            connection.execute(insert(bank_changes).values(sequence=5, bank_id=bank_id, operation="created", name="TEB",
+                                                           location="Kosovo", changed_at=time.time()))
+        engine.dispose()
+        app = self.create_app()
+
+        # when (the ids are migrated twice, then a bank is created)
+        with app.app_context():
+            migrated_tables = migrate_bank_ids(batch_size=1)
+            migrated_again = migrate_bank_ids()
+        client = app.test_client()
+        client.post('/api/banks', json={"name": "NLB", "location": "Kosovo"})
+
+        # then (the existing bank and change keep their ids, the new change follows them, and the second migration does nothing)
+        self.assertEqual(migrated_tables, ["banks", "bank_changes"])
+        self.assertEqual(migrated_again, [])
+        self.assertEqual(client.get(f'/api/banks/{bank_id}').get_json()["name"], "TEB")
+        self.assertEqual(client.get('/api/banks/count').get_json(), {"count": 2})
+        changes = client.get('/api/banks/changes?since=4').get_json()
+        self.assertEqual([(change["sequence"], change["bank_id"] == bank_id) for change in changes], [(5, True), (6, False)])
@@ -0,0 +1,213 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.main.cache.bank_cache import BankCache, create_bank_cache
+from src.main.cache.lru_ttl_cache_backend import LruTtlCacheBackend
+from src.main.cache.redis_cache_backend import RedisCacheBackend
+from src.main.service.bank_service import BankService
+
+
+class FakeRedis:
+    """
+    A minimal in-memory stand-in for `redis.Redis`, implementing the commands used by the RedisCacheBackend.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.expiries = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value.encode()
+        self.expiries[key] = ex
+
+    def incr(self, key):
+        value = int(self.values.get(key, b'0')) + 1
+        self.values[key] = str(value).encode()
+        return value
+
+    def expire(self, key, seconds):
+        self.expiries[key] = seconds
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """
+    A minimal stand-in for a `redis.Redis` pipeline, running its queued commands on a FakeRedis when it is executed.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((getattr(self.client, name), args))
+
+    def execute(self):
+        return [command(*args) for command, args in self.commands]
+
+
+class BankCacheTests(unittest.TestCase):
+    """
+    Unit test class that tests the BankCache, its backends and its use by the BankService.
+    """
+
+    def test_lru_ttl_backend_evicts_least_recently_used_entry(self):
+        # given (a backend holding at most 2 entries, where `a` is read after `b` is stored)
+        backend = LruTtlCacheBackend(max_size=2)
+        backend.set('a', 1)
+        backend.set('b', 2)
+        backend.get('a')
+
+        # when (a third entry is stored)
+        backend.set('c', 3)
+
+        # then (the least recently used entry `b` is evicted)
+        self.assertIsNone(backend.get('b'))
+        self.assertEqual(backend.get('a'), 1)
+        self.assertEqual(backend.get('c'), 3)
+
+    @patch('src.main.cache.lru_ttl_cache_backend.time')
+    def test_lru_ttl_backend_expires_entry(self, mock_time):
+        # given (an entry stored with a time to live of 10 seconds)
+        mock_time.monotonic.return_value = 100
+        backend = LruTtlCacheBackend(max_size=10)
+        backend.set('a', 1, ttl=10)
+
+        # when / then (the entry is returned before it expires, and not after)
+        mock_time.monotonic.return_value = 109
+        self.assertEqual(backend.get('a'), 1)
+        mock_time.monotonic.return_value = 110
+        self.assertIsNone(backend.get('a'))
+
+    def test_redis_backend(self):
+        # given (a backend using a fake Redis client)
+        client = FakeRedis()
+        backend = RedisCacheBackend(client)
+
+        # when (a value is stored and counters are incremented, one of them twice, with and without a time to live)
+        backend.set('bank:1:0', {'name': 'Bank A'}, ttl=0.5)
+        backend.incr('bank:1:version', ttl=1.5)
+        backend.incr('bank:1:version', ttl=1.5)
+        backend.incr('banks:generation')
+
+        # then (the values are stored JSON encoded under prefixed keys, and the times to live are rounded up)
+        self.assertEqual(backend.get('bank:1:0'), {'name': 'Bank A'})
+        self.assertEqual(backend.get('bank:1:version'), 2)
+        self.assertEqual(backend.get('banks:generation'), 1)
+        self.assertEqual(client.expiries['validata:bank:1:0'], 1)
+        self.assertEqual(client.expiries['validata:bank:1:version'], 2)
+        self.assertNotIn('validata:banks:generation', client.expiries)
+        self.assertIsNone(backend.get('bank:2:0'))
+
+    def test_bank_cache_counters_expire_after_the_values_stored_before_them(self):
+        # given (a cache whose values expire after 300 seconds, stored in Redis)
+        client = FakeRedis()
+        bank_cache = BankCache(RedisCacheBackend(client), ttl=300)
+
+        # when (a bank is written)
+        bank_cache.invalidate(['1'])
+
+        # then (its version and the list generation expire twice the time to live of the values after the write)
+        self.assertEqual(client.expiries['validata:bank:1:version'], 600)
+        self.assertEqual(client.expiries['validata:banks:generation'], 600)
+
+    def test_bank_cache_counts_hits_and_misses(self):
+        # given (an empty cache)
+        bank_cache = BankCache(LruTtlCacheBackend(max_size=10), ttl=None)
+        loader = MagicMock(return_value={'name': 'Bank A'})
+
+        # when (the same bank is retrieved twice)
+        first = bank_cache.get_bank('1', loader)
+        second = bank_cache.get_bank('1', loader)
+
+        # then (the bank is only loaded once)
+        self.assertEqual(first, second)
+        loader.assert_called_once()
+        self.assertEqual(bank_cache.stats(), {'hits': 1, 'misses': 1})
+
+    def test_bank_cache_invalidate_ignores_value_loaded_before_the_write(self):
+        # given (a reader loads a bank while it is being updated, and stores the stale data once the update is committed)
+        bank_cache = BankCache(LruTtlCacheBackend(max_size=10), ttl=None)
+
+        def load_stale_bank():
+            bank_cache.invalidate(['1'])
+            return {'name': 'Old Name'}
+
+        bank_cache.get_bank('1', load_stale_bank)
+
+        # when (the bank is retrieved again)
+        bank = bank_cache.get_bank('1', lambda: {'name': 'New Name'})
+
+        # then (the stale data is not returned)
+        self.assertEqual(bank, {'name': 'New Name'})
+
+    def test_bank_cache_invalidate_is_not_undone_by_eviction(self):
+        # given (a cache holding 2 values, where a reader stores stale data after the write, then another bank is cached)
+        bank_cache = BankCache(LruTtlCacheBackend(max_size=2), ttl=None)
+
+        def load_stale_bank():
+            bank_cache.invalidate(['1'])
+            return {'name': 'Old Name'}
+
+        bank_cache.get_bank('1', load_stale_bank)
+        bank_cache.get_bank('2', lambda: {'name': 'Bank B'})
+
+        # when (the bank is retrieved again, once the cache is full)
+        bank = bank_cache.get_bank('1', lambda: {'name': 'New Name'})
+
+        # then (the version of the bank was not evicted, so the stale data is not returned)
+        self.assertEqual(bank, {'name': 'New Name'})
+
+    @patch('src.main.cache.lru_ttl_cache_backend.time')
+    def test_lru_ttl_backend_expires_counter(self, mock_time):
+        # given (a counter incremented with a time to live of 10 seconds, and again 5 seconds later)
+        mock_time.monotonic.return_value = 100
+        backend = LruTtlCacheBackend(max_size=10)
+        backend.incr('bank:1:version', ttl=10)
+        mock_time.monotonic.return_value = 105
+        backend.incr('bank:1:version', ttl=10)
+
+        # when / then (each increment renews the time to live, and the counter starts from 0 once it expires)
+        mock_time.monotonic.return_value = 114
+        self.assertEqual(backend.get('bank:1:version'), 2)
+        mock_time.monotonic.return_value = 115
+        self.assertIsNone(backend.get('bank:1:version'))
+        self.assertEqual(backend.incr('bank:1:version'), 1)
+
+    def test_bank_service_invalidates_cache_on_write(self):
+        # given (a service whose cache holds a bank and the first page of banks)
+        bank_repository = MagicMock()
+        bank_repository.read_from_replica.side_effect = lambda read: read()
+        bank_repository.is_pinned_to_primary.return_value = False
+        bank_repository.get_bank_by_id.return_value = None
+        bank_repository.get_banks_page.return_value = []
+        bank_cache = BankCache(LruTtlCacheBackend(max_size=10), ttl=None)
+        bank_service = BankService(bank_repository, bank_cache)
+        bank_cache.get_bank('1', lambda: {'id': '1', 'name': 'Old Name', 'location': 'City A'})
+        bank_cache.get_banks('page:10:None', lambda: {'banks': [], 'next_cursor': None})
+
+        # when (the bank is deleted)
+        bank_repository.delete_bank.return_value = True
+        bank_service.delete_bank('1')
+
+        # then (both the bank and the page are loaded from the repository again)
+        self.assertIsNone(bank_service.get_bank('1'))
+        self.assertEqual(bank_service.list_banks_page(10), ([], None))
+        bank_repository.get_bank_by_id.assert_called_once_with('1')
+        bank_repository.get_banks_page.assert_called_once_with(11, None, 'id', False, {})
+
+    def test_create_bank_cache(self):
+        # given / when / then (the cache is only created when a backend is configured)
+        self.assertIsNone(create_bank_cache({}))
+        self.assertIsInstance(create_bank_cache({'BANK_CACHE_BACKEND': 'memory'}).backend, LruTtlCacheBackend)
+        with self.assertRaises(ValueError):
+            create_bank_cache({'BANK_CACHE_BACKEND': 'memcached'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import tempfile
+import time
+import unittest
+
+from src.main.app import create_app
+from src.main.db import create_schema
+
+
+class ChangeFeedTests(unittest.TestCase):
+    """
+    Unit test class that tests the bank change feed, using a SQLite database file instead of SQL Server.
+    """
+
+    def create_app(self, **config):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory.name, 'banks.db')}",
+                          "BANK_CACHE_BACKEND": "none", **config})
+        with app.app_context():
+            create_schema()
+        return app
+
+    def test_writes_are_recorded_in_the_feed(self):
+        # given (a client following the feed from its latest change, before any bank is written)
+        client = self.create_app().test_client()
+        start = client.get('/api/banks/changes')
+
+        # when (banks are created, updated and deleted, and an update fails on a version conflict)
+        client.post('/api/banks', json={"name": "TEB", "location": "Kosovo"})
+        bank_id = client.get('/api/banks').get_json()[0]["id"]
+        client.patch(f'/api/banks/{bank_id}', json={"location": "Albania"})
+        client.put(f'/api/banks/{bank_id}', json={"name": "NLB", "location": "Kosovo"}, headers={"If-Match": '"1"'})
+        client.post('/api/banks/bulk', json=[{"name": "BKT", "location": "Kosovo"}])
+        client.delete(f'/api/banks/{bank_id}')
+        first_page = client.get('/api/banks/changes?since=0&limit=3')
+        second_page = client.get(first_page.headers["Link"].split(">")[0][1:])
+
+        # then (each committed write is returned in order with the data of the bank, and the failed update is not)
+        self.assertEqual(start.get_json(), [])
+        self.assertIn("since=0", start.headers["Link"])
+        changes = first_page.get_json() + second_page.get_json()
+        self.assertEqual([change["sequence"] for change in changes], [1, 2, 3, 4])
+        self.assertEqual([change["operation"] for change in changes], ["created", "updated", "created", "deleted"])
+        self.assertEqual(changes[1]["bank"], {"id": bank_id, "name": "TEB", "location": "Albania"})
+        self.assertEqual(changes[2]["bank"]["name"], "BKT")
+        self.assertIsNone(changes[3]["bank"])
+        self.assertEqual(changes[3]["bank_id"], bank_id)
+        self.assertIn("since=4", second_page.headers["Link"])
+        self.assertEqual(client.get('/api/banks/changes?since=-1').status_code, 400)
+
+    def test_feed_is_compacted_and_expires(self):
+        # given (a feed compacting and deleting its changes immediately, with a bank updated twice and another one created)
+        app = self.create_app(BANK_CHANGES_COMPACT_AFTER_SECONDS=0, BANK_CHANGES_RETENTION_SECONDS=3600)
+        client = app.test_client()
+        client.post('/api/banks', json={"name": "TEB", "location": "Kosovo"})
+        bank_id = client.get('/api/banks').get_json()[0]["id"]
+        client.patch(f'/api/banks/{bank_id}', json={"name": "TEB 2"})
+        client.patch(f'/api/banks/{bank_id}', json={"name": "TEB 3"})
+        client.post('/api/banks', json={"name": "BKT", "location": "Kosovo"})
+        bank_change_service = app.extensions["bank_change_service"]
+
+        with app.app_context():
+            # when (the feed is compacted)
+            compacted, deleted = bank_change_service.maintain(force=True)
+            compacted_changes = client.get('/api/banks/changes?since=0').get_json()
+
+            # then (only the latest update of the first bank is kept, along with the oldest change of the feed)
+            self.assertEqual((compacted, deleted), (1, 0))
+            self.assertEqual([change["sequence"] for change in compacted_changes], [1, 3, 4])
+
+            # when (the changes expire, while a consumer has not read them)
+            bank_change_service.retention = 0
+            _, deleted = bank_change_service.maintain(force=True)
+            expired = client.get('/api/banks/changes?since=1')
+            latest = client.get('/api/banks/changes?since=3')
+
+            # then (the latest change is kept, and the consumer is asked to reload the banks, unlike a consumer which is up to date)
+            self.assertEqual(deleted, 2)
+            self.assertEqual(expired.status_code, 410)
+            self.assertEqual([change["sequence"] for change in latest.get_json()], [4])
+
+    def test_new_consumers_start_from_the_oldest_retained_change_once_changes_expired(self):
+        # given (a feed streaming for 0.1 s, whose first two changes were deleted by its retention)
+        app = self.create_app(BANK_CHANGES_POLL_INTERVAL_MS=10, BANK_CHANGES_STREAM_TIMEOUT_SECONDS=0.1)
+        client = app.test_client()
+        for name in ("TEB", "BKT", "NLB"):
+            client.post('/api/banks', json={"name": name, "location": "Kosovo"})
+        bank_change_service = app.extensions["bank_change_service"]
+        bank_change_service.retention = 0
+        with app.app_context():
+            bank_change_service.maintain(force=True)
+
+        # when (new consumers read the feed and its stream from the start)
+        changes = client.get('/api/banks/changes?since=0')
+        stream = client.get('/api/banks/changes/stream?since=0')
+
+        # then (they get the oldest retained change rather than being asked to reload the banks)
+        self.assertEqual(changes.status_code, 200)
+        self.assertEqual([change["sequence"] for change in changes.get_json()], [3])
+        self.assertEqual(stream.status_code, 200)
+        self.assertIn(b'id: 3\nevent: created\n', stream.data)
+        self.assertNotIn(b'id: 2\n', stream.data)
+
+    def test_changes_are_streamed_as_server_sent_events(self):
+        # given (an app whose feed streams poll every 10 ms and end after 0.3 s, with a bank already created)
+        app = self.create_app(BANK_CHANGES_POLL_INTERVAL_MS=10, BANK_CHANGES_STREAM_TIMEOUT_SECONDS=0.3, BANK_CHANGES_HEARTBEAT_SECONDS=0.1)
+        client = app.test_client()
+        client.post('/api/banks', json={"name": "TEB", "location": "Kosovo"})
+
+        # when (a client reconnects after the first change, and another bank is created while it is connected)
+        response = client.get('/api/banks/changes/stream', headers={"Last-Event-ID": "0"}, buffered=False)
+        events = response.response
+        first_events = next(events) + next(events)
+        app.test_client().post('/api/banks', json={"name": "BKT", "location": "Kosovo"})
+        started_at = time.monotonic()
+        later_events = b''.join(events)
+        response.close()
+
+        # then (the first change is sent at once, then the second one once created, with heartbeats until the stream ends)
+        self.assertEqual(response.mimetype, "text/event-stream")
+        self.assertTrue(first_events.startswith(b'retry: 10\n\n'))
+        self.assertIn(b'id: 1\nevent: created\ndata: {"sequence":1,', first_events)
+        self.assertIn(b'id: 2\nevent: created\ndata: ', later_events)
+        self.assertIn(b': heartbeat\n\n', later_events)
+        self.assertLess(time.monotonic() - started_at, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
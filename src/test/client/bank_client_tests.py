@@ -0,0 +1,123 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from werkzeug.serving import make_server
+
+from src.client.async_bank_client import AsyncBankClient
+from src.client.bank_client import BankApiError, BankClient
+from src.main.app import create_app
+from src.main.db import create_schema
+
+
+class BankClientTests(unittest.TestCase):
+    """
+    Unit test class that tests the bank clients against the bank API served in a thread, using a SQLite database file instead of SQL
+    Server.
+    """
+
+    def serve_app(self, wrap=None, **config) -> str:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory.name, 'banks.db')}",
+                          "BANK_CACHE_BACKEND": "none", **config})
+        with app.app_context():
+            create_schema()
+        server = make_server('127.0.0.1', 0, wrap(app) if wrap else app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.shutdown)
+        return f'http://127.0.0.1:{server.server_port}/api/banks'
+
+    def test_client_pages_banks_and_revalidates_its_cache(self):
+        # given (a client which created 7 banks with the bulk endpoint, 3 per request)
+        client = BankClient(self.serve_app())
+        self.addCleanup(client.close)
+        results = client.create_banks([{"name": f"Bank {index}", "location": "Kosovo"} for index in range(6)] + [{"name": "No location"}],
+                                      chunk_size=3)
+
+        # when (the banks are listed 2 per page and counted, one bank is retrieved twice, updated with its ETag, then retrieved again)
+        banks = list(client.list_banks(limit=2))
+        count = client.count_banks(name_prefix="Bank")
+        bank_id = results[0]["id"]
+        bank, etag = client.get_bank_with_etag(bank_id)
+        client.get_bank(bank_id)
+        hits_before_update = client.cache.hits
+        client.update_bank(bank_id, "Updated Bank", "Prishtina", if_match=etag)
+        updated_bank = client.get_bank(bank_id)
+
+        # then (the results are indexed across requests, all pages are followed, and the cached bank is only returned until it changes)
+        self.assertEqual([result["index"] for result in results], list(range(7)))
+        self.assertEqual([result["status"] for result in results], [201] * 6 + [400])
+        self.assertEqual(len(banks), 6)
+        self.assertEqual(count, 6)
+        self.assertEqual(bank["name"], "Bank 0")
+        self.assertEqual(hits_before_update, 1)
+        self.assertEqual(updated_bank["name"], "Updated Bank")
+        with self.assertRaises(BankApiError) as context:
+            client.update_bank(bank_id, "Stale Bank", "Prishtina", if_match=etag)
+        self.assertEqual(context.exception.status_code, 412)
+        self.assertTrue(client.delete_bank(bank_id))
+        self.assertIsNone(client.get_bank(bank_id))
+
+    def test_client_retries_after_the_delay_requested_by_the_server(self):
+        # given (an app rate limiting each client to 1 request per second, a client which sent one request, and a client waiting at most
+        # 0.3 s before a retry)
+        base_url = self.serve_app(ADMISSION_CONTROL=True, ADMISSION_RATE_LIMIT=1, ADMISSION_BURST=1)
+        client = BankClient(base_url, backoff=0.01)
+        capped_client = BankClient(base_url, backoff=0.01, max_backoff=0.3, max_retries=10)
+        self.addCleanup(client.close)
+        self.addCleanup(capped_client.close)
+        client.count_banks()
+
+        # when (the clients send a request at once, one after the other)
+        start = time.monotonic()
+        count = client.count_banks()
+        capped_count = capped_client.count_banks()
+
+        # then (the requests are rejected with `Retry-After: 1`, and served once sent again after a second, the capped client retrying
+        # more often than requested)
+        self.assertEqual((count, capped_count), (0, 0))
+        self.assertEqual(client.retries, 1)
+        self.assertGreater(capped_client.retries, 2)
+        self.assertGreaterEqual(time.monotonic() - start, 2)
+
+    def test_async_client_bounds_its_concurrent_requests(self):
+        # given (an app whose bank reads are slow, counting the requests it serves at once, and an async client sending at most 2 requests
+        # at once)
+        in_flight = [0]
+        max_in_flight = [0]
+        lock = threading.Lock()
+
+        def count_in_flight(app):
+            def slow_app(environ, start_response):
+                with lock:
+                    in_flight[0] += 1
+                    max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+                try:
+                    time.sleep(0.05)
+                    return app(environ, start_response)
+                finally:
+                    with lock:
+                        in_flight[0] -= 1
+            return slow_app
+
+        base_url = self.serve_app(wrap=count_in_flight)
+        bank_ids = [result["id"] for result in BankClient(base_url).create_banks([{"name": "TEB", "location": "Kosovo"}] * 5)]
+
+        async def get_banks():
+            async with AsyncBankClient(base_url, max_concurrency=2) as client:
+                banks = await client.get_banks(bank_ids + ["unknown"])
+                listed_banks = [bank async for bank in client.list_banks(limit=2)]
+                return banks, listed_banks
+
+        # when (6 banks are retrieved concurrently, and all banks are listed)
+        max_in_flight[0] = 0
+        banks, listed_banks = asyncio.run(get_banks())
+
+        # then (no more than 2 requests were served at once, and the banks are returned in order)
+        self.assertEqual(max_in_flight[0], 2)
+        self.assertEqual([bank["id"] if bank else None for bank in banks], bank_ids + [None])
+        self.assertEqual(sorted(bank["id"] for bank in listed_banks), sorted(bank_ids))
@@ -0,0 +1,120 @@
+import gzip
+import os
+import tempfile
+import unittest
+import zlib
+
+from src.main.app import create_app
+from src.main.compression import StreamCompressor
+from src.main.db import create_schema
+
+
+class CompressionTests(unittest.TestCase):
+    """
+    Unit test class that tests the compression of the bank API responses, using a SQLite database file instead of SQL Server.
+    """
+
+    def create_app(self, banks=50, **config):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory.name, 'banks.db')}",
+                          "BANK_CACHE_BACKEND": "none", **config})
+        with app.app_context():
+            create_schema()
+        client = app.test_client()
+        client.post('/api/banks/bulk', json=[{"name": f"Bank {index}", "location": "Kosovo"} for index in range(banks)])
+        return app
+
+    def test_responses_are_compressed_with_the_accepted_encoding(self):
+        # given (an app compressing the responses of at least 1024 bytes)
+        client = self.create_app().test_client()
+        uncompressed = client.get('/api/banks')
+
+        # when (the banks are requested by clients accepting gzip, refusing it, or accepting nothing but the identity)
+        compressed = client.get('/api/banks', headers={"Accept-Encoding": "br;q=0.5, gzip"})
+        refused = client.get('/api/banks', headers={"Accept-Encoding": "gzip;q=0, identity"})
+        small = client.get('/api/banks/count', headers={"Accept-Encoding": "gzip"})
+
+        # then (only the large response accepted in gzip is compressed, keeping its ETag)
+        self.assertEqual(compressed.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", compressed.headers["Vary"])
+        self.assertEqual(compressed.headers["ETag"], uncompressed.headers["ETag"])
+        self.assertEqual(gzip.decompress(compressed.get_data()), uncompressed.get_data())
+        self.assertLess(len(compressed.get_data()), len(uncompressed.get_data()))
+        self.assertNotIn("Content-Encoding", uncompressed.headers)
+        self.assertNotIn("Content-Encoding", refused.headers)
+        self.assertNotIn("Content-Encoding", small.headers)
+
+    def test_streamed_responses_are_compressed_chunk_by_chunk(self):
+        # given (an app with more banks than a stream batch)
+        client = self.create_app(banks=1200).test_client()
+
+        # when (all banks are streamed to a client accepting gzip)
+        response = client.get('/api/banks?stream=ndjson', headers={"Accept-Encoding": "gzip"}, buffered=False)
+        chunks = list(response.response)
+        response.close()
+
+        # then (each batch is flushed in its own chunk, which the client can decompress as soon as it is received)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Length", response.headers)
+        self.assertGreaterEqual(len(chunks), 3)
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        first_lines = decompressor.decompress(chunks[0]).splitlines()
+        self.assertEqual(len(first_lines), 500)
+        lines = first_lines + b''.join(decompressor.decompress(chunk) for chunk in chunks[1:]).splitlines()
+        self.assertEqual(len(lines), 1200)
+        self.assertTrue(decompressor.eof)
+
+    def test_compressed_pages_are_cached_until_a_write(self):
+        # given (an app whose first page was requested once in gzip)
+        app = self.create_app()
+        client = app.test_client()
+        first = client.get('/api/banks?limit=20', headers={"Accept-Encoding": "gzip"})
+        bank_service = app.extensions["bank_service"]
+        list_banks_page = bank_service.list_banks_page
+        loaded_pages = []
+
+        def counting_list_banks_page(*args, **kwargs):
+            loaded_pages.append(args)
+            return list_banks_page(*args, **kwargs)
+
+        bank_service.list_banks_page = counting_list_banks_page
+
+        # when (the page is requested again, then once one of its banks is updated, and a filtered page is requested)
+        cached = client.get('/api/banks?limit=20', headers={"Accept-Encoding": "gzip"})
+        bank_id = client.get('/api/banks?limit=1').get_json()[0]["id"]
+        client.patch(f'/api/banks/{bank_id}', json={"name": "Renamed"})
+        updated = client.get('/api/banks?limit=20', headers={"Accept-Encoding": "gzip"})
+        client.get('/api/banks?limit=20&location=Kosovo', headers={"Accept-Encoding": "gzip"})
+        client.get('/api/banks?limit=20&location=Kosovo', headers={"Accept-Encoding": "gzip"})
+
+        # then (the cached page is returned without being loaded, until the update changes it; filtered pages are not cached)
+        self.assertEqual(cached.get_data(), first.get_data())
+        self.assertEqual(cached.headers["ETag"], first.headers["ETag"])
+        self.assertEqual(cached.headers["Link"], first.headers["Link"])
+        self.assertEqual(cached.headers["Content-Encoding"], "gzip")
+        self.assertNotEqual(updated.headers["ETag"], first.headers["ETag"])
+        self.assertIn(b"Renamed", gzip.decompress(updated.get_data()))
+        self.assertEqual(len(loaded_pages), 4)
+        metrics = client.get('/metrics').get_data(as_text=True)
+        self.assertIn('compressed_payload_cache_hits_total 1', metrics)
+
+    def test_stream_compressor_flushes_decodable_chunks(self):
+        # given (a gzip stream compressor)
+        compressor = StreamCompressor("gzip", 6)
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        # when (two chunks are compressed and flushed, then the stream is finished)
+        first = compressor.compress(b'{"id": 1}\n') + compressor.flush()
+        second = compressor.compress(b'{"id": 2}\n') + compressor.flush()
+        end = compressor.finish()
+
+        # then (each flushed chunk decompresses on its own, and the whole stream is a valid gzip body)
+        self.assertEqual(decompressor.decompress(first), b'{"id": 1}\n')
+        self.assertEqual(decompressor.decompress(second), b'{"id": 2}\n')
+        self.assertEqual(gzip.decompress(first + second + end), b'{"id": 1}\n{"id": 2}\n')
+        self.assertRaises(ValueError, StreamCompressor, "deflate", 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from src.main.app import create_app
+from src.main.async_db import create_async_session_factory
+from src.main.controller.async_bank_controller import AsyncBankController
+from src.main.db import create_schema
+from src.main.repository.async_bank_repository import AsyncBankRepository
+from src.main.service.async_bank_service import AsyncBankService
+
+
+class AsyncBankControllerTests(unittest.TestCase):
+    """
+    Unit test class that tests the ASGI application next to the Flask app, both using the same SQLite database file and bank cache, as they
+    would share a SQL Server database and a Redis cache.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database_uri = f"sqlite:///{os.path.join(directory.name, 'banks.db')}"
+        self.app = create_app({"SQLALCHEMY_DATABASE_URI": database_uri, "BANK_CACHE_BACKEND": "memory"})
+        with self.app.app_context():
+            create_schema()
+        session_factory = create_async_session_factory(database_uri)
+        self.addCleanup(lambda: asyncio.run(session_factory.kw['bind'].dispose()))
+        bank_cache = self.app.extensions["bank_service"].bank_cache
+        self.asgi_app = AsyncBankController(AsyncBankService(AsyncBankRepository(session_factory), bank_cache))
+
+    def call_asgi_app(self, method, path, body=None, query_string=b''):
+        messages = [{'type': 'http.request', 'body': json.dumps(body).encode() if body is not None else b'', 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query_string, 'headers': []}
+        asyncio.run(self.asgi_app(scope, receive, send))
+        return sent[0]['status'], json.loads(sent[1]['body']) if sent[1]['body'] else None
+
+    def test_writes_of_the_asgi_app_invalidate_the_cache_of_the_flask_app(self):
+        # given (a bank created and read through the Flask app, which cached it)
+        client = self.app.test_client()
+        client.post('/api/banks', json={"name": "TEB", "location": "Kosovo"})
+        bank_id = client.get('/api/banks').get_json()[0]["id"]
+        client.get(f'/api/banks/{bank_id}')
+
+        # when (the bank is updated, another one created, then the first one deleted, through the ASGI app)
+        updated_status, _ = self.call_asgi_app('PUT', f'/api/banks/{bank_id}', {"name": "NLB", "location": "Albania"})
+        bank_after_update = client.get(f'/api/banks/{bank_id}').get_json()
+        created_status, _ = self.call_asgi_app('POST', '/api/banks', {"name": "BKT", "location": "Kosovo"})
+        names_after_create = [bank["name"] for bank in client.get('/api/banks').get_json()]
+        deleted_status, _ = self.call_asgi_app('DELETE', f'/api/banks/{bank_id}')
+        deleted_bank = client.get(f'/api/banks/{bank_id}')
+
+        # then (the Flask app reads each write instead of the cached banks)
+        self.assertEqual((updated_status, created_status, deleted_status), (200, 200, 200))
+        self.assertEqual(bank_after_update["name"], "NLB")
+        self.assertEqual(names_after_create, ["NLB", "BKT"])
+        self.assertEqual(deleted_bank.status_code, 404)
+        self.assertEqual(client.get('/api/banks/count').get_json(), {"count": 1})
+
+    def test_get_banks_validates_and_canonicalizes_the_cursor(self):
+        # given (two banks)
+        client = self.app.test_client()
+        client.post('/api/banks', json={"name": "TEB", "location": "Kosovo"})
+        client.post('/api/banks', json={"name": "NLB", "location": "Albania"})
+        first_id = client.get('/api/banks').get_json()[0]["id"]
+
+        # when (the page after the first bank is retrieved with its id in upper case, and with cursors which are not ids)
+        page_status, page = self.call_asgi_app('GET', '/api/banks', query_string=f'limit=1&after={first_id.upper()}'.encode())
+        invalid_responses = [self.call_asgi_app('GET', '/api/banks', query_string=f'after={cursor}'.encode()) for cursor in ('NLB', '')]
+
+        # then (the cursor is compared in its canonical form, and the invalid cursors are rejected like by the Flask app)
+        self.assertEqual(page_status, 200)
+        self.assertEqual([bank["name"] for bank in page], ["NLB"])
+        for status, body in invalid_responses:
+            self.assertEqual(status, 400)
+            self.assertEqual(body, {"error": "'after' is not a valid cursor for this 'sort'."})
+        self.assertEqual(client.get('/api/banks?after=NLB').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
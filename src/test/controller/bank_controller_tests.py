@@ -1,7 +1,11 @@
+import json
 import unittest
 from unittest.mock import MagicMock, patch
 from flask import Flask
 from src.main.controller.bank_controller import bank_controller
+from src.main.exceptions import VersionConflictError
+from src.main.service.model.bank_search import BankSearch
+from src.main.service.model.bank_update import BankUpdate
 
 
 class BankControllerTests(unittest.TestCase):
@@ -16,11 +20,14 @@ class BankControllerTests(unittest.TestCase):
         # Set up a Flask test app and patch the `bank_service` used in the controller to allow isolating the controller logic from the
         # actual service and database.
         app = Flask(__name__)
-        app.register_blueprint(bank_controller)
+        app.register_blueprint(bank_controller, url_prefix='/api/banks')
         self.app = app
         self.client = app.test_client()
-        patcher = patch('src.main.controller.bank_controller.bank_service')
-        self.mock_service = patcher.start()
+        # the mock is given explicitly, since `bank_service` is a proxy to the service of the current app which cannot be inspected here
+        self.mock_service = MagicMock()
+        patcher = patch('src.main.controller.bank_controller.bank_service', self.mock_service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     def test_create_bank(self):
         # given (a mock bank object returned by the service layer)
@@ -67,17 +74,16 @@ class BankControllerTests(unittest.TestCase):
         self.assertEqual(response_missing_both.get_json()["error"], "Both 'name' and 'location' fields are required.")
 
     def test_get_all_banks(self):
-        # given (2 mock banks returned from the service)
-        mock_bank_1 = MagicMock()
-        mock_bank_1.dict.return_value = {"id": "1", "name": "Bank A", "location": "City A"}
-        mock_bank_2 = MagicMock()
-        mock_bank_2.dict.return_value = {"id": "2", "name": "Bank B", "location": "City B"}
-        self.mock_service.list_banks.return_value = [mock_bank_1, mock_bank_2]
+        # given (2 banks returned from the service)
+        self.mock_service.list_banks_page.return_value = ([
+            {"id": "1", "name": "Bank A", "location": "City A"},
+            {"id": "2", "name": "Bank B", "location": "City B"}
+        ], None)
 
         # when (a GET request is made to `/api/banks` endpoint)
         response = self.client.get('/api/banks')
 
-        # then (a 200 response is returned with the list of banks)
+        # then (a 200 response is returned with the list of banks and no link to a next page)
         self.assertEqual(response.status_code, 200)
         data = response.get_json()
         self.assertIsInstance(data, list)
@@ -85,11 +91,119 @@ class BankControllerTests(unittest.TestCase):
         self.assertEqual(data[0]["location"], "City A")
         self.assertEqual(data[1]["name"], "Bank B")
         self.assertEqual(data[1]["location"], "City B")
+        self.assertEqual(data[1]["id"], "2")
+        self.assertNotIn("Link", response.headers)
+        self.mock_service.list_banks_page.assert_called_once_with(100, None, BankSearch())
+
+    def test_get_banks_page_that_has_next_page(self):
+        # given (the service returns a full page and the cursor of the next page)
+        self.mock_service.list_banks_page.return_value = ([{"id": "1", "name": "Bank A", "location": "City A"}], "cursor-1")
+
+        # when (a GET request is made to `/api/banks` endpoint with `limit` and `after` parameters)
+        response = self.client.get('/api/banks?limit=1&after=cursor-0')
+
+        # then (a 200 response is returned with a link to the next page)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()), 1)
+        self.assertEqual(response.headers["Link"], '</api/banks/?limit=1&after=cursor-1>; rel="next"')
+        self.mock_service.list_banks_page.assert_called_once_with(1, "cursor-0", BankSearch())
+
+    def test_get_banks_with_invalid_limit_that_bad_request(self):
+        # given / when (GET requests are made to `/api/banks` endpoint with a non-numeric and a too large `limit`)
+        for limit in ("abc", "0", "1001"):
+            response = self.client.get(f'/api/banks?limit={limit}')
+
+            # then (a 400 Bad Request is returned and the service is not called)
+            self.assertEqual(response.status_code, 400)
+        self.mock_service.list_banks_page.assert_not_called()
+
+    def test_search_banks_with_filters_and_sort(self):
+        # given (the service returns a full page of matching banks and the cursor of the next page)
+        self.mock_service.list_banks_page.return_value = ([{"id": "1", "name": "Bank A", "location": "City A"}], "cursor-1")
+
+        # when (a GET request is made to `/api/banks` endpoint with filters and a `sort` parameter)
+        response = self.client.get('/api/banks?limit=1&name_prefix=Bank&location=City%20A&sort=-name')
+
+        # then (the search is passed to the service and kept in the link to the next page)
+        self.assertEqual(response.status_code, 200)
+        search = BankSearch(name_prefix="Bank", location="City A", sort="-name")
+        self.mock_service.list_banks_page.assert_called_once_with(1, None, search)
+        self.mock_service.get_banks_page_etag.assert_called_once_with(1, None, search)
+        self.assertEqual(response.headers["Link"],
+                         '</api/banks/?limit=1&after=cursor-1&location=City+A&name_prefix=Bank&sort=-name>; rel="next"')
+
+    def test_search_banks_with_invalid_sort_or_cursor_that_bad_request(self):
+        # given (the service rejects the cursor)
+        self.mock_service.get_banks_page_etag.side_effect = ValueError("Invalid cursor")
+
+        # when (GET requests are made to `/api/banks` endpoint with an unknown `sort` and an invalid `after`)
+        response_invalid_sort = self.client.get('/api/banks?sort=version')
+        response_invalid_cursor = self.client.get('/api/banks?sort=name&after=abc')
+
+        # then (a 400 Bad Request is returned and no page is loaded)
+        self.assertEqual(response_invalid_sort.status_code, 400)
+        self.assertIn("'sort' must be one of", response_invalid_sort.get_json()["error"])
+        self.assertEqual(response_invalid_cursor.status_code, 400)
+        self.mock_service.list_banks_page.assert_not_called()
+
+    def test_count_banks(self):
+        # given (the service counts 42 matching banks)
+        self.mock_service.count_banks.return_value = 42
+
+        # when (a GET request is made to `/api/banks/count` endpoint with a filter)
+        response = self.client.get('/api/banks/count?q=Ber')
+
+        # then (a 200 response is returned with the count, and no banks are loaded)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {"count": 42})
+        self.mock_service.count_banks.assert_called_once_with(BankSearch(q="Ber"))
+        self.mock_service.list_banks_page.assert_not_called()
+
+    def test_stream_banks_as_ndjson(self):
+        # given (the service streams 2 batches of banks)
+        self.mock_service.stream_banks.return_value = iter([
+            [{"id": "1", "name": "Bank A", "location": "City A"}, {"id": "2", "name": "Bank B", "location": "City B"}],
+            [{"id": "3", "name": "Bank C", "location": "City C"}]
+        ])
+
+        # when (a GET request is made to `/api/banks` endpoint with `stream=ndjson`)
+        response = self.client.get('/api/banks?stream=ndjson')
+
+        # then (a 200 response is returned with one JSON object per line)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line)["name"] for line in lines], ["Bank A", "Bank B", "Bank C"])
+
+    def test_stream_banks_as_json_array(self):
+        # given (the service streams no banks)
+        self.mock_service.stream_banks.return_value = iter([])
+
+        # when (a GET request is made to `/api/banks` endpoint with `stream=json`)
+        response = self.client.get('/api/banks?stream=json')
+
+        # then (a 200 response is returned with an empty JSON array)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), [])
+
+    def test_stream_banks_as_json_array_that_spans_batches(self):
+        # given (the service streams 2 batches of banks)
+        self.mock_service.stream_banks.return_value = iter([
+            [{"id": "1", "name": "Bank A", "location": "City A"}, {"id": "2", "name": "Bank B", "location": "City B"}],
+            [{"id": "3", "name": "Bank C", "location": "City C"}]
+        ])
+
+        # when (a GET request is made to `/api/banks` endpoint with `stream=json`)
+        response = self.client.get('/api/banks?stream=json')
+
+        # then (a 200 response is returned with a single JSON array containing all banks)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([bank["id"] for bank in response.get_json()], ["1", "2", "3"])
 
     def test_update_bank_that_success(self):
         # given (1 mock bank returned from the service)
         mock_bank = MagicMock()
-        mock_bank.dict.return_value = {"id": "1", "name": "Updated Bank", "location": "Updated City"}
+        mock_bank.model_dump.return_value = {"id": "1", "name": "Updated Bank", "location": "Updated City"}
         self.mock_service.update_bank.return_value = mock_bank
 
         # when (a PUT request is made to `/api/banks/{id}` endpoint)
@@ -119,6 +233,40 @@ class BankControllerTests(unittest.TestCase):
         data = response.get_json()
         self.assertEqual(data["error"], "Bank not found")
 
+    def test_patch_bank_that_success(self):
+        # given (1 mock bank returned from the service)
+        mock_bank = MagicMock()
+        mock_bank.model_dump.return_value = {"id": "1", "name": "Bank A", "location": "Updated City"}
+        self.mock_service.patch_bank.return_value = mock_bank
+
+        # when (a PATCH request is made to `/api/banks/{id}` endpoint with only the `location`)
+        response = self.client.patch('/api/banks/1', json={"location": "Updated City"})
+
+        # then (a 200 response is returned with the updated bank, and only the `location` is passed to the service)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["location"], "Updated City")
+        self.mock_service.patch_bank.assert_called_once_with("1", BankUpdate(location="Updated City"), None)
+
+    def test_patch_bank_with_invalid_payload_that_bad_request(self):
+        # given / when (PATCH requests are made to `/api/banks/{id}` endpoint without fields, with an unknown field and with a non-string)
+        for payload in ({}, {"name": "X", "version": 2}, {"name": 1}, ["name"]):
+            response = self.client.patch('/api/banks/1', json=payload)
+
+            # then (a 400 Bad Request is returned and the service is not called)
+            self.assertEqual(response.status_code, 400)
+        self.mock_service.patch_bank.assert_not_called()
+
+    def test_patch_that_bank_not_found(self):
+        # given (an exception is thrown in the service)
+        self.mock_service.patch_bank.side_effect = Exception("Bank not found")
+
+        # when (a PATCH request is made to `/api/banks/{id}` endpoint)
+        response = self.client.patch('/api/banks/1', json={"name": "X"})
+
+        # then (a 400 Bad request is returned, as for PUT)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["error"], "Bank not found")
+
     def test_delete_bank_that_success(self):
         # given (the bank service returns True indicating the bank was successfully deleted)
         self.mock_service.delete_bank.return_value = True
@@ -144,7 +292,7 @@ class BankControllerTests(unittest.TestCase):
     def test_get_bank_details_that_success(self):
         # given (a mock bank object returned by the service layer)
         mock_bank = MagicMock()
-        mock_bank.dict.return_value = {"id": "1", "name": "Bank A", "location": "City A"}
+        mock_bank.model_dump.return_value = {"id": "1", "name": "Bank A", "location": "City A"}
         self.mock_service.get_bank.return_value = mock_bank
 
         # when (a GET request is made to `/banks/{id}` endpoint)
@@ -167,6 +315,123 @@ class BankControllerTests(unittest.TestCase):
         self.assertEqual(response.status_code, 404)
         self.assertEqual(response.get_json()["message"], "Bank not found")
 
+    def test_get_bank_details_that_not_modified(self):
+        # given (the current ETag of the bank is its version 3)
+        self.mock_service.get_bank_etag.return_value = "3"
+
+        # when (a GET request is made to `/banks/{id}` endpoint with a matching `If-None-Match` header)
+        response = self.client.get('/api/banks/1', headers={"If-None-Match": '"3"'})
+
+        # then (a 304 Not Modified response is returned with the ETag, without loading the bank)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], '"3"')
+        self.mock_service.get_bank.assert_not_called()
+
+    def test_get_bank_details_that_modified(self):
+        # given (the bank has changed since the client retrieved it)
+        mock_bank = MagicMock()
+        mock_bank.model_dump.return_value = {"id": "1", "name": "Bank A", "location": "City A"}
+        self.mock_service.get_bank.return_value = mock_bank
+        self.mock_service.get_bank_etag.return_value = "4"
+
+        # when (a GET request is made to `/banks/{id}` endpoint with an outdated `If-None-Match` header)
+        response = self.client.get('/api/banks/1', headers={"If-None-Match": '"3"'})
+
+        # then (a 200 response is returned with the bank and its current ETag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], '"4"')
+        self.assertEqual(response.get_json()["name"], "Bank A")
+
+    def test_get_banks_that_not_modified(self):
+        # given (the current ETag of the first page)
+        self.mock_service.get_banks_page_etag.return_value = "abc"
+
+        # when (a GET request is made to `/api/banks` endpoint with a matching `If-None-Match` header)
+        response = self.client.get('/api/banks', headers={"If-None-Match": '"abc"'})
+
+        # then (a 304 Not Modified response is returned without loading the page)
+        self.assertEqual(response.status_code, 304)
+        self.mock_service.list_banks_page.assert_not_called()
+
+    def test_update_bank_that_precondition_failed(self):
+        # given (the bank was modified since the client retrieved it)
+        self.mock_service.update_bank.side_effect = VersionConflictError("Bank was modified")
+
+        # when (a PUT request is made to `/api/banks/{id}` endpoint with an `If-Match` header)
+        response = self.client.put('/api/banks/1', json={"name": "X", "location": "Y"}, headers={"If-Match": '"3"'})
+
+        # then (a 412 Precondition Failed response is returned, and the expected version was given to the service)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response.get_json()["error"], "Bank was modified")
+        self.mock_service.update_bank.assert_called_once_with('1', {"name": "X", "location": "Y"}, {3})
+
+    def test_delete_bank_that_precondition_failed(self):
+        # given (the bank was modified since the client retrieved it)
+        self.mock_service.delete_bank.side_effect = VersionConflictError("Bank was modified")
+
+        # when (a DELETE request is made to `/banks/{id}` endpoint with an `If-Match` header)
+        response = self.client.delete('/api/banks/1', headers={"If-Match": '"3"'})
+
+        # then (a 412 Precondition Failed response is returned)
+        self.assertEqual(response.status_code, 412)
+        self.mock_service.delete_bank.assert_called_once_with('1', {3})
+
+    def test_bulk_create_banks(self):
+        # given (the service assigns an id to the single valid bank)
+        self.mock_service.bulk_create_banks.return_value = ["1"]
+
+        # when (a POST request is made to `/api/banks/bulk` endpoint with a valid and an invalid bank)
+        response = self.client.post('/api/banks/bulk', json=[
+            {"name": "Bank A", "location": "City A"},
+            {"name": "Bank B"}
+        ])
+
+        # then (a 200 response is returned with a result per item and only the valid bank is created)
+        self.assertEqual(response.status_code, 200)
+        results = response.get_json()["results"]
+        self.assertEqual(results[0], {"index": 0, "status": 201, "id": "1"})
+        self.assertEqual(results[1]["status"], 400)
+        self.assertEqual(results[1]["error"], "Both 'name' and 'location' fields are required.")
+        created_banks = self.mock_service.bulk_create_banks.call_args.args[0]
+        self.assertEqual([bank.name for bank in created_banks], ["Bank A"])
+
+    def test_bulk_update_banks(self):
+        # given (the service only finds the first bank)
+        self.mock_service.bulk_update_banks.return_value = {"1"}
+
+        # when (a PUT request is made to `/api/banks/bulk` endpoint with an existing, a missing and an invalid bank)
+        response = self.client.put('/api/banks/bulk', json=[
+            {"id": "1", "name": "Bank A", "location": "City A"},
+            {"id": "2", "name": "Bank B", "location": "City B"},
+            {"name": "Bank C", "location": "City C"}
+        ])
+
+        # then (a 200 response is returned with the status of each item)
+        self.assertEqual(response.status_code, 200)
+        results = response.get_json()["results"]
+        self.assertEqual([result["status"] for result in results], [200, 404, 400])
+        self.assertEqual(results[2]["error"], "The 'id' field is required.")
+
+    def test_bulk_delete_banks(self):
+        # given (the service only finds the first bank)
+        self.mock_service.bulk_delete_banks.return_value = {"1"}
+
+        # when (a DELETE request is made to `/api/banks/bulk` endpoint with an existing and a missing bank id)
+        response = self.client.delete('/api/banks/bulk', json=["1", "2"])
+
+        # then (a 200 response is returned with the status of each item)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result["status"] for result in response.get_json()["results"]], [200, 404])
+
+    def test_bulk_endpoints_with_invalid_payload_that_bad_request(self):
+        # given / when (bulk requests are made with a payload which is not a non-empty JSON array)
+        for payload in ({"name": "Bank A", "location": "City A"}, []):
+            response = self.client.post('/api/banks/bulk', json=payload)
+
+            # then (a 400 Bad Request is returned and the service is not called)
+            self.assertEqual(response.status_code, 400)
+        self.mock_service.bulk_create_banks.assert_not_called()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,131 @@
+import os
+import tempfile
+import unittest
+import uuid
+from http.cookies import SimpleCookie
+
+from sqlalchemy import create_engine, insert
+
+from src.main.app import create_app
+from src.main.db import create_schema, db
+from src.main.db_routing import PRIMARY_UNTIL_COOKIE, Replica, ReplicaRouter
+from src.main.repository.model.bank import BankEntity
+
+
+class DbRoutingTests(unittest.TestCase):
+    """
+    Unit test class that tests the routing of bank reads to read replicas, using two SQLite database files standing in for the primary and
+    the replica, which are not replicated so that the database serving each read can be told apart.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.primary_uri = f"sqlite:///{os.path.join(self.directory, 'primary.db')}"
+        self.replica_uri = f"sqlite:///{os.path.join(self.directory, 'replica.db')}"
+
+    def create_app(self, replica_uris, **config):
+        app = create_app({"SQLALCHEMY_DATABASE_URI": self.primary_uri, "DB_REPLICA_URIS": replica_uris, "BANK_CACHE_BACKEND": "none",
+                          "DB_READ_YOUR_WRITES_SECONDS": 60, **config})
+        with app.app_context():
+            create_schema()
+            engines = list(db.engines.values())
+        self.addCleanup(lambda: [engine.dispose() for engine in engines])
+        return app
+
+    def create_replica(self, uri, *bank_names):
+        engine = create_engine(uri)
+        db.metadata.create_all(engine)
+        with engine.begin() as connection:
+            for index, name in enumerate(bank_names):
+                connection.execute(
+                    insert(BankEntity.__table__).values(id=str(uuid.UUID(int=index)), name=name, location='Replica', version=1)
+                )
+        engine.dispose()
+
+    def test_reads_go_to_the_replica_until_the_client_writes(self):
+        # given (an app whose replica holds a bank which the primary does not)
+        self.create_replica(self.replica_uri, "Replica Bank")
+        app = self.create_app([self.replica_uri])
+        writer = app.test_client()
+        reader = app.test_client()
+
+        # when (a client creates a bank, which is only written to the primary)
+        created = writer.post('/api/banks', json={"name": "Primary Bank", "location": "Kosovo"})
+
+        # then (the writer is pinned to the primary and reads its own write, while other clients keep reading from the replica)
+        self.assertEqual(created.status_code, 200)
+        self.assertIn(PRIMARY_UNTIL_COOKIE, SimpleCookie(created.headers["Set-Cookie"]))
+        self.assertEqual([bank["name"] for bank in writer.get('/api/banks').get_json()], ["Primary Bank"])
+        self.assertEqual(writer.get('/api/banks/count').get_json(), {"count": 1})
+        self.assertEqual([bank["name"] for bank in reader.get('/api/banks').get_json()], ["Replica Bank"])
+        self.assertEqual(reader.get(f'/api/banks/{uuid.UUID(int=0)}').get_json()["name"], "Replica Bank")
+
+    def test_cache_is_not_filled_from_a_replica_lagging_behind_a_write(self):
+        # given (an app caching bank reads, whose replica has not received the update of a bank yet)
+        self.create_replica(self.primary_uri, "TEB")
+        self.create_replica(self.replica_uri, "TEB")
+        app = self.create_app([self.replica_uri], BANK_CACHE_BACKEND="memory")
+        bank_id = str(uuid.UUID(int=0))
+        writer = app.test_client()
+        readers = [app.test_client(), app.test_client()]
+
+        # when (a client updates the bank, then other clients read it while the replica still holds the old data)
+        updated = writer.patch(f'/api/banks/{bank_id}', json={"name": "NLB"})
+        first_reads = [readers[0].get(f'/api/banks/{bank_id}').get_json()["name"], readers[0].get('/api/banks').get_json()[0]["name"]]
+        second_reads = [readers[1].get(f'/api/banks/{bank_id}').get_json()["name"], readers[1].get('/api/banks').get_json()[0]["name"]]
+
+        # then (the cache is filled from the primary, so that no client reads the old data from it)
+        self.assertEqual(updated.status_code, 200)
+        self.assertEqual(first_reads, ["NLB", "NLB"])
+        self.assertEqual(second_reads, ["NLB", "NLB"])
+        self.assertGreater(app.extensions["bank_service"].bank_cache.stats()["hits"], 0)
+
+    def test_reads_fall_back_to_the_primary_while_the_replica_is_unhealthy(self):
+        # given (an app whose replica cannot be opened yet, and which checks its health again at every read)
+        replica_directory = os.path.join(self.directory, 'replica')
+        replica_uri = f"sqlite:///{os.path.join(replica_directory, 'replica.db')}"
+        app = self.create_app([replica_uri], DB_REPLICA_HEALTH_CHECK_INTERVAL=0)
+        client = app.test_client()
+        router = app.extensions["replica_router"]
+
+        # when (banks are counted before and after the replica becomes available)
+        count_while_unhealthy = client.get('/api/banks/count').get_json()
+        healthy_while_unavailable = router.replicas[0].healthy
+        os.mkdir(replica_directory)
+        self.create_replica(replica_uri, "Replica Bank")
+        count_once_healthy = client.get('/api/banks/count').get_json()
+
+        # then (the primary answers while the replica is unhealthy, and the replica again once it passes its health check)
+        self.assertEqual(count_while_unhealthy, {"count": 0})
+        self.assertFalse(healthy_while_unavailable)
+        self.assertEqual(count_once_healthy, {"count": 1})
+        self.assertTrue(router.replicas[0].healthy)
+        metrics = client.get('/metrics').get_data(as_text=True)
+        self.assertIn('db_replica_healthy{replica="0"} 1', metrics)
+        self.assertIn('db_primary_reads_total 1', metrics)
+
+    def test_replica_selection(self):
+        # given (routers choosing among two replicas in turn, and by their number of reads in progress)
+        round_robin = ReplicaRouter([Replica("0", None), Replica("1", None)], 'round_robin')
+        least_loaded = ReplicaRouter([Replica("0", None), Replica("1", None)], 'least_loaded')
+
+        # when (four reads are started without ending, and reads are started while others on the second replica end)
+        round_robin_choices = [round_robin.choose().name for _ in range(4)]
+        busy_replica = least_loaded.choose()
+        other_replica = least_loaded.choose()
+        least_loaded.choose()
+        least_loaded.release(other_replica)
+        least_loaded_choice = least_loaded.choose()
+
+        # then (the replicas are chosen alternately, or the one with the fewest reads in progress)
+        self.assertEqual(round_robin_choices, ["0", "1", "0", "1"])
+        self.assertEqual((busy_replica.name, other_replica.name), ("0", "1"))
+        self.assertEqual(least_loaded_choice.name, "1")
+        with self.assertRaises(ValueError):
+            ReplicaRouter([], 'random')
+
+
+if __name__ == '__main__':
+    unittest.main()
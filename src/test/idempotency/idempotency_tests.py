@@ -0,0 +1,146 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from src.main.app import create_app
+from src.main.db import create_schema
+from src.main.idempotency.db_idempotency_store import DbIdempotencyStore
+from src.main.idempotency.memory_idempotency_store import MemoryIdempotencyStore
+
+
+class IdempotencyTests(unittest.TestCase):
+    """
+    Unit test class that tests the `Idempotency-Key` support of the bank write endpoints, with the memory and database stores, using a
+    SQLite database file instead of SQL Server.
+    """
+
+    def create_app(self, backend, **config):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory.name, 'banks.db')}",
+                          "BANK_CACHE_BACKEND": "none", "IDEMPOTENCY_BACKEND": backend, **config})
+        with app.app_context():
+            create_schema()
+        return app
+
+    def test_retried_create_returns_the_stored_response(self):
+        for backend in ("memory", "db"):
+            with self.subTest(backend=backend):
+                # given (an app storing the responses of the requests sent with an idempotency key)
+                app = self.create_app(backend)
+                client = app.test_client()
+                payload = {"name": "TEB", "location": "Kosovo"}
+
+                # when (a create is sent twice with the same key, and once with another key)
+                first = client.post('/api/banks', json=payload, headers={"Idempotency-Key": "create-1"})
+                retry = client.post('/api/banks', json=payload, headers={"Idempotency-Key": "create-1"})
+                other = client.post('/api/banks', json=payload, headers={"Idempotency-Key": "create-2"})
+
+                # then (the retry gets the response of the first create without creating the bank again)
+                self.assertEqual((first.status_code, retry.status_code, other.status_code), (200, 200, 200))
+                self.assertEqual(retry.get_json(), first.get_json())
+                self.assertEqual(retry.headers["Idempotent-Replayed"], "true")
+                self.assertNotIn("Idempotent-Replayed", first.headers)
+                self.assertEqual(client.get('/api/banks/count').get_json(), {"count": 2})
+
+    def test_key_reused_for_a_different_request_is_rejected(self):
+        # given (a key used for a create)
+        app = self.create_app("memory")
+        client = app.test_client()
+        client.post('/api/banks', json={"name": "TEB", "location": "Kosovo"}, headers={"Idempotency-Key": "create-1"})
+
+        # when (the key is sent with another payload, and an empty key is sent)
+        reused = client.post('/api/banks', json={"name": "NLB", "location": "Kosovo"}, headers={"Idempotency-Key": "create-1"})
+        empty = client.post('/api/banks', json={"name": "NLB", "location": "Kosovo"}, headers={"Idempotency-Key": ""})
+
+        # then (both are rejected, and only the first bank is created)
+        self.assertEqual(reused.status_code, 422)
+        self.assertEqual(empty.status_code, 400)
+        self.assertEqual(client.get('/api/banks/count').get_json(), {"count": 1})
+
+    def test_concurrent_duplicates_wait_for_the_request_in_progress(self):
+        for backend in ("memory", "db"):
+            with self.subTest(backend=backend):
+                # given (an app whose creates are slow, so that duplicates arrive while the first one is in progress)
+                app = self.create_app(backend)
+                bank_service = app.extensions["bank_service"]
+                create_bank = bank_service.create_bank
+
+                def slow_create_bank(bank):
+                    time.sleep(0.2)
+                    create_bank(bank)
+
+                bank_service.create_bank = slow_create_bank
+                responses = []
+
+                def send():
+                    response = app.test_client().post('/api/banks', json={"name": "TEB", "location": "Kosovo"},
+                                                      headers={"Idempotency-Key": "create-1"})
+                    responses.append(response.status_code)
+
+                # when (the same create is sent by 4 clients concurrently)
+                threads = [threading.Thread(target=send) for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+                # then (it is executed once, and every client gets its response)
+                self.assertEqual(responses, [200] * 4)
+                self.assertEqual(app.test_client().get('/api/banks/count').get_json(), {"count": 1})
+                metrics = app.test_client().get('/metrics').get_data(as_text=True)
+                self.assertIn('idempotency_requests_total{outcome="executed"} 1', metrics)
+                self.assertIn('idempotency_requests_total{outcome="replayed"} 3', metrics)
+
+    def test_failed_request_releases_its_key(self):
+        # given (an app whose first create fails)
+        app = self.create_app("memory")
+        bank_service = app.extensions["bank_service"]
+        create_bank = bank_service.create_bank
+
+        def failing_create_bank(bank):
+            raise RuntimeError("Database unavailable")
+
+        bank_service.create_bank = failing_create_bank
+        client = app.test_client()
+        payload = {"name": "TEB", "location": "Kosovo"}
+
+        # when (the create is retried with the same key once the database is available)
+        failed = client.post('/api/banks', json=payload, headers={"Idempotency-Key": "create-1"})
+        bank_service.create_bank = create_bank
+        retry = client.post('/api/banks', json=payload, headers={"Idempotency-Key": "create-1"})
+
+        # then (the retry is executed)
+        self.assertEqual(failed.status_code, 500)
+        self.assertEqual(retry.status_code, 200)
+        self.assertNotIn("Idempotent-Replayed", retry.headers)
+        self.assertEqual(client.get('/api/banks/count').get_json(), {"count": 1})
+
+    def test_stores_expire_and_bound_their_records(self):
+        # given (stores whose records expire immediately, and a memory store holding at most 2 records)
+        app = self.create_app("db")
+        expiring_stores = [MemoryIdempotencyStore(max_size=10, ttl=0, lock_timeout=0), DbIdempotencyStore(ttl=0, lock_timeout=0)]
+        bounded_store = MemoryIdempotencyStore(max_size=2, ttl=60, lock_timeout=60)
+
+        with app.app_context():
+            for store in expiring_stores:
+                # when (a key is claimed again once its record expired)
+                store.claim("key", "fingerprint")
+                claimed_again = store.claim("key", "other fingerprint")
+
+                # then (the expired record is replaced)
+                self.assertIsNone(claimed_again)
+
+        # when (3 keys are claimed in the bounded store)
+        for key in ("a", "b", "c"):
+            bounded_store.claim(key, "fingerprint")
+
+        # then (the oldest record is evicted)
+        self.assertIsNone(bounded_store.get("a"))
+        self.assertEqual(bounded_store.get("c"), {"fingerprint": "fingerprint", "response": None})
+
+
+if __name__ == '__main__':
+    unittest.main()
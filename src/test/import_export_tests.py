@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+import unittest
+import uuid
+from unittest.mock import patch
+
+from src.main.app import create_app
+from src.main.bank_formats import pyarrow
+from src.main.db import create_schema
+
+
+class ImportExportTests(unittest.TestCase):
+    """
+    Unit test class that tests the export and import of banks as files, using a SQLite database file instead of SQL Server.
+    """
+
+    def create_app(self, **config):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory.name, 'banks.db')}",
+                          "BANK_CACHE_BACKEND": "none", **config})
+        with app.app_context():
+            create_schema()
+        return app
+
+    def test_exported_banks_can_be_imported_again(self):
+        for file_format in ("ndjson", "csv") + (("parquet",) if pyarrow is not None else ()):
+            with self.subTest(file_format=file_format):
+                # given (an app with 5 banks, one of them with a comma and quotes in its name, and an empty app)
+                source = self.create_app().test_client()
+                source.post('/api/banks/bulk', json=[{"name": f'Bank "{index}", Kosovo', "location": "Prishtina"} for index in range(5)])
+                target = self.create_app(BULK_CHUNK_SIZE=2).test_client()
+
+                # when (the banks are exported in batches of 2, imported, then imported again)
+                with patch("src.main.controller.bank_controller.EXPORT_BATCH_SIZE", 2):
+                    export = source.get(f'/api/banks/export?format={file_format}', buffered=False)
+                    chunks = list(export.response)
+                    export.close()
+                first_import = target.post(f'/api/banks/import?format={file_format}', data=b''.join(chunks))
+                second_import = target.post(f'/api/banks/import?format={file_format}', data=b''.join(chunks))
+
+                # then (the file is streamed batch by batch, and the second import updates the banks created by the first one)
+                self.assertGreaterEqual(len(chunks), 3)
+                self.assertIn(f"filename=banks.{file_format}", export.headers["Content-Disposition"])
+                self.assertEqual(first_import.get_json()["created"], 5)
+                self.assertEqual((second_import.get_json()["created"], second_import.get_json()["updated"]), (0, 5))
+                self.assertGreater(second_import.get_json()["rows_per_second"], 0)
+                exported = sorted(source.get('/api/banks').get_json(), key=lambda bank: bank["id"])
+                self.assertEqual(sorted(target.get('/api/banks').get_json(), key=lambda bank: bank["id"]), exported)
+
+    def test_invalid_rows_are_skipped_and_reported(self):
+        # given (an NDJSON file with an invalid line, a row without location, a row with an invalid id and an id given twice)
+        client = self.create_app().test_client()
+        bank_id = str(uuid.uuid4())
+        lines = [
+            json.dumps({"name": "TEB", "location": "Kosovo"}),
+            "{not json",
+            json.dumps({"name": "NLB"}),
+            json.dumps({"id": "42", "name": "BKT", "location": "Kosovo"}),
+            "",
+            json.dumps({"id": bank_id, "name": "Raiffeisen", "location": "Kosovo"}),
+            json.dumps({"id": bank_id.upper(), "name": "Raiffeisen Bank", "location": "Kosovo"}),
+        ]
+
+        # when (the file is imported, with the format given by its content type)
+        response = client.post('/api/banks/import', data="\n".join(lines), content_type="application/x-ndjson")
+
+        # then (the valid rows are written, the last row of the repeated id winning, and the others are reported with their row number)
+        result = response.get_json()
+        self.assertEqual((result["created"], result["updated"], result["invalid"]), (2, 0, 3))
+        self.assertEqual([error["row"] for error in result["errors"]], [2, 3, 4])
+        self.assertEqual(client.get(f'/api/banks/{bank_id}').get_json()["name"], "Raiffeisen Bank")
+        self.assertEqual(client.get('/api/banks/changes?since=0').get_json()[-1]["bank_id"], bank_id)
+
+    def test_csv_files_which_cannot_be_decoded_are_rejected(self):
+        # given (a CSV file with an empty id, one which is not encoded in UTF-8 after its first row, and one with an unterminated quote)
+        client = self.create_app().test_client()
+        empty_id = b'id,name,location\n,TEB,Kosovo\n'
+        latin_1 = b'id,name,location\n,NLB,Kosovo\n,Banka Ekonomike,Prishtin\xeb\n'
+        unterminated_quote = b'id,name,location\n,"BKT,Kosovo\n' + b'x' * 200000
+
+        # when (the files are imported)
+        empty_id_import = client.post('/api/banks/import?format=csv', data=empty_id)
+        latin_1_import = client.post('/api/banks/import?format=csv', data=latin_1)
+        unterminated_quote_import = client.post('/api/banks/import?format=csv', data=unterminated_quote)
+
+        # then (the empty id creates a bank with a new id, and the files which cannot be decoded are rejected with an error message)
+        self.assertEqual((empty_id_import.get_json()["created"], empty_id_import.get_json()["invalid"]), (1, 0))
+        self.assertEqual((latin_1_import.status_code, unterminated_quote_import.status_code), (400, 400))
+        self.assertIn("UTF-8 CSV", latin_1_import.get_json()["error"])
+        self.assertIn("field larger than field limit", unterminated_quote_import.get_json()["error"])
+        self.assertEqual([bank["name"] for bank in client.get('/api/banks').get_json()], ["TEB"])
+
+    def test_unsupported_formats_are_rejected(self):
+        # given (an app)
+        client = self.create_app().test_client()
+
+        # when (a file is exported and imported in an unknown format)
+        export = client.get('/api/banks/export?format=xml')
+        upload = client.post('/api/banks/import?format=xml', data=b'<banks/>')
+
+        # then (both are rejected)
+        self.assertEqual(export.status_code, 400)
+        self.assertEqual(upload.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+from flask import Flask, jsonify
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from src.main.controller.monitoring_controller import monitoring_controller
+from src.main.db import db
+from src.main.instrumentation import Instrumentation, serialization_timer
+
+
+class InstrumentationTests(unittest.TestCase):
+    """
+    Unit test class that tests the request instrumentation, using an in-memory SQLite database.
+    """
+
+    def setUp(self):
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        app.config['SLOW_QUERY_THRESHOLD_MS'] = 1000
+        app.config['N_PLUS_ONE_THRESHOLD'] = 3
+        self.instrumentation = Instrumentation(app)
+        app.register_blueprint(monitoring_controller)
+        db.init_app(app)
+
+        @app.route('/queries/<int:count>')
+        def run_queries(count):
+            for _ in range(count):
+                db.session.execute(text('SELECT 1'))
+            with serialization_timer():
+                return jsonify({'count': count})
+
+        @app.route('/failing-queries/<int:count>')
+        def run_failing_queries(count):
+            for _ in range(count):
+                try:
+                    db.session.execute(text('SELECT * FROM missing_table'))
+                except OperationalError:
+                    db.session.rollback()
+            db.session.execute(text('SELECT 1'))
+            return jsonify(dict(db.session.connection().connection.info))
+
+        self.client = app.test_client()
+
+    def test_server_timing_header(self):
+        # given / when (a request executing 2 queries is made)
+        response = self.client.get('/queries/2')
+
+        # then (the response contains the number of queries and the time spent in SQL, serialization and in total)
+        server_timing = response.headers['Server-Timing']
+        self.assertIn('db;desc="2 queries";dur=', server_timing)
+        self.assertIn('ser;dur=', server_timing)
+        self.assertIn('total;dur=', server_timing)
+
+    def test_metrics_contain_latency_histogram_per_route(self):
+        # given (2 requests are made to the same route)
+        self.client.get('/queries/1')
+        self.client.get('/queries/2')
+
+        # when (the metrics are retrieved)
+        metrics = self.client.get('/metrics').get_data(as_text=True)
+
+        # then (the latency histogram of the route counts both requests)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="/queries/<int:count>",status="200"} 2', metrics)
+        self.assertIn('http_request_sql_queries_sum{method="GET",route="/queries/<int:count>"} 3', metrics)
+
+    def test_n_plus_one_detection(self):
+        # given / when (a request executes the same query as many times as the N+1 threshold)
+        with self.assertLogs('src.main.instrumentation', level='WARNING') as logs:
+            self.client.get('/queries/3')
+
+        # then (the request is logged and counted as a probable N+1 query pattern)
+        self.assertIn('Probable N+1 query pattern', logs.output[0])
+        self.assertEqual(self.instrumentation.n_plus_one_requests._values[('GET', '/queries/<int:count>')], 1)
+
+    def test_slow_query_log(self):
+        # given (every query is considered slow)
+        self.instrumentation.slow_query_threshold = 0
+
+        # when (a request executing 1 query is made)
+        with self.assertLogs('src.main.instrumentation', level='WARNING') as logs:
+            self.client.get('/queries/1')
+
+        # then (the query is logged and counted as slow)
+        self.assertIn('Slow query', logs.output[0])
+        self.assertIn('SELECT 1', logs.output[0])
+        self.assertEqual(self.instrumentation.slow_queries._values[('/queries/<int:count>',)], 1)
+
+    def test_failing_queries_leave_nothing_on_the_pooled_connection(self):
+        # given / when (a request executes queries which fail, then a query which succeeds)
+        info = self.client.get('/failing-queries/3').get_json()
+
+        # then (the pooled connection holds no start time of the failed queries, and the succeeding query is measured)
+        self.assertEqual(info, {})
+        metrics = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('http_request_sql_queries_sum{method="GET",route="/failing-queries/<int:count>"} 1', metrics)
+
+
+if __name__ == '__main__':
+    unittest.main()
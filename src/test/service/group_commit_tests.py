@@ -0,0 +1,79 @@
+import threading
+import unittest
+
+from src.main.service.group_commit import GroupCommit
+
+
+class GroupCommitTests(unittest.TestCase):
+    """
+    Unit test class that tests the GroupCommit coalescing writes submitted concurrently by several threads.
+    """
+
+    def submit_concurrently(self, group_commit, items):
+        results = {}
+        threads = []
+        for item in items:
+            def submit(item=item):
+                try:
+                    results[item] = group_commit.submit(item)
+                except Exception as e:
+                    results[item] = e
+            threads.append(threading.Thread(target=submit))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_items_are_written_in_one_batch(self):
+        # given (a group commit with a window long enough for all threads to submit their item)
+        batches = []
+        group_commit = GroupCommit(lambda items: batches.append(list(items)) or [item * 10 for item in items], window=1,
+                                   max_batch_size=5)
+
+        # when (5 threads submit an item concurrently)
+        results = self.submit_concurrently(group_commit, range(5))
+
+        # then (the items are written in a single batch, which is written as soon as it is full, and each thread gets its own result)
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(sorted(batches[0]), [0, 1, 2, 3, 4])
+        self.assertEqual(results, {0: 0, 1: 10, 2: 20, 3: 30, 4: 40})
+        self.assertEqual((group_commit.batches, group_commit.items), (1, 5))
+
+    def test_batches_are_limited_to_max_batch_size(self):
+        # given (a group commit writing at most 2 items per batch)
+        batches = []
+        group_commit = GroupCommit(lambda items: batches.append(list(items)) or list(items), window=0.05, max_batch_size=2)
+
+        # when (5 threads submit an item concurrently)
+        results = self.submit_concurrently(group_commit, range(5))
+
+        # then (every item is written once, in batches of at most 2 items)
+        self.assertEqual(sorted(item for batch in batches for item in batch), [0, 1, 2, 3, 4])
+        self.assertTrue(all(len(batch) <= 2 for batch in batches))
+        self.assertEqual(results, {item: item for item in range(5)})
+
+    def test_errors_are_raised_in_the_threads_of_their_items(self):
+        # given (a group commit whose writes fail for odd items, and one whose writes fail as a whole)
+        failing_items = GroupCommit(lambda items: [ValueError(item) if item % 2 else item for item in items], window=0.05,
+                                    max_batch_size=10)
+
+        def fail(items):
+            raise RuntimeError("Database unavailable")
+
+        failing_batch = GroupCommit(fail, window=0.05, max_batch_size=10)
+
+        # when (items are submitted to both)
+        item_results = self.submit_concurrently(failing_items, range(4))
+        batch_results = self.submit_concurrently(failing_batch, range(3))
+
+        # then (only the odd items fail in the first, and every item fails in the second)
+        self.assertEqual(item_results[0], 0)
+        self.assertIsInstance(item_results[1], ValueError)
+        self.assertEqual(item_results[2], 2)
+        self.assertIsInstance(item_results[3], ValueError)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in batch_results.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()